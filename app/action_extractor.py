@@ -3,15 +3,23 @@
 SLM-ONLY Action Extractor - УТГА ХАДГАЛАХ сайжруулалт
 """
 
+import asyncio
 import json
 import re
-from typing import List, Dict
+import time
+from typing import List, Dict, Optional, Tuple
 
-try:
-    from ollama import chat
-    OLLAMA_AVAILABLE = True
-except ImportError:
-    OLLAMA_AVAILABLE = False
+from .llm_client import LLM_AVAILABLE, LLMClient, get_llm_client, session_call
+from .llm_scheduler import llm_scheduler
+from .model_registry import model_registry
+from .result_cache import fingerprint
+from .metrics import action_json_parse_failures, record_llm_response
+from .tracing import tracer, llm_response_attributes
+from .config import (
+    LLM_NUM_CTX, LLM_MAX_PREDICT, ACTIONS_OUTPUT_RATIO, TOKEN_SAFETY_MARGIN, CHUNK_CONCURRENCY
+)
+from .chunker import split_chunks
+from .tokens import token_estimator, current_usage, record_usage
 
 
 class SLMOnlyActionExtractor:
@@ -19,11 +27,31 @@ class SLMOnlyActionExtractor:
     Зөвхөн SLM ашиглах action extractor - УТГА ХАДГАЛНА
     """
     
-    def __init__(self, nlp_processor=None):
+    # JSON array хаагдсаны дараах мөр (тайлбар, ``` хаалт) эхлэхэд үүсгэлт
+    # зогсоно - stop-ийн "]" хариунд орохгүй тул _parse_actions буцааж нэмнэ
+    STOP_SEQUENCES = ["]\n", "] \n"]
+    
+    # Хэт бага budget-ээр (num_ctx жижиг) хэсэг бүр хэдхэн үг болохоос сэргийлнэ
+    MIN_CHUNK_TOKENS = 64
+    
+    def __init__(
+        self,
+        nlp_processor=None,
+        model: Optional[str] = None,
+        client: Optional[LLMClient] = None
+    ):
         self.nlp = nlp_processor
-        self.model = "qwen2.5:7b"
+        # Summarizer-тэй ижил model (model_registry) - хоёр model ачаалагдахгүй
+        self.model = model or model_registry.model
+        # Summarizer-тэй ижил pooled client (get_llm_client())
+        self.client = client or get_llm_client()
+        # Summarizer-тэй ижил context цонх - model дахин ачаалагдахгүй
+        self.num_ctx = LLM_NUM_CTX
+        # num_predict = протоколын token × output_ratio
+        self.output_ratio = ACTIONS_OUTPUT_RATIO
+        self.chunk_concurrency = max(1, CHUNK_CONCURRENCY)
         
-        if not OLLAMA_AVAILABLE:
+        if not LLM_AVAILABLE:
             raise RuntimeError(
                 "❌ Ollama суулгаагүй байна!\n"
                 "   Суулгах: pip install ollama"
@@ -31,14 +59,10 @@ class SLMOnlyActionExtractor:
         
         print(f"✅ Action Extractor бэлэн: {self.model}")
     
-    def extract_actions_with_llm(self, text: str) -> List[Dict]:
+    def _build_messages(self, text: str) -> Tuple[List[Dict], Dict]:
         """
-        SLM ашиглан action items гаргах - УТГА ХАДГАЛНА
+        САЙЖРУУЛСАН PROMPT - АГУУЛГА ӨӨРЧЛӨХГҮЙ
         """
-        if not OLLAMA_AVAILABLE:
-            raise RuntimeError("❌ SLM ажиллахгүй байна (Ollama суулгаагүй)")
-        
-        # САЙЖРУУЛСАН PROMPT - АГУУЛГА ӨӨРЧЛӨХГҮЙ
         system_prompt = """Та протоколоос ажил үүрэг, шийдвэр гаргадаг мэргэжилтэн.
 
 🎯 ХАМГИЙН ЧУХАЛ: АГУУЛГА ӨӨРЧЛӨХГҮЙ
@@ -94,83 +118,261 @@ JSON:
 
 Зөвхөн JSON array буцаа."""
 
+        # Тогтмол заавар эхэнд, протокол сүүлд (prompt cache-ийн prefix)
         user_prompt = f"""Энэ протоколоос ажил үүрэг, шийдвэр гарга. АГУУЛГА ХАДГАЛ.
+Зөвхөн JSON array буцаа. Нэр, огноо, ажлыг ӨӨРЧЛӨХГҮЙ.
 
 ПРОТОКОЛ:
-{text}
+{text}"""
 
-Зөвхөн JSON array буцаа. Нэр, огноо, ажлыг ӨӨРЧЛӨХГҮЙ."""
-
-        try:
-            response = chat(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                options={
-                    "temperature": 0.15,  # 0.2 → 0.15 (илүү консерватив)
-                    "top_p": 0.8,
-                    "num_predict": 2000,
-                    "repeat_penalty": 1.1,
-                }
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        options = {
+            "temperature": 0.15,  # 0.2 → 0.15 (илүү консерватив)
+            "top_p": 0.8,
+            "num_predict": token_estimator.predict_limit(text, self.output_ratio),
+            "repeat_penalty": 1.1,
+            "num_ctx": self.num_ctx,
+            "stop": self.STOP_SEQUENCES,
+        }
+        return messages, options
+    
+    def prompt_fingerprint(self) -> str:
+        """
+        Prompt, options-ийн fingerprint (result cache-ийн түлхүүрт)
+        """
+        return fingerprint(self.model, self._build_messages("{text}"), self.output_ratio, self.chunk_token_budget())
+    
+    def _chat_span(self, messages: List[Dict], options: Dict, prompt_tokens: int):
+        """SLM дуудлагын span (model, options, prompt урт)"""
+        return tracer.span(
+            "llm.chat",
+            model=self.model,
+            operation="actions",
+            options=options,
+            prompt_chars=sum(len(m["content"]) for m in messages),
+            prompt_tokens_est=prompt_tokens
+        )
+    
+    def _estimate_prompt(self, messages: List[Dict], options: Dict) -> int:
+        """Prompt + хариу num_ctx-д багтахгүй бол анхааруулна (хэсэглэлт budget-ээ хэтэрсэн)"""
+        prompt_tokens = token_estimator.count_messages(messages)
+        if prompt_tokens + options["num_predict"] > options["num_ctx"]:
+            print(
+                f"   ⚠️ Action prompt ({prompt_tokens} token) + хариу "
+                f"num_ctx={options['num_ctx']}-д багтахгүй - LLM_NUM_CTX-ийг нэмэгдүүлнэ үү"
             )
-            
-            content = response["message"]["content"].strip()
-            
-            # JSON гаргаж авах
-            json_match = re.search(r'\[.*\]', content, re.DOTALL)
-            if not json_match:
-                raise RuntimeError(
-                    f"❌ SLM JSON буцаагаагүй!\n"
-                    f"   Үр дүн: {content[:200]}..."
-                )
-            
+        return prompt_tokens
+    
+    def _salvage_truncated(self, content: str) -> Optional[List[Dict]]:
+        """Тасарсан JSON array-ийн сүүлийн бүрэн объект хүртэлх хэсэг"""
+        start = content.find("[")
+        end = content.rfind("}")
+        while start != -1 and end > start:
             try:
-                actions = json.loads(json_match.group())
-            except json.JSONDecodeError as e:
+                actions = json.loads(content[start:end + 1] + "]")
+                return actions if isinstance(actions, list) and actions else None
+            except json.JSONDecodeError:
+                end = content.rfind("}", start, end)
+        return None
+    
+    def _parse_actions(self, content: str, text: str) -> Tuple[List[Dict], int]:
+        """
+        SLM хариултаас JSON гаргаж, action бүрийг шалгах
+
+        Returns:
+            (шалгалтад тэнцсэн action-ууд, SLM-ийн буцаасан action-ийн тоо)
+        """
+        # Stop sequence-ээр зогссон бол хаалтын "]" хариунд ороогүй
+        if content.count("[") > content.count("]"):
+            content += "]"
+        
+        # JSON гаргаж авах
+        json_match = re.search(r'\[.*\]', content, re.DOTALL)
+        if not json_match:
+            action_json_parse_failures.inc()
+            raise RuntimeError(
+                f"❌ SLM JSON буцаагаагүй!\n"
+                f"   Үр дүн: {content[:200]}..."
+            )
+
+        try:
+            actions = json.loads(json_match.group())
+        except json.JSONDecodeError as e:
+            # num_predict-д хүрч тасарсан бол бүрэн action-уудыг авна
+            actions = self._salvage_truncated(content)
+            if actions is None:
+                action_json_parse_failures.inc()
                 raise RuntimeError(
                     f"❌ JSON parsing алдаа!\n"
                     f"   Алдаа: {str(e)}\n"
                     f"   SLM үр дүн: {json_match.group()[:200]}..."
                 )
-            
-            # УТГЫН ШАЛГАЛТ + Validation
-            validated_actions = []
-            for action in actions:
-                # Үндсэн validation
-                if not self._validate_action(action):
-                    print(f"   ⚠️  Буруу бүтэцтэй action алгассан: {action}")
-                    continue
-                
-                # Утгын шалгалт
-                if not self._check_action_meaning(action, text):
-                    print(f"   ⚠️  Утгагүй action алгассан: {action.get('who', '?')} - {action.get('action', '?')[:30]}")
-                    continue
-                
-                validated_actions.append(action)
-            
-            if not validated_actions:
-                raise RuntimeError(
-                    f"❌ Зөв action олдсонгүй!\n"
-                    f"   SLM {len(actions)} action буцаасан боловч\n"
-                    f"   бүгд буруу эсвэл утгагүй байна"
+            print(f"   ⚠️  JSON тасарсан - бүрэн {len(actions)} action-ийг авлаа")
+
+        # УТГЫН ШАЛГАЛТ + Validation
+        validated_actions = []
+        for action in actions:
+            # Үндсэн validation
+            if not self._validate_action(action):
+                print(f"   ⚠️  Буруу бүтэцтэй action алгассан: {action}")
+                continue
+
+            # Утгын шалгалт
+            if not self._check_action_meaning(action, text):
+                print(f"   ⚠️  Утгагүй action алгассан: {action.get('who', '?')} - {action.get('action', '?')[:30]}")
+                continue
+
+            validated_actions.append(action)
+
+        return validated_actions, len(actions)
+    
+    def _extraction_error(self, e: Exception) -> RuntimeError:
+        """Алдааг RuntimeError болгох"""
+        if isinstance(e, RuntimeError):
+            return e
+        if isinstance(e, json.JSONDecodeError):
+            return RuntimeError(f"❌ JSON parsing алдаа!\n{str(e)}")
+        return RuntimeError(
+            f"❌ Action extraction алдаа!\n"
+            f"   Model: {self.model}\n"
+            f"   Алдаа: {str(e)}"
+        )
+    
+    def chunk_token_budget(self) -> int:
+        """
+        Нэг action дуудлагад багтах протоколын token
+
+        Prompt + JSON хариу (num_predict) + нөөц num_ctx-д багтана - Ollama урт
+        prompt-ийн эхийг чимээгүй тасалж, тэр хэсгийн action алга болдог.
+        """
+        messages, _ = self._build_messages("")
+        prompt_overhead = token_estimator.count_messages(messages)
+        budget = min(
+            self.num_ctx - prompt_overhead - LLM_MAX_PREDICT - TOKEN_SAFETY_MARGIN,
+            int(LLM_MAX_PREDICT / self.output_ratio)
+        )
+        return max(budget, self.MIN_CHUNK_TOKENS)
+    
+    def _plan_chunks(self, text: str) -> List[str]:
+        """Budget-д багтвал бүтэн текст, үгүй бол ярианы ээлжээр хэсэглэсэн текстүүд"""
+        budget = self.chunk_token_budget()
+        if token_estimator.count(text) <= budget:
+            chunks = [text]
+        else:
+            chunks = [chunk.text for chunk in split_chunks(text, budget, length=token_estimator.count)]
+        usage = current_usage()
+        if usage is not None:
+            usage.set_budget(action_chunk_budget_tokens=budget, action_chunks=len(chunks))
+        return chunks
+    
+    def _chat(self, text: str) -> str:
+        """Нэг хэсгийн sync SLM дуудлага"""
+        messages, options = self._build_messages(text)
+        prompt_tokens = self._estimate_prompt(messages, options)
+        with self._chat_span(messages, options, prompt_tokens) as span:
+            call = session_call()
+            span.set_attribute("session_call", call)
+            started = time.perf_counter()
+            response = self.client.chat(messages=messages, options=options, **model_registry.chat_kwargs(self.model))
+            record_llm_response(self.model, "actions", response, time.perf_counter() - started, call)
+            record_usage(prompt_tokens, response, options)
+            span.set_attributes(llm_response_attributes(response))
+        return response["message"]["content"].strip()
+    
+    async def _achat(self, text: str) -> str:
+        """Нэг хэсгийн async SLM дуудлага"""
+        messages, options = self._build_messages(text)
+        prompt_tokens = self._estimate_prompt(messages, options)
+        with self._chat_span(messages, options, prompt_tokens) as span:
+            queued = time.perf_counter()
+            async with llm_scheduler.slot():
+                call = session_call()
+                started = time.perf_counter()
+                span.set_attributes({"slot_wait_ms": round((started - queued) * 1000, 1), "session_call": call})
+                response = await self.client.achat(
+                    messages=messages,
+                    options=options,
+                    **model_registry.chat_kwargs(self.model)
                 )
-            
-            print(f"   ✅ SLM: {len(validated_actions)} action олсон")
-            return validated_actions
-            
-        except json.JSONDecodeError as e:
-            raise RuntimeError(f"❌ JSON parsing алдаа!\n{str(e)}")
+                record_llm_response(self.model, "actions", response, time.perf_counter() - started, call)
+            record_usage(prompt_tokens, response, options)
+            span.set_attributes(llm_response_attributes(response))
+        return response["message"]["content"].strip()
+    
+    def _merge_actions(self, contents: List[str], text: str) -> List[Dict]:
+        """
+        Хэсгүүдийн хариуг шалгаж, давхардлыг (хэн + ажил) хасаж нийлүүлэх
+
+        Олон хэсэгтэй үед JSON гаргаж чадаагүй хэсгийг алгасна (бүгд бол алдаа).
+        """
+        actions: List[Dict] = []
+        seen = set()
+        returned = 0
+        errors = []
+        for index, content in enumerate(contents, 1):
+            try:
+                validated, count = self._parse_actions(content, text)
+            except RuntimeError as e:
+                if len(contents) == 1:
+                    raise
+                errors.append(e)
+                print(f"   ⚠️  Хэсэг {index}/{len(contents)}: action гаргаж чадсангүй - алгаслаа")
+                continue
+            returned += count
+            for action in validated:
+                key = (action["who"].strip().lower(), action["action"].strip().lower())
+                if key not in seen:
+                    seen.add(key)
+                    actions.append(action)
+
+        if errors and len(errors) == len(contents):
+            raise errors[0]
+        if not actions:
+            raise RuntimeError(
+                f"❌ Зөв action олдсонгүй!\n"
+                f"   SLM {returned} action буцаасан боловч\n"
+                f"   бүгд буруу эсвэл утгагүй байна"
+            )
+
+        print(f"   ✅ SLM: {len(actions)} action олсон ({len(contents)} хэсэг)")
+        return actions
+    
+    def extract_actions_with_llm(self, text: str) -> List[Dict]:
+        """
+        SLM ашиглан action items гаргах - УТГА ХАДГАЛНА
+
+        num_ctx-д багтахгүй урт протоколыг хэсэг хэсгээр нь гаргаж нийлүүлнэ.
+        """
+        if not LLM_AVAILABLE:
+            raise RuntimeError("❌ SLM ажиллахгүй байна (Ollama суулгаагүй)")
+        
+        try:
+            contents = [self._chat(chunk) for chunk in self._plan_chunks(text)]
+            return self._merge_actions(contents, text)
         except Exception as e:
-            if isinstance(e, RuntimeError):
-                raise
-            else:
-                raise RuntimeError(
-                    f"❌ Action extraction алдаа!\n"
-                    f"   Model: {self.model}\n"
-                    f"   Алдаа: {str(e)}"
-                )
+            raise self._extraction_error(e)
+    
+    async def aextract_actions_with_llm(self, text: str) -> List[Dict]:
+        """
+        extract_actions_with_llm-ийн async хувилбар - хэсгүүд зэрэг (CHUNK_CONCURRENCY)
+        """
+        if not LLM_AVAILABLE:
+            raise RuntimeError("❌ SLM ажиллахгүй байна (Ollama суулгаагүй)")
+        
+        semaphore = asyncio.Semaphore(self.chunk_concurrency)
+
+        async def extract(chunk: str) -> str:
+            async with semaphore:
+                return await self._achat(chunk)
+
+        try:
+            contents = await asyncio.gather(*(extract(chunk) for chunk in self._plan_chunks(text)))
+            return self._merge_actions(list(contents), text)
+        except Exception as e:
+            raise self._extraction_error(e)
     
     def _validate_action(self, action: Dict) -> bool:
         """
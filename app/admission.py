@@ -0,0 +1,243 @@
+"""
+API түвшний admission control ба backpressure
+
+Burst үед бүх хүсэлт Ollama дээр овоорч, бүгдийн latency хязгааргүй
+өсөөд timeout болдог. Үүнээс сэргийлж:
+    - Зэрэг явах pipeline-ийн тоо хязгаартай (ADMISSION_MAX_IN_FLIGHT)
+    - Хүлээлгийн дараалал хязгаартай (ADMISSION_MAX_QUEUE) - дүүрсэн
+      эсвэл хэт удаан хүлээсэн бол 503 + Retry-After
+    - Client бүрт token bucket (CLIENT_RATE_PER_MIN) - нэг client
+      бусдыг боогдуулбал 429 + Retry-After
+"""
+
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from .config import (
+    ADMISSION_MAX_IN_FLIGHT, ADMISSION_MAX_QUEUE, ADMISSION_QUEUE_TIMEOUT,
+    CLIENT_RATE_PER_MIN, CLIENT_BURST
+)
+
+# Санах ойд хадгалах client bucket-ийн дээд тоо
+MAX_CLIENTS = 10000
+
+
+class AdmissionRejected(Exception):
+    """
+    Хүсэлт хүлээн авагдаагүй
+
+    Args:
+        status_code: 429 (client хязгаар) эсвэл 503 (сервер дүүрсэн)
+        reason: "rate_limited", "queue_full", "queue_timeout"
+        retry_after: Дахин оролдох хүртэл хүлээх секунд
+    """
+
+    def __init__(self, status_code: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    Token bucket - минутад rate_per_min token нэмэгдэж, burst хүртэл хуримтлагдана
+    """
+
+    def __init__(self, rate_per_min: float, burst: int):
+        self.rate = rate_per_min / 60.0
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def take(self, cost: int = 1) -> float:
+        """
+        Token авах
+
+        Returns:
+            0 - амжилттай, эс бөгөөс хангалттай token хуримтлагдах хүртэл секунд
+        """
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """
+    Хязгаартай admission дараалал
+
+    Args:
+        max_in_flight: Зэрэг явах pipeline-ийн дээд тоо
+        max_queue: Хүлээж болох хүсэлтийн дээд тоо
+        queue_timeout: Дараалалд хүлээх дээд хугацаа (секунд)
+        rate_per_min: Client бүрийн минутын хүсэлт (0 = хязгааргүй)
+        burst: Client-ийн token bucket-ийн багтаамж
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = ADMISSION_MAX_IN_FLIGHT,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+        rate_per_min: float = CLIENT_RATE_PER_MIN,
+        burst: int = CLIENT_BURST
+    ):
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self.rate_per_min = rate_per_min
+        self.burst = max(1, burst)
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected: Dict[str, int] = {"rate_limited": 0, "queue_full": 0, "queue_timeout": 0}
+
+        self.last_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.avg_wait_ms = 0.0
+        self.avg_service_s: Optional[float] = None
+
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Semaphore event loop-д холбогддог тул анх хэрэглэхэд үүсгэнэ
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        return self._semaphore
+
+    def queue_depth(self) -> int:
+        """Slot хүлээж буй хүсэлтийн тоо"""
+        return max(0, self.in_flight + self.waiting - self.max_in_flight)
+
+    def _retry_after(self) -> int:
+        """Дараалал чөлөөлөгдөх хугацааны тооцоо (секунд)"""
+        service = self.avg_service_s or 1.0
+        return max(1, math.ceil(service * (self.queue_depth() + 1) / self.max_in_flight))
+
+    def _reject(self, status_code: int, reason: str, retry_after: int) -> AdmissionRejected:
+        self.rejected[reason] += 1
+        return AdmissionRejected(status_code, reason, retry_after)
+
+    def _take(self, client: str, cost: int) -> float:
+        """Client-ийн bucket-аас token авах (TokenBucket.take-ийг харна уу)"""
+        if self.rate_per_min <= 0:
+            return 0.0
+
+        bucket = self._buckets.get(client)
+        if bucket is None:
+            bucket = self._buckets[client] = TokenBucket(self.rate_per_min, self.burst)
+            while len(self._buckets) > MAX_CLIENTS:
+                self._buckets.popitem(last=False)
+        self._buckets.move_to_end(client)
+
+        return bucket.take(cost)
+
+    def check_rate(self, client: str, cost: int = 1):
+        """
+        Client-ийн token bucket шалгах
+
+        Raises:
+            AdmissionRejected: 429 - client хязгаараа хэтрүүлсэн бол
+        """
+        wait = self._take(client, cost)
+        if wait > 0:
+            raise self._reject(429, "rate_limited", max(1, math.ceil(wait)))
+
+    async def wait_rate(self, client: str, cost: int = 1):
+        """
+        Client-ийн token хуримтлагдтал хүлээж авах (batch-ийн хурал бүрт)
+
+        Том batch client-ийн хурдаар (CLIENT_RATE_PER_MIN) л урагшилна.
+
+        Raises:
+            AdmissionRejected: 429 - queue_timeout дотор token хуримтлагдахгүй бол
+        """
+        deadline = time.monotonic() + self.queue_timeout
+        wait = self._take(client, cost)
+        while wait > 0:
+            if time.monotonic() + wait > deadline:
+                raise self._reject(429, "rate_limited", max(1, math.ceil(wait)))
+            await asyncio.sleep(wait)
+            wait = self._take(client, cost)
+
+    async def acquire(self, client: str, cost: int = 1):
+        """
+        Pipeline эхлүүлэх эрх авах (дараалалд хүлээж магадгүй)
+
+        Raises:
+            AdmissionRejected: Client хязгаар, дараалал дүүрсэн эсвэл хүлээлт хэт удсан бол
+        """
+        self.check_rate(client, cost)
+        await self.acquire_slot()
+
+    async def acquire_slot(self):
+        """
+        Client-ийн хязгаарыг шалгалгүй нэг slot авах (batch-ийн хурал бүрт)
+
+        Raises:
+            AdmissionRejected: Дараалал дүүрсэн эсвэл хүлээлт хэт удсан бол
+        """
+        # waiting нь slot авах гэж буй бүх хүсэлтийг тоолно (шууд slot авах нь ч орно)
+        if self.in_flight + self.waiting >= self.max_in_flight + self.max_queue:
+            raise self._reject(503, "queue_full", self._retry_after())
+
+        semaphore = self._get_semaphore()
+
+        started = time.perf_counter()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise self._reject(503, "queue_timeout", self._retry_after())
+        finally:
+            self.waiting -= 1
+
+        wait_ms = (time.perf_counter() - started) * 1000
+        self.last_wait_ms = round(wait_ms, 1)
+        self.max_wait_ms = max(self.max_wait_ms, self.last_wait_ms)
+        self.avg_wait_ms = round(0.9 * self.avg_wait_ms + 0.1 * wait_ms, 1)
+
+        self.in_flight += 1
+        self.admitted += 1
+
+    def release(self, service_s: float):
+        """Pipeline дууссан - slot чөлөөлөх"""
+        self.in_flight -= 1
+        self._get_semaphore().release()
+
+        if self.avg_service_s is None:
+            self.avg_service_s = service_s
+        else:
+            self.avg_service_s = 0.9 * self.avg_service_s + 0.1 * service_s
+
+    def stats(self) -> Dict:
+        """Дарааллын төлөв (operator-уудад)"""
+        return {
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth(),
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+            "wait_ms": {
+                "last": self.last_wait_ms,
+                "avg": self.avg_wait_ms,
+                "max": self.max_wait_ms,
+            },
+            "avg_service_ms": round(self.avg_service_s * 1000, 1) if self.avg_service_s else None,
+            "clients_tracked": len(self._buckets),
+        }
+
+
+# Процесс даяар нэг admission controller
+admission = AdmissionController()
@@ -0,0 +1,159 @@
+"""
+Ярианы бичлэгийг SLM-д өгөх хэсгүүдэд хуваах
+
+"Нэр:" ярианы ээлж, өгүүлбэрийн хил (. ? ! …, мөр шилжилт)-ийг
+ойлгож, ээлжүүдийг budget хүртэл нягт багцална. Ямар ч текст
+хаягдахгүй - хэсгүүдийг нийлүүлэхэд (whitespace-ээс бусад) анхны
+текст бүрэн гарна:
+
+    1. Ээлж бүтнээрээ багтвал ээлжээр нь багцална
+    2. Budget-ээс урт ээлжийг өгүүлбэрээр нь хуваана
+    3. Budget-ээс урт өгүүлбэрийг үгийн хилээр (эсвэл хүчээр) хуваана
+
+Хэмжээг length функцээр (default: тэмдэгт, summarizer-т token) хэмжинэ.
+
+overlap > 0 бол хэсэг бүр өмнөх хэсгийн сүүлийн ээлж/өгүүлбэрүүдийг
+context болгон авна (SLM-д ойлголтод зориулж, гаралтад давхардахгүй).
+"""
+
+import re
+from typing import Callable, List, Tuple
+
+# "Анна:", "Б.Бат:", "Тогтоол:" - ээлжийн эхлэл (текстийн эхэнд, зай эсвэл
+# өгүүлбэрийн төгсгөлийн дараа)
+TURN_PATTERN = re.compile(r"(?:^|(?<=[\s.?!…]))[А-ЯЁӨҮ](?:\.[А-ЯЁӨҮ])?[а-яёөү]{1,20}:(?=\s|$)")
+
+# Өгүүлбэрийн хил - тэмдгийн дараах зай, эсвэл мөр шилжилт
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.?!…])\s+|\s*\n\s*")
+
+
+class Chunk:
+    """
+    SLM-д өгөх нэг хэсэг
+
+    Attributes:
+        text: Албан болгох текст
+        context: Өмнөх хэсгийн төгсгөл (зөвхөн ойлголтод, overlap > 0 үед)
+    """
+
+    def __init__(self, text: str, context: str = ""):
+        self.text = text
+        self.context = context
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def __repr__(self) -> str:
+        return f"Chunk({len(self.text)} тэмдэгт, context={len(self.context)})"
+
+
+def split_turns(text: str) -> List[str]:
+    """
+    Текстийг ярианы ээлжүүдэд хуваах (мөр шилжилт бүр мөн хил болно)
+
+    Эхний "Нэр:"-ээс өмнөх текст өөрийн гэсэн ээлж болно.
+    """
+    turns = []
+    for line in text.split("\n"):
+        starts = [m.start() for m in TURN_PATTERN.finditer(line)]
+        bounds = [0] + [s for s in starts if s > 0] + [len(line)]
+        for start, end in zip(bounds, bounds[1:]):
+            turn = line[start:end].strip()
+            if turn:
+                turns.append(turn)
+    return turns
+
+
+def split_sentences(text: str) -> List[str]:
+    """Өгүүлбэрүүдэд хуваах (тэмдэг нь өгүүлбэртээ үлдэнэ)"""
+    return [s for s in SENTENCE_BOUNDARY.split(text) if s.strip()]
+
+
+def _split_words(text: str, budget: int, length: Callable[[str], int]) -> List[Tuple[str, int]]:
+    """Budget-ээс урт өгүүлбэрийг үгийн хилээр, үг нь ч урт бол хүчээр хуваах"""
+    pieces = []
+    current: List[str] = []
+    size = 0
+    for word in text.split():
+        word_size = length(word) + (1 if current else 0)
+        if current and size + word_size > budget:
+            pieces.append((" ".join(current), size))
+            current, size, word_size = [], 0, length(word)
+        while word_size > budget and len(word) > 1:
+            # Нэг үг budget-ээс урт - тэмдэгтээр хуваана (token ≤ тэмдэгт)
+            cut = max(1, len(word) * budget // word_size)
+            pieces.append((word[:cut], length(word[:cut])))
+            word = word[cut:]
+            word_size = length(word)
+        current.append(word)
+        size += word_size
+    if current:
+        pieces.append((" ".join(current), size))
+    return pieces
+
+
+def _units(text: str, budget: int, length: Callable[[str], int]) -> List[Tuple[str, int]]:
+    """Budget-д багтах хамгийн том нэгжүүд (ээлж → өгүүлбэр → үг) ба хэмжээ"""
+    units = []
+    for turn in split_turns(text):
+        turn_size = length(turn)
+        if turn_size <= budget:
+            units.append((turn, turn_size))
+            continue
+        for sentence in split_sentences(turn):
+            sentence_size = length(sentence)
+            if sentence_size <= budget:
+                units.append((sentence, sentence_size))
+            else:
+                units.extend(_split_words(sentence, budget, length))
+    return units
+
+
+def _tail(units: List[Tuple[str, int]], overlap: int) -> str:
+    """Хэсгийн сүүлийн нэгжүүдээс overlap хүртэл хэмжээтэй context"""
+    tail = []
+    size = 0
+    for unit, unit_size in reversed(units):
+        if size + unit_size > overlap:
+            break
+        tail.insert(0, unit)
+        size += unit_size + 1
+    return "\n".join(tail)
+
+
+def split_chunks(
+    text: str,
+    budget: int,
+    overlap: int = 0,
+    length: Callable[[str], int] = len
+) -> List[Chunk]:
+    """
+    Ээлжүүдийг budget хүртэл нягт багцлах
+
+    Args:
+        text: Бүтэн бичлэг
+        budget: Хэсгийн дээд хэмжээ (length-ийн нэгжээр)
+        overlap: Өмнөх хэсгээс context болгон авах дээд хэмжээ (0 = үгүй)
+        length: Хэмжих функц - len (тэмдэгт) эсвэл token тоологч
+
+    Returns:
+        Дарааллаараа хэсгүүд - ээлжүүд мөрөөр тусгаарлагдана
+    """
+    budget = max(1, budget)
+    chunks: List[Chunk] = []
+    current: List[Tuple[str, int]] = []
+    size = 0
+    context = ""
+
+    for unit, unit_size in _units(text, budget, length):
+        added = unit_size + (1 if current else 0)
+        if current and size + added > budget:
+            chunks.append(Chunk("\n".join(u for u, _ in current), context))
+            context = _tail(current, overlap) if overlap > 0 else ""
+            current, size, added = [], 0, unit_size
+        current.append((unit, unit_size))
+        size += added
+
+    if current:
+        chunks.append(Chunk("\n".join(u for u, _ in current), context))
+    return chunks
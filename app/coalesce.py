@@ -0,0 +1,120 @@
+"""
+Ижил хүсэлтүүдийг нэгтгэх (single-flight) ба Idempotency-Key
+
+Client-ийн HTTP timeout SLM-ийн хугацаанаас богино бол client дахин
+илгээдэг - эхний pipeline дуусаагүй байхад ижил хоёр дахь нь эхэлж,
+удаан байгаа үед ачааллыг хоёр дахин нэмэгдүүлдэг.
+
+    SingleFlight:     Зэрэг ирсэн ижил хүсэлтүүд нэг гүйцэтгэлийг хуваалцана
+    IdempotencyStore: Дууссан хүсэлтийн хариуг Idempotency-Key-ээр хадгалж,
+                      давтан ирэхэд дахин боловсруулахгүй буцаана
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .config import IDEMPOTENCY_TTL, IDEMPOTENCY_MAX_ITEMS
+
+
+class SingleFlight:
+    """
+    Түлхүүр бүрт зэрэг нэг л гүйцэтгэл
+
+    Гүйцэтгэл тусдаа task дээр явна - эхлүүлсэн client салсан ч
+    хүлээж байгаа бусад client-ууд үр дүнгээ авна.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, asyncio.Task] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Args:
+            key: Хүсэлтийн түлхүүр
+            func: Гүйцэтгэх coroutine функц
+        
+        Returns:
+            (үр дүн, өөр хүсэлттэй нэгтгэгдсэн эсэх)
+        """
+        task = self._flights.get(key)
+        shared = task is not None
+
+        if shared:
+            self.coalesced += 1
+        else:
+            self.executed += 1
+            task = asyncio.create_task(func())
+            self._flights[key] = task
+            task.add_done_callback(lambda _: self._flights.pop(key, None))
+
+        return await asyncio.shield(task), shared
+
+    def stats(self) -> Dict:
+        return {
+            "in_flight": len(self._flights),
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+        }
+
+
+class IdempotencyMismatch(ValueError):
+    """Ижил Idempotency-Key өөр агуулгатай хүсэлтэд ашиглагдсан"""
+
+
+class IdempotencyStore:
+    """
+    Idempotency-Key → дууссан хариу (санах ойд, TTL + LRU)
+
+    Зөвхөн амжилттай хариу хадгалагдана - алдаатай хүсэлтийг давтахад
+    дахин боловсруулна.
+
+    Args:
+        ttl: Хариу хадгалах хугацаа (секунд)
+        max_items: Хадгалах хариуны дээд тоо
+    """
+
+    def __init__(self, ttl: float = IDEMPOTENCY_TTL, max_items: int = IDEMPOTENCY_MAX_ITEMS):
+        self.ttl = ttl
+        self.max_items = max_items
+        self._items: "OrderedDict[str, Tuple[str, float, Any]]" = OrderedDict()
+        self.replayed = 0
+
+    def get(self, key: str, request_fingerprint: str) -> Optional[Any]:
+        """
+        Хадгалсан хариу (байхгүй эсвэл хугацаа дууссан бол None)
+        
+        Raises:
+            IdempotencyMismatch: Түлхүүр өөр хүсэлтэд ашиглагдсан бол
+        """
+        item = self._items.get(key)
+        if item is None:
+            return None
+
+        fp, expires, response = item
+        if expires < time.time():
+            del self._items[key]
+            return None
+        if fp != request_fingerprint:
+            raise IdempotencyMismatch(
+                f"Idempotency-Key '{key}' өөр хүсэлтэд ашиглагдсан байна"
+            )
+
+        self._items.move_to_end(key)
+        self.replayed += 1
+        return response
+
+    def put(self, key: str, request_fingerprint: str, response: Any):
+        self._items[key] = (request_fingerprint, time.time() + self.ttl, response)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+    def stats(self) -> Dict:
+        return {
+            "stored": len(self._items),
+            "replayed": self.replayed,
+        }
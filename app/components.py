@@ -0,0 +1,188 @@
+"""
+Компонентуудыг (UDPipe, summarizer, action extractor) арын горимд,
+зэрэг эхлүүлэх
+
+Server импорт хийгдэх үед юу ч ачаалахгүй. start() дуудагдахад
+компонент бүр thread pool дээр зэрэг эхэлж, амжилтгүй бол бэлэн болтол
+дахин оролдоно (Ollama түр унтарсан байсан ч process насан туршдаа
+ажиллахгүй болж үлдэхгүй).
+"""
+
+import asyncio
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from .config import INIT_RETRY_INTERVAL, INIT_RETRY_MAX_INTERVAL
+
+
+# Компонентын төлөв
+PENDING = "pending"
+STARTING = "starting"
+READY = "ready"
+FAILED = "failed"
+UNAVAILABLE = "unavailable"
+
+
+class Component:
+    """
+    Нэг компонент
+
+    Args:
+        name: Нэр
+        factory: Sync функц - хамаарлуудын instance-ийг dict-ээр авч шинэ instance буцаана
+        deps: Эхлэхээс өмнө оролдлого нь дуусах ёстой компонентууд
+        required: Readiness-д заавал шаардлагатай эсэх
+        retry: Амжилтгүй бол дахин оролдох эсэх (үгүй бол "unavailable")
+    """
+
+    def __init__(
+        self,
+        name: str,
+        factory: Callable[[Dict[str, Any]], Any],
+        deps: Iterable[str] = (),
+        required: bool = True,
+        retry: bool = True
+    ):
+        self.name = name
+        self.factory = factory
+        self.deps = tuple(deps)
+        self.required = required
+        self.retry = retry
+
+        self.instance: Any = None
+        self.state = PENDING
+        self.error: Optional[str] = None
+        self.attempts = 0
+        self.ready_at: Optional[float] = None
+        self.init_ms: Optional[float] = None
+        self.settled = asyncio.Event()
+
+    def status(self) -> Dict:
+        return {
+            "state": self.state,
+            "required": self.required,
+            "attempts": self.attempts,
+            "init_ms": self.init_ms,
+            "error": self.error,
+        }
+
+
+class ComponentRegistry:
+    """
+    Компонентуудыг lazy, зэрэг эхлүүлэх registry
+    """
+
+    def __init__(self):
+        self.components: Dict[str, Component] = {}
+        self._tasks = []
+        # Бүх компонентын анхны оролдлого дууссан (бэлэн эсвэл амжилтгүй)
+        self.settled = asyncio.Event()
+        # Шаардлагатай компонентууд бэлэн болсон эсвэл хэзээ ч бэлэн болохгүй ("unavailable")
+        self.resolved = asyncio.Event()
+
+    def register(self, name: str, factory: Callable[[Dict[str, Any]], Any], **kwargs):
+        """Компонент бүртгэх"""
+        self.components[name] = Component(name, factory, **kwargs)
+
+    def get(self, name: str) -> Any:
+        """Бэлэн бол instance, үгүй бол None"""
+        component = self.components.get(name)
+        if component and component.state == READY:
+            return component.instance
+        return None
+
+    def is_ready(self) -> bool:
+        """Шаардлагатай бүх компонент бэлэн эсэх"""
+        return all(
+            c.state == READY for c in self.components.values() if c.required
+        )
+
+    def status(self) -> Dict[str, Dict]:
+        return {name: c.status() for name, c in self.components.items()}
+
+    def start(self):
+        """Бүх компонентыг арын горимд эхлүүлэх (хүлээхгүй)"""
+        self.settled = asyncio.Event()
+        self.resolved = asyncio.Event()
+        for component in self.components.values():
+            component.settled = asyncio.Event()
+            self._tasks.append(asyncio.create_task(self._run(component)))
+        if not self.components:
+            self.settled.set()
+            self.resolved.set()
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def wait_ready(self, timeout: Optional[float] = None, until_ready: bool = False) -> bool:
+        """
+        Бүх компонентын анхны оролдлого дуустал хүлээх (polling хийхгүй)
+
+        Args:
+            timeout: Хүлээх дээд хугацаа (секунд)
+            until_ready: True бол амжилтгүй компонентууд дахин оролдож бэлэн
+                болтол хүлээнэ (retry-гүй шаардлагатай компонент "unavailable"
+                болбол шууд буцна)
+
+        Returns:
+            Шаардлагатай бүх компонент бэлэн эсэх - False бол init амжилтгүй
+            (эсвэл timeout) бөгөөд status()-аас алдааг харна
+        """
+        event = self.resolved if until_ready else self.settled
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.is_ready()
+
+    def _settle(self, component: Component):
+        component.settled.set()
+        if all(c.settled.is_set() for c in self.components.values()):
+            self.settled.set()
+        if self.is_ready() or any(
+            c.required and c.state == UNAVAILABLE for c in self.components.values()
+        ):
+            self.resolved.set()
+
+    async def _run(self, component: Component):
+        for dep in component.deps:
+            await self.components[dep].settled.wait()
+
+        delay = INIT_RETRY_INTERVAL
+
+        while True:
+            component.state = STARTING
+            component.attempts += 1
+            deps = {dep: self.get(dep) for dep in component.deps}
+            started = time.perf_counter()
+
+            try:
+                component.instance = await asyncio.to_thread(component.factory, deps)
+            except Exception as e:
+                component.error = str(e)
+
+                if not component.retry:
+                    component.state = UNAVAILABLE
+                    self._settle(component)
+                    print(f"⚠️  {component.name} ашиглах боломжгүй: {e}")
+                    return
+
+                component.state = FAILED
+                self._settle(component)
+                print(f"❌ {component.name} эхлүүлэхэд алдаа ({component.attempts}): {e}")
+                print(f"   🔄 {delay:.0f} секундын дараа дахин оролдоно")
+
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, INIT_RETRY_MAX_INTERVAL)
+                continue
+
+            component.state = READY
+            component.error = None
+            component.ready_at = time.time()
+            component.init_ms = round((time.perf_counter() - started) * 1000, 1)
+            self._settle(component)
+            print(f"✅ {component.name} бэлэн ({component.init_ms} ms)")
+            return
@@ -12,16 +12,16 @@ BASE_DIR = Path(__file__).parent.parent
 # SLM ТОХИРГОО - FINE-TUNED MODEL
 # ============================================
 
-# АНХНЫ: qwen2.5:7b
-# FINE-TUNED: mongolian-protocol (таны fine-tune хийсэн model)
-USE_FINETUNED = os.getenv("USE_FINETUNED", "true").lower() == "true"
+# АНХНЫ: qwen2.5:7b (default - ollama pull qwen2.5:7b)
+# FINE-TUNED: mongolian-protocol (таны fine-tune хийсэн model) - USE_FINETUNED=true
+# үед л ашиглана; энгийн суулгацад энэ model байхгүй тул warm_up амжилтгүй болно
+USE_FINETUNED = os.getenv("USE_FINETUNED", "false").lower() == "true"
 
+# Import хийх үед хэвлэхгүй - print_config() ашиглана
 if USE_FINETUNED:
     SLM_MODEL = "mongolian-protocol"
-    print("✅ Fine-tuned model ашиглаж байна: mongolian-protocol")
 else:
     SLM_MODEL = os.getenv("SLM_MODEL", "qwen2.5:7b")
-    print(f"⚠️  Base model ашиглаж байна: {SLM_MODEL}")
 
 # Fine-tuned model-д ИЛҮҮ БАГ temperature хэрэгтэй
 # Учир нь model аль хэдийн fine-tune хийгдсэн
@@ -30,6 +30,10 @@ SLM_MAX_TOKENS = int(os.getenv("SLM_MAX_TOKENS", "2000"))
 SLM_TOP_P = float(os.getenv("SLM_TOP_P", "0.9"))
 SLM_REPEAT_PENALTY = float(os.getenv("SLM_REPEAT_PENALTY", "1.1"))
 
+# Model residency: Ollama keep_alive ба idle-ийн дараах дахин ачаалалт
+SLM_KEEP_ALIVE = os.getenv("SLM_KEEP_ALIVE", "30m")
+SLM_WARM_CHECK_INTERVAL = float(os.getenv("SLM_WARM_CHECK_INTERVAL", "60"))  # 0 = унтраах
+
 # ============================================
 # PROMPT ТОХИРГОО
 # ============================================
@@ -45,8 +49,8 @@ USE_SIMPLIFIED_PROMPTS = USE_FINETUNED
 # UDPipe
 UDPIPE_MODEL_PATH = os.getenv("UDPIPE_MODEL", "mn_model.udpipe")
 
-# Output
-OUTPUT_DIR = os.getenv("OUTPUT_DIR", str(BASE_DIR))
+# Output - persist=true үеийн DOCX файлууд (/files/{нэр}, /jobs/{id}/file)
+OUTPUT_DIR = os.getenv("OUTPUT_DIR", str(BASE_DIR / "outputs"))
 
 # API тохиргоо
 API_HOST = os.getenv("API_HOST", "0.0.0.0")
@@ -57,13 +61,125 @@ API_RELOAD = os.getenv("API_RELOAD", "true").lower() == "true"
 DEBUG = os.getenv("DEBUG", "false").lower() == "true"
 
 # Текст боловсруулалт
-MAX_CHUNK_LENGTH = int(os.getenv("MAX_CHUNK_LENGTH", "1500"))
+# SLM-ийн context цонх - дуудлага бүрт num_ctx болгон илгээнэ (Ollama-ийн
+# default 2048 урт prompt-ийг чимээгүй тасалдаг). Хэсгийн хэмжээ үүнээс гарна
+LLM_NUM_CTX = int(os.getenv("LLM_NUM_CTX", "8192"))
+# Хэсгийн дээд хэмжээ (token, 0 = context-д багтах хэмжээгээр)
+MAX_CHUNK_TOKENS = int(os.getenv("MAX_CHUNK_TOKENS", "0"))
+# Өмнөх хэсгийн төгсгөлөөс SLM-д context болгон өгөх хэмжээ (token, 0 = үгүй)
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "0"))
+# Token тоолох: model-ийн tokenizer (HF нэр эсвэл tokenizer.json, tokenizers сан)
+# эсвэл "" = тэмдэгт/token харьцаагаар тооцоолж prompt_eval_count-оор засварлах
+TOKENIZER = os.getenv("TOKENIZER", "")
+TOKEN_CHARS_CYRILLIC = float(os.getenv("TOKEN_CHARS_CYRILLIC", "2.0"))
+TOKEN_CHARS_LATIN = float(os.getenv("TOKEN_CHARS_LATIN", "4.0"))
+# Тооцооллын алдаанд зориулж context-оос үлдээх нөөц (token)
+TOKEN_SAFETY_MARGIN = int(os.getenv("TOKEN_SAFETY_MARGIN", "256"))
+# Үүсгэх token-ий дээд хэмжээ (num_predict) = оролтын token × харьцаа,
+# [LLM_MIN_PREDICT, LLM_MAX_PREDICT]-д - дуудлагын хамгийн удаан хугацаа оролтын хэмжээнээс хамаарна
+LLM_MIN_PREDICT = int(os.getenv("LLM_MIN_PREDICT", "128"))
+LLM_MAX_PREDICT = int(os.getenv("LLM_MAX_PREDICT", "2000"))
+FORMALIZE_OUTPUT_RATIO = float(os.getenv("FORMALIZE_OUTPUT_RATIO", "1.3"))
+ACTIONS_OUTPUT_RATIO = float(os.getenv("ACTIONS_OUTPUT_RATIO", "1.5"))
+# Нэг хурлын хэсгүүдийг зэрэг албан болгох тоо (нийт ачааллыг LLM_MAX_CONCURRENCY хязгаарлана)
+CHUNK_CONCURRENCY = int(os.getenv("CHUNK_CONCURRENCY", "4"))
+# Амжилтгүй хэсгийг дангаар нь дахин оролдох тоо, хүлээлт (секунд, оролдлого бүрт 2 дахин)
+CHUNK_MAX_RETRIES = int(os.getenv("CHUNK_MAX_RETRIES", "2"))
+CHUNK_RETRY_BACKOFF = float(os.getenv("CHUNK_RETRY_BACKOFF", "1"))
+# Утга алдсан ярианы ээлжүүдийг л дахин үүсгэх - ээлжийн энэ хувиас олон
+# алдсан бол бүтэн текстийг консерватив retry хийнэ
+SEGMENT_RETRY_MAX_RATIO = float(os.getenv("SEGMENT_RETRY_MAX_RATIO", "0.5"))
+
+# SLM backend: "ollama", "openai" (OpenAI-compatible server: llama.cpp server, vLLM)
+# эсвэл "replay" (LLM_REPLAY_PATH-д бичигдсэн хариуг network-гүй буцаах)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "ollama").lower()
+
+# Ollama client: host, timeout (секунд), keep-alive connection pool
+OLLAMA_HOST = os.getenv("OLLAMA_HOST", "127.0.0.1:11434")
+# Олон Ollama host (таслалаар) - дуудлага бүр хамгийн бага ачаалалтай эрүүл host руу очно
+OLLAMA_HOSTS = [h.strip() for h in os.getenv("OLLAMA_HOSTS", OLLAMA_HOST).split(",") if h.strip()]
+# OpenAI-compatible server-ууд (таслалаар), шаардлагатай бол API key
+OPENAI_HOSTS = [h.strip() for h in os.getenv("OPENAI_HOSTS", "127.0.0.1:8080").split(",") if h.strip()]
+LLM_API_KEY = os.getenv("LLM_API_KEY", "")
+# chat() дуудлага бүрийг (request, хариу, хугацаа) JSONL-д бичих ("" = бичихгүй)
+LLM_RECORD_PATH = os.getenv("LLM_RECORD_PATH", "")
+# Replay backend-ийн бичлэг (таслалаар олон файл) ба latency-ийн коэффициент
+# (0 = шууд хариулах, 1 = бичигдсэн хугацаагаар хүлээх)
+LLM_REPLAY_PATH = os.getenv("LLM_REPLAY_PATH", str(BASE_DIR / "data" / "llm_recording.jsonl"))
+LLM_REPLAY_LATENCY = float(os.getenv("LLM_REPLAY_LATENCY", "0"))
+# Идэвхтэй backend-ийн host-ууд (replay-д бичлэгийн файлууд)
+LLM_HOSTS = {
+    "openai": OPENAI_HOSTS,
+    "replay": [h.strip() for h in LLM_REPLAY_PATH.split(",") if h.strip()],
+}.get(LLM_BACKEND, OLLAMA_HOSTS)
+LB_HEALTH_INTERVAL = float(os.getenv("LB_HEALTH_INTERVAL", "10"))
+LB_FAIL_THRESHOLD = int(os.getenv("LB_FAIL_THRESHOLD", "2"))
+LB_EJECT_SECONDS = float(os.getenv("LB_EJECT_SECONDS", "30"))
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "180"))
+LLM_POOL_SIZE = int(os.getenv("LLM_POOL_SIZE", "16"))
+
+# Prompt cache - нэг хурлын хэсгүүд ижил prefix-тэй тул нэг host дээр
+# (KV cache нь байгаа) боловсруулагдана
+LLM_SESSION_AFFINITY = os.getenv("LLM_SESSION_AFFINITY", "true").lower() == "true"
+# openai backend: cache_prompt талбар илгээх - зөвхөн llama.cpp server дэмждэг тул
+# заавал асаана (vLLM, OpenAI API-д false үлдээнэ)
+LLM_CACHE_PROMPT = os.getenv("LLM_CACHE_PROMPT", "false").lower() == "true"
+
+# SLM дуудлагын concurrency хязгаар - host бүрт (Ollama OLLAMA_NUM_PARALLEL-тай тааруулна).
+# Нийт хязгаар = LLM_MAX_CONCURRENCY × host-ийн тоо
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+
+# Batch API (POST /generate_protocols_batch)
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+BATCH_ITEM_CONCURRENCY = int(os.getenv("BATCH_ITEM_CONCURRENCY", "8"))
+
+# Компонент эхлүүлэх retry (секунд) - Ollama бэлэн болтол дахин оролдоно
+INIT_RETRY_INTERVAL = float(os.getenv("INIT_RETRY_INTERVAL", "2"))
+INIT_RETRY_MAX_INTERVAL = float(os.getenv("INIT_RETRY_MAX_INTERVAL", "30"))
+
+# Үр дүнгийн cache (ижил текстийг дахин боловсруулахгүй)
+RESULT_CACHE_ENABLED = os.getenv("RESULT_CACHE_ENABLED", "true").lower() == "true"
+RESULT_CACHE_MEMORY_ITEMS = int(os.getenv("RESULT_CACHE_MEMORY_ITEMS", "256"))
+RESULT_CACHE_DIR = os.getenv("RESULT_CACHE_DIR", str(BASE_DIR / ".cache" / "protocols"))  # "" = зөвхөн санах ой
+RESULT_CACHE_DISK_MB = int(os.getenv("RESULT_CACHE_DISK_MB", "200"))
+RESULT_CACHE_DOCX = os.getenv("RESULT_CACHE_DOCX", "true").lower() == "true"
+
+# Admission control - зэрэг явах pipeline, хүлээлгийн дараалал (секунд)
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "8"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "32"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "120"))
+
+# Client бүрийн хязгаар (token bucket, 0 = хязгааргүй)
+CLIENT_RATE_PER_MIN = float(os.getenv("CLIENT_RATE_PER_MIN", "0"))
+CLIENT_BURST = int(os.getenv("CLIENT_BURST", "10"))
+
+# Ижил хүсэлтүүдийг нэгтгэх, Idempotency-Key (секунд)
+COALESCE_ENABLED = os.getenv("COALESCE_ENABLED", "true").lower() == "true"
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+IDEMPOTENCY_MAX_ITEMS = int(os.getenv("IDEMPOTENCY_MAX_ITEMS", "1000"))
+
+# Trace span exporter-ууд ("memory", "jsonl", таслалаар; "none" = унтраах)
+TRACE_EXPORTERS = os.getenv("TRACE_EXPORTERS", "memory")
+TRACE_MEMORY_SPANS = int(os.getenv("TRACE_MEMORY_SPANS", "10000"))
+TRACE_JSONL_PATH = os.getenv("TRACE_JSONL_PATH", str(BASE_DIR / "traces.jsonl"))
+
+# Async job API (POST /jobs)
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", str(BASE_DIR / "jobs.sqlite3"))
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# Server эхлэхэд SLM компонентууд бэлэн болтол job хүлээх дээд хугацаа (секунд)
+JOB_READY_TIMEOUT = float(os.getenv("JOB_READY_TIMEOUT", "600"))
 
 # Quality thresholds
 MIN_TEXT_RATIO = float(os.getenv("MIN_TEXT_RATIO", "0.15"))
 MAX_TEXT_RATIO = float(os.getenv("MAX_TEXT_RATIO", "8.0"))
 MAX_ENGLISH_RATIO = float(os.getenv("MAX_ENGLISH_RATIO", "0.3"))
 
+# Хэллэг үг, түгээмэл алдааны толь (clean.txt, postprocess.txt, spelling.txt)
+LEXICON_DIR = os.getenv("LEXICON_DIR", str(BASE_DIR / "app" / "lexicons"))
+# Толийн файл өөрчлөгдсөн эсэхийг шалгах давтамж (секунд, 0 = дахин ачаалахгүй)
+LEXICON_RELOAD_INTERVAL = float(os.getenv("LEXICON_RELOAD_INTERVAL", "5"))
+
 
 def get_config_dict() -> dict:
     """
@@ -77,21 +193,89 @@ def get_config_dict() -> dict:
             "max_tokens": SLM_MAX_TOKENS,
             "top_p": SLM_TOP_P,
             "repeat_penalty": SLM_REPEAT_PENALTY,
+            "keep_alive": SLM_KEEP_ALIVE,
+            "warm_check_interval": SLM_WARM_CHECK_INTERVAL,
             "simplified_prompts": USE_SIMPLIFIED_PROMPTS,
         },
         "udpipe": {
             "model_path": UDPIPE_MODEL_PATH,
         },
+        "init": {
+            "retry_interval": INIT_RETRY_INTERVAL,
+            "retry_max_interval": INIT_RETRY_MAX_INTERVAL,
+        },
         "api": {
             "host": API_HOST,
             "port": API_PORT,
             "reload": API_RELOAD,
         },
         "processing": {
-            "max_chunk_length": MAX_CHUNK_LENGTH,
+            "num_ctx": LLM_NUM_CTX,
+            "max_chunk_tokens": MAX_CHUNK_TOKENS,
+            "tokenizer": TOKENIZER or "estimate",
+            "token_safety_margin": TOKEN_SAFETY_MARGIN,
+            "min_predict": LLM_MIN_PREDICT,
+            "max_predict": LLM_MAX_PREDICT,
+            "formalize_output_ratio": FORMALIZE_OUTPUT_RATIO,
+            "actions_output_ratio": ACTIONS_OUTPUT_RATIO,
+            "chunk_overlap": CHUNK_OVERLAP,
+            "chunk_concurrency": CHUNK_CONCURRENCY,
+            "chunk_max_retries": CHUNK_MAX_RETRIES,
+            "chunk_retry_backoff": CHUNK_RETRY_BACKOFF,
+            "segment_retry_max_ratio": SEGMENT_RETRY_MAX_RATIO,
             "min_ratio": MIN_TEXT_RATIO,
             "max_ratio": MAX_TEXT_RATIO,
             "max_english_ratio": MAX_ENGLISH_RATIO,
+            "lexicon_dir": LEXICON_DIR,
+            "lexicon_reload_interval": LEXICON_RELOAD_INTERVAL,
+        },
+        "llm": {
+            "backend": LLM_BACKEND,
+            "hosts": LLM_HOSTS,
+            "health_interval": LB_HEALTH_INTERVAL,
+            "fail_threshold": LB_FAIL_THRESHOLD,
+            "eject_seconds": LB_EJECT_SECONDS,
+            "connect_timeout": LLM_CONNECT_TIMEOUT,
+            "read_timeout": LLM_READ_TIMEOUT,
+            "pool_size": LLM_POOL_SIZE,
+            "session_affinity": LLM_SESSION_AFFINITY,
+            "cache_prompt": LLM_CACHE_PROMPT,
+            "max_concurrency": LLM_MAX_CONCURRENCY,
+            "record_path": LLM_RECORD_PATH,
+            "replay_latency": LLM_REPLAY_LATENCY,
+        },
+        "batch": {
+            "max_items": BATCH_MAX_ITEMS,
+            "item_concurrency": BATCH_ITEM_CONCURRENCY,
+        },
+        "result_cache": {
+            "enabled": RESULT_CACHE_ENABLED,
+            "memory_items": RESULT_CACHE_MEMORY_ITEMS,
+            "dir": RESULT_CACHE_DIR,
+            "disk_mb": RESULT_CACHE_DISK_MB,
+            "docx": RESULT_CACHE_DOCX,
+        },
+        "admission": {
+            "max_in_flight": ADMISSION_MAX_IN_FLIGHT,
+            "max_queue": ADMISSION_MAX_QUEUE,
+            "queue_timeout": ADMISSION_QUEUE_TIMEOUT,
+            "client_rate_per_min": CLIENT_RATE_PER_MIN,
+            "client_burst": CLIENT_BURST,
+        },
+        "coalesce": {
+            "enabled": COALESCE_ENABLED,
+            "idempotency_ttl": IDEMPOTENCY_TTL,
+            "idempotency_max_items": IDEMPOTENCY_MAX_ITEMS,
+        },
+        "tracing": {
+            "exporters": TRACE_EXPORTERS,
+            "memory_spans": TRACE_MEMORY_SPANS,
+            "jsonl_path": TRACE_JSONL_PATH,
+        },
+        "jobs": {
+            "db_path": JOBS_DB_PATH,
+            "workers": JOB_WORKERS,
+            "ready_timeout": JOB_READY_TIMEOUT,
         },
         "output_dir": OUTPUT_DIR,
         "debug": DEBUG,
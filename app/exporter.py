@@ -5,12 +5,19 @@ DOCX файл үүсгэх модуль
 from docx import Document
 from docx.shared import Pt, RGBColor
 from datetime import datetime
+from io import BytesIO
 from pathlib import Path
+import uuid
 
+from .config import OUTPUT_DIR
 
-def export_enhanced_protocol(protocol: dict) -> str:
+
+DOCX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+def render_protocol_docx(protocol: dict) -> bytes:
     """
-    Протоколыг DOCX файл болгох
+    Протоколыг санах ойд DOCX болгох (диск ашиглахгүй)
     
     Args:
         protocol: Протоколын мэдээлэл
@@ -21,7 +28,7 @@ def export_enhanced_protocol(protocol: dict) -> str:
             - action_items: Ажил үүргүүд (list of dict)
     
     Returns:
-        Үүсгэсэн файлын нэр
+        DOCX файлын агуулга (bytes)
     
     Raises:
         RuntimeError: Файл үүсгэхэд алдаа гарвал
@@ -45,20 +52,72 @@ def export_enhanced_protocol(protocol: dict) -> str:
         # 5. Footer
         _add_footer(doc)
         
-        # 6. Хадгалах
-        filename = f"protocol_{datetime.now().strftime('%Y%m%d_%H%M%S')}.docx"
-        doc.save(filename)
-        
-        # Файл үүссэн эсэхийг шалгах
-        if not Path(filename).exists():
-            raise RuntimeError(f"Файл үүсгэж чадсангүй: {filename}")
-        
-        return filename
+        # 6. BytesIO руу бичих
+        buffer = BytesIO()
+        doc.save(buffer)
+        return buffer.getvalue()
         
     except Exception as e:
         raise RuntimeError(f"DOCX export алдаа: {str(e)}")
 
 
+def protocol_filename() -> str:
+    """
+    Давхцахгүй файлын нэр (нэг секундэд олон хүсэлт ирж болно)
+    
+    Санамсаргүй хэсэг нь /files/{нэр}-ээр татах холбоосыг таахад хэцүү болгоно.
+    """
+    return f"protocol_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:16]}.docx"
+
+
+def protocol_path(filename: str) -> Path:
+    """
+    Хадгалсан DOCX-ийн бүтэн зам (OUTPUT_DIR дотор)
+    
+    Raises:
+        ValueError: Нэр нь зам агуулсан эсвэл .docx биш бол ("../" г.м.)
+    """
+    if not filename or Path(filename).name != filename or not filename.endswith(".docx"):
+        raise ValueError(f"Буруу файлын нэр: {filename}")
+    return Path(OUTPUT_DIR) / filename
+
+
+def export_enhanced_protocol(protocol: dict) -> str:
+    """
+    Протоколыг DOCX файл болгож диск дээр хадгалах
+    
+    Args:
+        protocol: Протоколын мэдээлэл (render_protocol_docx-г харна уу)
+    
+    Returns:
+        Үүсгэсэн файлын зам (OUTPUT_DIR дотор)
+    
+    Raises:
+        RuntimeError: Файл үүсгэхэд алдаа гарвал
+    """
+    data = render_protocol_docx(protocol)
+    return str(protocol_path(save_protocol_docx(data)))
+
+
+def save_protocol_docx(data: bytes) -> str:
+    """
+    Бэлэн DOCX агуулгыг OUTPUT_DIR-д хадгалах
+    
+    Returns:
+        Үүсгэсэн файлын нэр (protocol_path-аар бүтэн зам авна)
+    """
+    filename = protocol_filename()
+    path = protocol_path(filename)
+    
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    except OSError as e:
+        raise RuntimeError(f"Файл үүсгэж чадсангүй: {path} ({e})")
+    
+    return filename
+
+
 def _add_heading(doc: Document, protocol: dict):
     """Толгой хэсэг нэмэх"""
     title = doc.add_heading(protocol.get('title', 'Протокол'), level=1)
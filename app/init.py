@@ -7,30 +7,45 @@ Mongolian Protocol Generator
 __version__ = "1.0.0"
 __author__ = "Protocol Generator Team"
 
-# Модулиудыг экспорт хийх
-from .preprocess import clean_text, extract_entities
-from .exporter import export_enhanced_protocol
-
-# Optional модулиуд
-try:
-    from .nlp_processor import MongolianNLPProcessor
-except ImportError:
-    MongolianNLPProcessor = None
-
-try:
-    from .summarizer import SLMOnlySummarizer
-except ImportError:
-    SLMOnlySummarizer = None
-
-try:
-    from .action_extractor import SLMOnlyActionExtractor
-except ImportError:
-    SLMOnlyActionExtractor = None
+# Модулиудыг lazy экспорт хийх - import хийх үед UDPipe, Ollama,
+# python-docx ачаалагдахгүй, анх хандахад л ачаална
+_EXPORTS = {
+    "clean_text": ".preprocess",
+    "extract_entities": ".preprocess",
+    "export_enhanced_protocol": ".exporter",
+    "render_protocol_docx": ".exporter",
+    "MongolianNLPProcessor": ".nlp_processor",
+    "SLMOnlySummarizer": ".summarizer",
+    "SLMOnlyActionExtractor": ".action_extractor",
+}
+
+# Optional модулиуд - суулгаагүй бол None
+_OPTIONAL = {"MongolianNLPProcessor", "SLMOnlySummarizer", "SLMOnlyActionExtractor"}
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    import importlib
+
+    try:
+        module = importlib.import_module(_EXPORTS[name], __package__)
+        value = getattr(module, name)
+    except ImportError:
+        if name not in _OPTIONAL:
+            raise
+        value = None
+
+    globals()[name] = value
+    return value
+
 
 __all__ = [
     "clean_text",
     "extract_entities",
     "export_enhanced_protocol",
+    "render_protocol_docx",
     "MongolianNLPProcessor",
     "SLMOnlySummarizer",
     "SLMOnlyActionExtractor",
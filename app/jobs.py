@@ -0,0 +1,236 @@
+"""
+Async job API - урт хурлын протоколыг арын горимд үүсгэх
+
+POST /jobs нэн даруй job id буцаана. Job-ууд хязгаартай worker pool
+дээр ажиллах ба төлөв нь локал SQLite файлд хадгалагдана (server
+дахин эхлэхэд дараалалд байсан ажил алдагдахгүй).
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional
+
+
+# Job төлөв
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# runner(job_id, request, on_progress) → үр дүн
+JobRunner = Callable[[str, Dict, Callable[[Dict], None]], Awaitable[Dict]]
+
+
+class JobStore:
+    """
+    Job-уудын төлөвийг SQLite-д хадгалах
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    request TEXT NOT NULL,
+                    progress TEXT,
+                    result TEXT,
+                    file TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+
+    def create(self, request: Dict) -> str:
+        """Шинэ job үүсгэх (queued)"""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, request, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(request, ensure_ascii=False), now, now)
+            )
+
+        return job_id
+
+    def update(self, job_id: str, **fields):
+        """Job-ийн талбаруудыг шинэчлэх (dict утгууд JSON болно)"""
+        columns = []
+        values = []
+        for key, value in fields.items():
+            if isinstance(value, (dict, list)):
+                value = json.dumps(value, ensure_ascii=False)
+            columns.append(f"{key} = ?")
+            values.append(value)
+
+        columns.append("updated_at = ?")
+        values.append(time.time())
+        values.append(job_id)
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE jobs SET {', '.join(columns)} WHERE id = ?",
+                values
+            )
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Job авах (олдохгүй бол None)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        job = dict(row)
+        for key in ("request", "progress", "result"):
+            if job[key]:
+                job[key] = json.loads(job[key])
+        return job
+
+    def unfinished(self) -> List[str]:
+        """
+        Дуусаагүй job-ууд (queued/running), үүссэн дарааллаар
+
+        Server унах үед running байсан job-ийг queued болгож дахин ажиллуулна.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ? WHERE status = ?", (QUEUED, RUNNING)
+            )
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status = ? ORDER BY created_at",
+                (QUEUED,)
+            ).fetchall()
+
+        return [row["id"] for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class JobManager:
+    """
+    Хязгаартай worker pool дээр job ажиллуулах
+
+    Args:
+        store: JobStore
+        runner: async функц - (job_id, request, on_progress) → үр дүнгийн dict
+        workers: Зэрэг ажиллах job-ийн дээд тоо
+    """
+
+    def __init__(self, store: JobStore, runner: JobRunner, workers: int = 2):
+        self.store = store
+        self.runner = runner
+        self.workers = max(1, workers)
+        self.progress: Dict[str, Dict] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        """Worker-уудыг эхлүүлж, дуусаагүй job-уудыг дахин дараалалд оруулах"""
+        self._queue = asyncio.Queue()
+
+        pending = await asyncio.to_thread(self.store.unfinished)
+        for job_id in pending:
+            self._queue.put_nowait(job_id)
+
+        if pending:
+            print(f"🔁 {len(pending)} дуусаагүй job дахин дараалалд орлоо")
+
+        self._tasks = [
+            asyncio.create_task(self._worker(i)) for i in range(self.workers)
+        ]
+
+    async def stop(self):
+        """Worker-уудыг зогсоох (дуусаагүй job SQLite-д үлдэнэ)"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, request: Dict) -> str:
+        """Job дараалалд оруулах"""
+        job_id = await asyncio.to_thread(self.store.create, request)
+        self._queue.put_nowait(job_id)
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[Dict]:
+        """Job-ийн төлөв (ажиллаж буй бол одоогийн progress-той)"""
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job and job_id in self.progress:
+            job["progress"] = self.progress[job_id]
+        if job:
+            job["queue_position"] = self._queue_position(job_id) if job["status"] == QUEUED else None
+        return job
+
+    def _queue_position(self, job_id: str) -> Optional[int]:
+        """Дараалал дахь байрлал (1-ээс)"""
+        if self._queue is None:
+            return None
+        try:
+            return list(self._queue._queue).index(job_id) + 1
+        except ValueError:
+            return None
+
+    async def _worker(self, index: int):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job is None or job["status"] != QUEUED:
+            return
+
+        await asyncio.to_thread(self.store.update, job_id, status=RUNNING)
+        self.progress[job_id] = {}
+
+        def on_progress(update: Dict):
+            self.progress[job_id].update(update)
+
+        print(f"🚀 Job {job_id} эхэллээ")
+
+        try:
+            result = await self.runner(job_id, job["request"], on_progress)
+        except asyncio.CancelledError:
+            # Server зогсож байна - дараагийн эхлэлд дахин ажиллана
+            raise
+        except Exception as e:
+            print(f"❌ Job {job_id} амжилтгүй: {e}")
+            await asyncio.to_thread(
+                self.store.update, job_id,
+                status=FAILED,
+                progress=self.progress.pop(job_id, {}),
+                error=str(e)
+            )
+            return
+
+        await asyncio.to_thread(
+            self.store.update, job_id,
+            status=DONE,
+            progress=self.progress.pop(job_id, {}),
+            result=result,
+            file=result.get("file")
+        )
+        print(f"✅ Job {job_id} дууслаа")
@@ -0,0 +1,198 @@
+"""
+Хэллэг үг, түгээмэл алдааны толь - нэг удаа compile хийсэн олон хэллэгийн matcher
+
+Толь бүр (LEXICON_DIR/<нэр>.txt) бүх хэллэгээ trie болгож, нэг regex болгон
+compile хийнэ. Текстийг нэг удаа гүйж, байрлал бүрт хамгийн урт таарах
+хэллэгийг арилгах/солих тул хугацаа текстийн уртад шугаман (толийн хэмжээнд
+хамаарахгүй) - хэллэг тус бүрд re.sub давтахгүй.
+
+Хэллэгүүд давхцвал (жишээ нь "даа шүү" + "шүү дээ") зүүн талд эхэлсэн
+хамгийн урт нь түрүүлнэ - хэллэг бүрийг файлын дарааллаар ээлжлэн арилгадаг
+байсан хуучин давталтаас ялгаатай. Давхцлыг бүтэн хэллэгээр нь ("даа шүү дээ")
+толинд нэмбэл хоёр арга ижил үр дүн өгнө (tests/test_lexicon.py шалгана).
+
+Файлын формат:
+
+    # тайлбар
+    шүү дээ                     (арилгана)
+    хиймаар => хийхээр          (солино)
+
+Файл өөрчлөгдвөл (LEXICON_RELOAD_INTERVAL тутамд шалгана) шинэ matcher-ийг
+хажууд нь бүтээгээд нэг дор солино - явж буй дуудлага хуучнаараа дуусна.
+
+Жишээ:
+    from app.lexicon import lexicon
+    text = lexicon.matcher("clean").sub(text)
+"""
+
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .config import LEXICON_DIR, LEXICON_RELOAD_INTERVAL
+from .result_cache import fingerprint
+
+# Pipeline-ийн ашигладаг толиуд (preprocess, summarizer, spell_checker)
+LEXICONS = ("clean", "postprocess", "spelling")
+
+# Trie-ийн зангилаанд хэллэг энд дуусна гэсэн тэмдэг (тэмдэгт биш)
+_END = ""
+
+
+class PhraseMatcher:
+    """
+    Олон хэллэгийг нэг дамжилтаар, хамгийн урт таарлаар солих
+
+    Том жижиг үсэг ялгахгүй, зөвхөн бүтэн үгээр таарна (\\b-тэй адил).
+
+    Args:
+        entries: хэллэг → орлуулга ("" = арилгах)
+    """
+
+    def __init__(self, entries: Dict[str, str]):
+        self.entries = {phrase.lower(): replacement for phrase, replacement in entries.items() if phrase}
+        self._regex = self._compile(self.entries) if self.entries else None
+        # Агуулгын hash - result cache-ийн түлхүүрт (mtime биш, агуулга өөрчлөгдвөл л солигдоно)
+        self.fingerprint = fingerprint(sorted(self.entries.items()))
+
+    @staticmethod
+    def _compile(entries: Dict[str, str]) -> "re.Pattern":
+        trie: Dict = {}
+        for phrase in entries:
+            node = trie
+            for char in phrase:
+                node = node.setdefault(char, {})
+            node[_END] = True
+        # Шугаман prefix-ийг нэг удаа л шалгана; greedy "?" урт хэллэгийг түрүүлж,
+        # үгийн хил таарахгүй бол богино руу буцна
+        return re.compile(r"(?<!\w)" + _trie_pattern(trie) + r"(?!\w)", re.IGNORECASE)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def sub(self, text: str) -> str:
+        """Бүх хэллэгийг нэг дамжилтаар арилгах/солих"""
+        if self._regex is None:
+            return text
+        return self._regex.sub(lambda m: self.entries[m.group().lower()], text)
+
+    def find(self, text: str) -> List[str]:
+        """Текстэд байгаа хэллэгүүд (давхардалгүй, эхлээд олдсон дарааллаар)"""
+        if self._regex is None:
+            return []
+        return list(dict.fromkeys(m.group().lower() for m in self._regex.finditer(text)))
+
+
+def _trie_pattern(node: Dict) -> str:
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char != _END]
+    if not branches:
+        return ""
+    group = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if _END in node:
+        # Энд дуусах хэллэг бий - үргэлжлэл заавал биш
+        return "(?:" + group + ")?"
+    return group
+
+
+def load_lexicon(path: str) -> Dict[str, str]:
+    """Толийн файлыг уншиж хэллэг → орлуулга болгох"""
+    entries: Dict[str, str] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            phrase, _, replacement = line.partition("=>")
+            entries[" ".join(phrase.split())] = replacement.strip()
+    return entries
+
+
+class Lexicon:
+    """
+    LEXICON_DIR доторх толиудын compile хийсэн matcher-ууд
+
+    Args:
+        directory: Толийн файлуудын хавтас
+        reload_interval: Файлын өөрчлөлт шалгах давтамж (секунд, 0 = үгүй)
+    """
+
+    def __init__(self, directory: str = LEXICON_DIR, reload_interval: float = LEXICON_RELOAD_INTERVAL):
+        self.directory = directory
+        self.reload_interval = reload_interval
+        # нэр → (файлын mtime/size, matcher, сүүлд шалгасан цаг)
+        self._matchers: Dict[str, Tuple[Tuple[int, int], PhraseMatcher, float]] = {}
+        self.reloads = 0
+        self._lock = threading.Lock()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.txt")
+
+    def _signature(self, name: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path(name))
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def matcher(self, name: str) -> PhraseMatcher:
+        """
+        Толийн matcher - файл өөрчлөгдсөн бол дахин compile хийнэ
+
+        Raises:
+            RuntimeError: Толь анх ачаалагдахгүй бол
+        """
+        current = self._matchers.get(name)
+        now = time.monotonic()
+        if current and (self.reload_interval <= 0 or now - current[2] < self.reload_interval):
+            return current[1]
+
+        with self._lock:
+            current = self._matchers.get(name)
+            if current and self.reload_interval > 0 and now - current[2] < self.reload_interval:
+                return current[1]
+            signature = self._signature(name)
+            if current and (signature is None or signature == current[0]):
+                # Өөрчлөгдөөгүй (эсвэл түр устгагдсан) - хуучнаа үргэлжлүүлнэ
+                self._matchers[name] = (current[0], current[1], now)
+                return current[1]
+            try:
+                matcher = PhraseMatcher(load_lexicon(self.path(name)))
+            except (OSError, UnicodeDecodeError, re.error) as e:
+                if current:
+                    print(f"⚠️  Толь '{name}' дахин ачаалагдсангүй ({e}) - хуучныг ашиглана")
+                    self._matchers[name] = (current[0], current[1], now)
+                    return current[1]
+                raise RuntimeError(f"❌ Толь '{name}' ачаалагдсангүй: {self.path(name)} ({e})")
+            if current:
+                self.reloads += 1
+                print(f"🔄 Толь '{name}' дахин ачаалагдлаа ({len(matcher)} хэллэг)")
+            # Бүрэн бүтээгдсэн matcher-ийг нэг дор солино
+            self._matchers[name] = (signature, matcher, now)
+            return matcher
+
+    def entries(self, name: str) -> Dict[str, str]:
+        """Толийн хэллэг → орлуулга"""
+        return self.matcher(name).entries
+
+    def fingerprint(self, names: Tuple[str, ...] = LEXICONS) -> str:
+        """
+        Толиудын агуулгын fingerprint - толь дахин ачаалагдахад хуучин
+        үр дүн cache-ээс буцахгүй
+
+        Raises:
+            RuntimeError: Толь анх ачаалагдахгүй бол
+        """
+        return fingerprint([(name, self.matcher(name).fingerprint) for name in names])
+
+    def stats(self) -> Dict:
+        return {
+            "directory": self.directory,
+            "lexicons": {name: len(matcher) for name, (_, matcher, _) in self._matchers.items()},
+            "reloads": self.reloads,
+        }
+
+
+# Процесс даяар нэг толь (preprocess, summarizer, spell_checker)
+lexicon = Lexicon()
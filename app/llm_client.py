@@ -0,0 +1,992 @@
+"""
+Процесс даяар нэг SLM client (sync + async)
+
+ollama.chat() модулийн түвшний default client-ийг ашиглахын оронд
+тохируулсан host, connect/read timeout, keep-alive connection pool-той
+нэг client-ийг summarizer, action extractor, model registry хуваалцана.
+Дуудлага бүр шинэ холболт нээхгүй, backend гацсан үед worker үүрд
+хүлээхгүй (LLM_READ_TIMEOUT).
+
+Backend (LLM_BACKEND):
+    ollama - OllamaClient (ollama сан)
+    openai - OpenAICompatibleClient (llama.cpp server, vLLM гэх мэт
+             /v1/chat/completions) - Ollama-ийн options-ийг хөрвүүлнэ
+
+Pipeline Ollama-ийн options (num_predict, repeat_penalty) болон хариуны
+хэлбэрийг ({"message": {...}, "prompt_eval_count", "eval_count", ...})
+ашигладаг тул backend бүр тэр хэлбэрээр буцаана.
+
+Бичлэг, replay (CPU талыг SLM-гүй хэмжих, benchmark):
+    LLM_RECORD_PATH=rec.jsonl         - host бүрийн client-ийг RecordingClient-ээр
+                                        ороож chat() бүрийг бичнэ
+    LLM_BACKEND=replay LLM_REPLAY_PATH=rec.jsonl
+                                      - ReplayClient request fingerprint-ээр
+                                        бичигдсэн хариуг буцаана (network-гүй)
+
+Хэд хэдэн host заасан бол LLMRouter chat() дуудлага бүрийг (урт
+текстийн хэсэг бүрийг ч) хамгийн бага ачаалалтай эрүүл host руу
+чиглүүлж, унасан host-ийг түр хасна.
+
+Нэг хурлын дуудлагууд (llm_session()) ижил system prompt, зааврын prefix-тэй
+тул LLM_SESSION_AFFINITY үед аль хэдийн очсон host-доо (KV cache нь тэнд)
+үлдэнэ - тэр host дүүрсэн үед л өөр host руу халина.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from .config import (
+    LLM_BACKEND, LLM_HOSTS, LLM_API_KEY, LLM_CONNECT_TIMEOUT, LLM_READ_TIMEOUT, LLM_POOL_SIZE,
+    LB_HEALTH_INTERVAL, LB_FAIL_THRESHOLD, LB_EJECT_SECONDS, LLM_MAX_CONCURRENCY,
+    LLM_RECORD_PATH, LLM_REPLAY_LATENCY, LLM_SESSION_AFFINITY, LLM_CACHE_PROMPT
+)
+from .result_cache import fingerprint
+from .tracing import tracer
+
+try:
+    import httpx
+    HTTPX_AVAILABLE = True
+except ImportError:
+    HTTPX_AVAILABLE = False
+
+try:
+    from ollama import Client, AsyncClient
+    OLLAMA_AVAILABLE = HTTPX_AVAILABLE
+except ImportError:
+    OLLAMA_AVAILABLE = False
+
+# Сонгосон backend ашиглах боломжтой эсэх (replay нэмэлт сан шаардахгүй)
+LLM_AVAILABLE = {
+    "openai": HTTPX_AVAILABLE,
+    "replay": True,
+}.get(LLM_BACKEND, OLLAMA_AVAILABLE)
+
+
+def normalize_host(host: str) -> str:
+    """'127.0.0.1:11434' → 'http://127.0.0.1:11434'"""
+    if "://" not in host:
+        host = f"http://{host}"
+    return host.rstrip("/")
+
+
+class LLMTimeoutError(RuntimeError):
+    """SLM backend хугацаандаа хариу өгөөгүй"""
+
+
+class LLMClient:
+    """
+    SLM client-ийн интерфейс (summarizer, action extractor, model registry үүнийг хэрэглэнэ)
+    """
+
+    def chat(self, model: str, messages: List[Dict], options: Optional[Dict] = None,
+             keep_alive: Optional[str] = None) -> Dict:
+        raise NotImplementedError
+
+    async def achat(self, model: str, messages: List[Dict], options: Optional[Dict] = None,
+                    keep_alive: Optional[str] = None) -> Dict:
+        raise NotImplementedError
+
+    def show(self, model: str) -> Dict:
+        raise NotImplementedError
+
+    async def aps(self) -> List[str]:
+        raise NotImplementedError
+
+    def hosts(self) -> List["LLMClient"]:
+        """Нэг host тус бүрийн client (model ачаалах, residency шалгахад)"""
+        return [self]
+
+    def stats(self) -> Dict:
+        return {}
+
+
+class OllamaClient(LLMClient):
+    """
+    Нэг Ollama host-ийн pooled client
+
+    Sync client нэг л удаа, async client event loop бүрт нэг удаа
+    үүсгэгдэнэ (httpx.AsyncClient-ийн pool loop-д холбогддог).
+
+    Args:
+        host: Ollama host (OLLAMA_HOST)
+        connect_timeout: Холболт тогтоох дээд хугацаа (секунд)
+        read_timeout: Хариу хүлээх дээд хугацаа (секунд)
+        pool_size: Keep-alive холболтын дээд тоо
+    """
+
+    def __init__(
+        self,
+        host: str = LLM_HOSTS[0],
+        connect_timeout: float = LLM_CONNECT_TIMEOUT,
+        read_timeout: float = LLM_READ_TIMEOUT,
+        pool_size: int = LLM_POOL_SIZE
+    ):
+        self.host = normalize_host(host)
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.pool_size = max(1, pool_size)
+
+        self._client = None
+        self._async_clients: Dict[asyncio.AbstractEventLoop, Any] = {}
+        self._lock = threading.Lock()
+
+    def _client_kwargs(self) -> Dict:
+        return {
+            "host": self.host,
+            "timeout": httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            "limits": httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.pool_size
+            ),
+        }
+
+    def _require_ollama(self):
+        if not OLLAMA_AVAILABLE:
+            raise RuntimeError(
+                "❌ Ollama суулгаагүй байна!\n"
+                "   Суулгах: pip install ollama"
+            )
+
+    def sync_client(self):
+        """Sync ollama.Client (анх хэрэглэхэд үүсгэнэ)"""
+        self._require_ollama()
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = Client(**self._client_kwargs())
+        return self._client
+
+    def async_client(self):
+        """Одоогийн event loop-ийн ollama.AsyncClient"""
+        self._require_ollama()
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            # Хаагдсан loop-уудын client-ийг цэвэрлэх
+            for old_loop in [l for l in self._async_clients if l.is_closed()]:
+                del self._async_clients[old_loop]
+            client = self._async_clients[loop] = AsyncClient(**self._client_kwargs())
+        return client
+
+    def _timeout_error(self, e: Exception) -> LLMTimeoutError:
+        return LLMTimeoutError(
+            f"❌ SLM backend хугацаандаа хариу өгсөнгүй ({self.host}): {type(e).__name__}\n"
+            f"   connect={self.connect_timeout}s, read={self.read_timeout}s"
+        )
+
+    def chat(
+        self,
+        model: str,
+        messages: List[Dict],
+        options: Optional[Dict] = None,
+        keep_alive: Optional[str] = None
+    ) -> Dict:
+        """Sync chat дуудлага"""
+        try:
+            return self.sync_client().chat(
+                model=model, messages=messages, options=options, keep_alive=keep_alive
+            )
+        except httpx.TimeoutException as e:
+            raise self._timeout_error(e)
+
+    async def achat(
+        self,
+        model: str,
+        messages: List[Dict],
+        options: Optional[Dict] = None,
+        keep_alive: Optional[str] = None
+    ) -> Dict:
+        """Async chat дуудлага"""
+        try:
+            return await self.async_client().chat(
+                model=model, messages=messages, options=options, keep_alive=keep_alive
+            )
+        except httpx.TimeoutException as e:
+            raise self._timeout_error(e)
+
+    def show(self, model: str) -> Dict:
+        """Model-ийн metadata (generation хийхгүй)"""
+        try:
+            return self.sync_client().show(model)
+        except httpx.TimeoutException as e:
+            raise self._timeout_error(e)
+
+    async def aps(self) -> List[str]:
+        """Санах ойд байгаа model-ууд (/api/ps)"""
+        async with httpx.AsyncClient(base_url=self.host, timeout=self.connect_timeout) as client:
+            response = await client.get("/api/ps")
+            response.raise_for_status()
+        return [m.get("name", "") for m in response.json().get("models", [])]
+
+    async def aping(self):
+        """Host амьд эсэх (/api/version) - амжилтгүй бол exception"""
+        async with httpx.AsyncClient(base_url=self.host, timeout=self.connect_timeout) as client:
+            response = await client.get("/api/version")
+            response.raise_for_status()
+
+    def stats(self) -> Dict:
+        return {
+            "backend": "ollama",
+            "host": self.host,
+            "connect_timeout": self.connect_timeout,
+            "read_timeout": self.read_timeout,
+            "pool_size": self.pool_size,
+        }
+
+
+# Ollama options → OpenAI-compatible талбар. repeat_penalty-г llama.cpp
+# ("repeat_penalty"), vLLM ("repetition_penalty") хоёулаа ойлгох нэрээр илгээнэ
+OPENAI_OPTION_MAP = {
+    "temperature": ("temperature",),
+    "top_p": ("top_p",),
+    "top_k": ("top_k",),
+    "num_predict": ("max_tokens",),
+    "repeat_penalty": ("repeat_penalty", "repetition_penalty"),
+    "presence_penalty": ("presence_penalty",),
+    "frequency_penalty": ("frequency_penalty",),
+    "seed": ("seed",),
+    "stop": ("stop",),
+}
+
+
+def translate_options(options: Optional[Dict]) -> Dict:
+    """
+    Ollama options-ийг OpenAI-compatible request талбар болгох
+
+    num_ctx зэрэг server эхлэхэд тохируулагддаг options алгасагдана.
+    """
+    body = {}
+    for key, value in (options or {}).items():
+        for target in OPENAI_OPTION_MAP.get(key, ()):
+            body[target] = value
+    return body
+
+
+class OpenAICompatibleClient(LLMClient):
+    """
+    OpenAI-compatible server-ийн pooled client (/v1/chat/completions)
+
+    llama.cpp server (continuous batching), vLLM зэрэг serving engine-ийг
+    pipeline-ийг өөрчлөхгүйгээр туршихад зориулсан. Хариуг Ollama-ийн
+    хэлбэрт (message, prompt_eval_count, eval_count, *_duration ns) хөрвүүлнэ.
+
+    Args:
+        host: Server ("127.0.0.1:8080" эсвэл "http://host:8000")
+        api_key: Bearer token (шаардлагагүй бол хоосон)
+        connect_timeout, read_timeout, pool_size: OllamaClient-тай ижил
+        cache_prompt: cache_prompt талбар илгээх - llama.cpp server л дэмжинэ
+                      (vLLM prefix cache-ийг --enable-prefix-caching-ээр
+                      өөрөө хийж, зарим хувилбар нь үл мэдэгдэх талбарыг
+                      татгалздаг; OpenAI API татгалзана)
+    """
+
+    def __init__(
+        self,
+        host: str = LLM_HOSTS[0],
+        api_key: str = LLM_API_KEY,
+        connect_timeout: float = LLM_CONNECT_TIMEOUT,
+        read_timeout: float = LLM_READ_TIMEOUT,
+        pool_size: int = LLM_POOL_SIZE,
+        cache_prompt: bool = LLM_CACHE_PROMPT
+    ):
+        self.host = normalize_host(host)
+        self.api_key = api_key
+        self.cache_prompt = cache_prompt
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.pool_size = max(1, pool_size)
+
+        self._client = None
+        self._async_clients: Dict[asyncio.AbstractEventLoop, Any] = {}
+        self._lock = threading.Lock()
+
+    def _client_kwargs(self) -> Dict:
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        return {
+            "base_url": self.host,
+            "headers": headers,
+            "timeout": httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            "limits": httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.pool_size
+            ),
+        }
+
+    def _require_httpx(self):
+        if not HTTPX_AVAILABLE:
+            raise RuntimeError("❌ httpx суулгаагүй байна (pip install httpx)")
+
+    def sync_client(self):
+        self._require_httpx()
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(**self._client_kwargs())
+        return self._client
+
+    def async_client(self):
+        self._require_httpx()
+        loop = asyncio.get_running_loop()
+        client = self._async_clients.get(loop)
+        if client is None:
+            for old_loop in [l for l in self._async_clients if l.is_closed()]:
+                del self._async_clients[old_loop]
+            client = self._async_clients[loop] = httpx.AsyncClient(**self._client_kwargs())
+        return client
+
+    def _timeout_error(self, e: Exception) -> LLMTimeoutError:
+        return LLMTimeoutError(
+            f"❌ SLM backend хугацаандаа хариу өгсөнгүй ({self.host}): {type(e).__name__}\n"
+            f"   connect={self.connect_timeout}s, read={self.read_timeout}s"
+        )
+
+    def _request_body(self, model: str, messages: List[Dict], options: Optional[Dict]) -> Dict:
+        body = {"model": model, "messages": messages, "stream": False, **translate_options(options)}
+        if self.cache_prompt:
+            # Slot-ыг (id_slot) бэхлэхгүй - server prompt-ийн ижил төстэй байдлаар
+            # cache-тэй slot-оо өөрөө сонгоно, хэсгүүд зэрэг ажиллах боломжтой үлдэнэ
+            body["cache_prompt"] = True
+        return body
+
+    def _to_ollama(self, data: Dict, elapsed_s: float) -> Dict:
+        """OpenAI хариуг Ollama-ийн хэлбэрт хөрвүүлэх"""
+        choice = (data.get("choices") or [{}])[0]
+        message = choice.get("message") or {}
+        usage = data.get("usage") or {}
+        response = {
+            "model": data.get("model"),
+            "message": {"role": message.get("role", "assistant"), "content": message.get("content") or ""},
+            "done_reason": choice.get("finish_reason"),
+            "prompt_eval_count": usage.get("prompt_tokens"),
+            "eval_count": usage.get("completion_tokens"),
+            "total_duration": int(elapsed_s * 1e9),
+        }
+        # llama.cpp server-ийн нэмэлт timings (ms)
+        timings = data.get("timings") or {}
+        if "prompt_ms" in timings:
+            response["prompt_eval_duration"] = int(timings["prompt_ms"] * 1e6)
+        if "predicted_ms" in timings:
+            response["eval_duration"] = int(timings["predicted_ms"] * 1e6)
+        # Cache-ээс авсан prompt token (vLLM/OpenAI: prompt_tokens_details, llama.cpp: cache_n)
+        cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens", timings.get("cache_n"))
+        if cached is not None:
+            response["prompt_cache_count"] = cached
+        return response
+
+    def _check(self, response) -> Dict:
+        if response.status_code == 404:
+            raise RuntimeError(f"not found: {response.text[:200]}")
+        response.raise_for_status()
+        return response.json()
+
+    def _empty_response(self, model: str) -> Dict:
+        return {"model": model, "message": {"role": "assistant", "content": ""}}
+
+    def chat(self, model: str, messages: List[Dict], options: Optional[Dict] = None,
+             keep_alive: Optional[str] = None) -> Dict:
+        """Sync chat дуудлага (keep_alive-г OpenAI server ашиглахгүй)"""
+        try:
+            if not messages:
+                # Model ачаалах (warm-up) дуудлага - server-ийг шалгахад хангалттай
+                self.show(model)
+                return self._empty_response(model)
+            started = time.perf_counter()
+            data = self._check(self.sync_client().post(
+                "/v1/chat/completions", json=self._request_body(model, messages, options)
+            ))
+            return self._to_ollama(data, time.perf_counter() - started)
+        except httpx.TimeoutException as e:
+            raise self._timeout_error(e)
+
+    async def achat(self, model: str, messages: List[Dict], options: Optional[Dict] = None,
+                    keep_alive: Optional[str] = None) -> Dict:
+        """Async chat дуудлага"""
+        try:
+            if not messages:
+                await self.aping()
+                return self._empty_response(model)
+            started = time.perf_counter()
+            data = self._check(await self.async_client().post(
+                "/v1/chat/completions", json=self._request_body(model, messages, options)
+            ))
+            return self._to_ollama(data, time.perf_counter() - started)
+        except httpx.TimeoutException as e:
+            raise self._timeout_error(e)
+
+    def _find_model(self, models: List[Dict], model: str) -> Dict:
+        for entry in models:
+            if entry.get("id") in (model, f"{model}:latest"):
+                return entry
+        # llama.cpp server нэг л model ажиллуулж, request-ийн model нэрийг үл тооно
+        if len(models) == 1:
+            return models[0]
+        raise RuntimeError(f"❌ Model '{model}' not found ({self.host})")
+
+    def show(self, model: str) -> Dict:
+        """Model server дээр байгаа эсэх (/v1/models)"""
+        try:
+            data = self._check(self.sync_client().get("/v1/models"))
+        except httpx.TimeoutException as e:
+            raise self._timeout_error(e)
+        return self._find_model(data.get("data") or [], model)
+
+    async def aps(self) -> List[str]:
+        """Server-ийн ажиллуулж буй model-ууд"""
+        data = self._check(await self.async_client().get("/v1/models"))
+        return [m.get("id", "") for m in data.get("data") or []]
+
+    async def aping(self):
+        """Server амьд эсэх - амжилтгүй бол exception"""
+        self._check(await self.async_client().get("/v1/models", timeout=self.connect_timeout))
+
+    def stats(self) -> Dict:
+        return {
+            "backend": "openai",
+            "host": self.host,
+            "connect_timeout": self.connect_timeout,
+            "read_timeout": self.read_timeout,
+            "pool_size": self.pool_size,
+        }
+
+
+def request_fingerprint(model: str, messages: List[Dict], options: Optional[Dict] = None) -> str:
+    """
+    chat() хүсэлтийн fingerprint - бичлэг, replay-д түлхүүр
+
+    keep_alive хариунд нөлөөлөхгүй тул оролцохгүй.
+    """
+    return fingerprint(model, messages, options or {})
+
+
+def _response_dict(response: Any) -> Dict:
+    # ollama-ийн шинэ хувилбарууд pydantic объект буцаадаг
+    if isinstance(response, dict):
+        return response
+    if hasattr(response, "model_dump"):
+        return response.model_dump()
+    return dict(response)
+
+
+class LLMRecorder:
+    """
+    chat() дуудлагуудыг JSONL файлд нэмэх (мөр бүрт нэг дуудлага)
+
+    Мөрийн бүтэц:
+        {"fingerprint", "model", "messages", "options", "response",
+         "elapsed_s", "host", "recorded_at"}
+
+    Args:
+        path: Файлын зам
+    """
+
+    def __init__(self, path: str = LLM_RECORD_PATH):
+        self.path = path
+        self.records = 0
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def record(self, host: str, model: str, messages: List[Dict], options: Optional[Dict],
+               response: Any, elapsed_s: float):
+        line = json.dumps({
+            "fingerprint": request_fingerprint(model, messages, options),
+            "model": model,
+            "messages": messages,
+            "options": options or {},
+            "response": _response_dict(response),
+            "elapsed_s": round(elapsed_s, 4),
+            "host": host,
+            "recorded_at": time.time(),
+        }, ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            self.records += 1
+
+
+class RecordingClient(LLMClient):
+    """
+    Host-ийн client-ийг ороож chat() бүрийг LLMRecorder-т бичих
+
+    Model ачаалах (хоосон messages) дуудлага бичигдэхгүй.
+    """
+
+    def __init__(self, client: LLMClient, recorder: LLMRecorder):
+        self.client = client
+        self.recorder = recorder
+
+    @property
+    def host(self) -> str:
+        return getattr(self.client, "host", type(self.client).__name__)
+
+    def chat(self, model: str, messages: List[Dict], options: Optional[Dict] = None,
+             keep_alive: Optional[str] = None) -> Dict:
+        started = time.perf_counter()
+        response = self.client.chat(model=model, messages=messages, options=options, keep_alive=keep_alive)
+        if messages:
+            self.recorder.record(self.host, model, messages, options, response, time.perf_counter() - started)
+        return response
+
+    async def achat(self, model: str, messages: List[Dict], options: Optional[Dict] = None,
+                    keep_alive: Optional[str] = None) -> Dict:
+        started = time.perf_counter()
+        response = await self.client.achat(model=model, messages=messages, options=options, keep_alive=keep_alive)
+        if messages:
+            self.recorder.record(self.host, model, messages, options, response, time.perf_counter() - started)
+        return response
+
+    def show(self, model: str) -> Dict:
+        return self.client.show(model)
+
+    async def aps(self) -> List[str]:
+        return await self.client.aps()
+
+    async def aping(self):
+        await self.client.aping()
+
+    def stats(self) -> Dict:
+        return {**self.client.stats(), "recording": self.recorder.path, "recorded": self.recorder.records}
+
+
+class ReplayClient(LLMClient):
+    """
+    LLMRecorder-ийн бичлэгээс хариу буцаах backend (network-гүй, deterministic)
+
+    Ижил fingerprint-тэй хэд хэдэн бичлэг байвал үргэлж эхнийхийг буцаана -
+    ингэснээр ажиллуулах бүрт гаралт ижил байна.
+
+    Args:
+        path: Бичлэгийн JSONL файл
+        latency_scale: Бичигдсэн хугацааг үржүүлэх коэффициент (0 = хүлээхгүй)
+
+    Raises:
+        RuntimeError: Файл байхгүй, эсвэл бичигдээгүй хүсэлт ирсэн бол
+    """
+
+    def __init__(self, path: str, latency_scale: float = LLM_REPLAY_LATENCY):
+        self.host = path
+        self.latency_scale = latency_scale
+        self.records: Dict[str, Dict] = {}
+        self.hits = 0
+        self.misses = 0
+        self._load(path)
+
+    def _load(self, path: str):
+        if not os.path.exists(path):
+            raise RuntimeError(f"❌ SLM бичлэг олдсонгүй: {path} (LLM_RECORD_PATH-аар бичиж авна)")
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                self.records.setdefault(record["fingerprint"], record)
+
+    def _lookup(self, model: str, messages: List[Dict], options: Optional[Dict]) -> Dict:
+        record = self.records.get(request_fingerprint(model, messages, options))
+        if record is None:
+            self.misses += 1
+            raise RuntimeError(
+                f"❌ Бичлэгт байхгүй SLM хүсэлт ({self.host}): model={model}, "
+                f"messages={len(messages)} - prompt, options өөрчлөгдсөн бол дахин бичнэ үү"
+            )
+        self.hits += 1
+        return record
+
+    def _empty_response(self, model: str) -> Dict:
+        return {"model": model, "message": {"role": "assistant", "content": ""}}
+
+    def chat(self, model: str, messages: List[Dict], options: Optional[Dict] = None,
+             keep_alive: Optional[str] = None) -> Dict:
+        if not messages:
+            return self._empty_response(model)
+        record = self._lookup(model, messages, options)
+        if self.latency_scale > 0:
+            time.sleep(record["elapsed_s"] * self.latency_scale)
+        return record["response"]
+
+    async def achat(self, model: str, messages: List[Dict], options: Optional[Dict] = None,
+                    keep_alive: Optional[str] = None) -> Dict:
+        if not messages:
+            return self._empty_response(model)
+        record = self._lookup(model, messages, options)
+        if self.latency_scale > 0:
+            await asyncio.sleep(record["elapsed_s"] * self.latency_scale)
+        return record["response"]
+
+    def show(self, model: str) -> Dict:
+        return {"model": model}
+
+    async def aps(self) -> List[str]:
+        return sorted({r["model"] for r in self.records.values()})
+
+    async def aping(self):
+        pass
+
+    def stats(self) -> Dict:
+        return {
+            "backend": "replay",
+            "host": self.host,
+            "records": len(self.records),
+            "latency_scale": self.latency_scale,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# httpx суулгаагүй (replay backend) үед ч алдааны ангилал NameError өгөхгүй
+if HTTPX_AVAILABLE:
+    _HOST_FAILURES = (LLMTimeoutError, httpx.TransportError, ConnectionError)
+    _CONNECT_FAILURES = (httpx.ConnectError, httpx.ConnectTimeout, ConnectionRefusedError)
+else:
+    _HOST_FAILURES = (LLMTimeoutError, ConnectionError)
+    _CONNECT_FAILURES = (ConnectionRefusedError,)
+
+
+def _is_host_failure(e: BaseException) -> bool:
+    """Host-ийн алдаа эсэх (холболт, timeout) - model/prompt-ийн алдаа биш"""
+    return isinstance(e, _HOST_FAILURES)
+
+
+def _is_connect_failure(e: BaseException) -> bool:
+    """Хүсэлт host-д хүрээгүй - өөр host дээр давтахад аюулгүй"""
+    return isinstance(e, _CONNECT_FAILURES)
+
+
+class HostState:
+    """Router доторх нэг host-ийн төлөв"""
+
+    def __init__(self, client: LLMClient):
+        self.client = client
+        self.outstanding = 0
+        self.failures = 0
+        self.ejected_until = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        return getattr(self.client, "host", type(self.client).__name__)
+
+    def healthy(self, now: float) -> bool:
+        return self.ejected_until <= now
+
+    def status(self) -> Dict:
+        now = time.time()
+        return {
+            "host": self.name,
+            "healthy": self.healthy(now),
+            "ejected_for_s": round(self.ejected_until - now, 1) if not self.healthy(now) else 0,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "errors": self.errors,
+            "last_error": self.last_error,
+        }
+
+
+class LLMSession:
+    """
+    Нэг хурлын SLM дуудлагууд (llm_session())
+
+    Хэсэг, retry бүр ижил prefix-тэй тул prefix нь cache-д байгаа host-доо очно.
+
+    Attributes:
+        hosts: Энэ session-ий дуудлага очсон host-ууд (очсон дарааллаар)
+        calls: Эхэлсэн SLM дуудлагын тоо
+    """
+
+    def __init__(self):
+        self.hosts: List[HostState] = []
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def next_call(self) -> str:
+        """Дуудлага эхлэхэд - "first" (prefix cache-гүй) эсвэл "later" буцаана"""
+        with self._lock:
+            self.calls += 1
+            return "first" if self.calls == 1 else "later"
+
+
+_current_session: ContextVar[Optional[LLMSession]] = ContextVar("llm_session", default=None)
+
+
+@contextmanager
+def llm_session():
+    """
+    Энэ context доторх (task, thread-ийг оролцуулан) SLM дуудлагуудыг нэг session болгох
+
+    Жишээ:
+        with llm_session():
+            await graph.arun(...)
+    """
+    session = LLMSession()
+    token = _current_session.set(session)
+    try:
+        yield session
+    finally:
+        _current_session.reset(token)
+
+
+def current_session() -> Optional[LLMSession]:
+    return _current_session.get()
+
+
+def session_call() -> str:
+    """Metric-ийн label: session-ий эхний дуудлага уу ("first", "later", "none")"""
+    session = _current_session.get()
+    return session.next_call() if session else "none"
+
+
+class LLMRouter(LLMClient):
+    """
+    Олон host-ийн хооронд SLM дуудлага хуваарилах
+
+    - Дуудлага бүр эрүүл host-уудаас хамгийн цөөн хүлээгдэж буй
+      (outstanding) хүсэлттэй host руу очно
+    - Host дараалан fail_threshold удаа холболт/timeout алдаа гаргавал
+      eject_seconds хугацаанд хасагдана (бүгд хасагдсан бол хамгийн
+      түрүүнд эргэж ирэх host-ийг ашиглана)
+    - Холболт тогтоогдоогүй (хүсэлт host-д хүрээгүй) бол өөр host дээр
+      нэг удаа давтана
+    - health_check_loop() хасагдсан host-уудыг шалгаж буцаан оруулна
+    - session_affinity үед llm_session()-ий дуудлага өмнө очсон host-доо
+      (max_outstanding-д хүрээгүй бол) очно
+
+    Args:
+        clients: Host тус бүрийн client
+        fail_threshold: Хэдэн дараалсан алдааны дараа хасах
+        eject_seconds: Хасах хугацаа (секунд)
+        session_affinity: Нэг session-ий дуудлагуудыг нэг host-д барих
+        max_outstanding: Session-ий host үүнээс олон хүсэлттэй бол өөр host руу халих
+    """
+
+    def __init__(
+        self,
+        clients: List[LLMClient],
+        fail_threshold: int = LB_FAIL_THRESHOLD,
+        eject_seconds: float = LB_EJECT_SECONDS,
+        session_affinity: bool = LLM_SESSION_AFFINITY,
+        max_outstanding: int = LLM_MAX_CONCURRENCY
+    ):
+        if not clients:
+            raise ValueError("LLMRouter: дор хаяж нэг host шаардлагатай")
+        self.states = [HostState(c) for c in clients]
+        self.fail_threshold = max(1, fail_threshold)
+        self.eject_seconds = eject_seconds
+        self.session_affinity = session_affinity
+        self.max_outstanding = max(1, max_outstanding)
+        self._rotation = itertools.count()
+        self._lock = threading.Lock()
+
+    def hosts(self) -> List[LLMClient]:
+        return [state.client for state in self.states]
+
+    def _acquire(self, exclude: Optional[HostState] = None) -> HostState:
+        """Session-ий host, эсвэл хамгийн бага ачаалалтай эрүүл host сонгох"""
+        now = time.time()
+        session = _current_session.get() if self.session_affinity else None
+        with self._lock:
+            candidates = [s for s in self.states if s is not exclude] or self.states
+            healthy = [s for s in candidates if s.healthy(now)]
+
+            if healthy:
+                # Prefix нь cache-д байгаа, дүүрээгүй host-ууд түрүүлнэ
+                warm = [
+                    s for s in healthy
+                    if session and s in session.hosts and s.outstanding < self.max_outstanding
+                ]
+                pool = warm or healthy
+                # Ижил ачаалалтай host-уудын дунд ээлжлэх
+                offset = next(self._rotation)
+                n = len(pool)
+                state = min(
+                    (pool[(offset + i) % n] for i in range(n)),
+                    key=lambda s: s.outstanding
+                )
+                if session and state not in session.hosts:
+                    session.hosts.append(state)
+            else:
+                state = min(candidates, key=lambda s: s.ejected_until)
+
+            state.outstanding += 1
+            state.requests += 1
+            return state
+
+    def _release(self, state: HostState, error: Optional[BaseException] = None):
+        with self._lock:
+            state.outstanding -= 1
+
+            if error is None:
+                state.failures = 0
+                return
+
+            if not _is_host_failure(error):
+                return
+
+            state.errors += 1
+            state.failures += 1
+            state.last_error = f"{type(error).__name__}: {error}"
+            if state.failures >= self.fail_threshold and state.healthy(time.time()):
+                state.ejected_until = time.time() + self.eject_seconds
+                print(f"⚠️  SLM host хасагдлаа ({self.eject_seconds:.0f}s): {state.name} - {state.last_error}")
+
+    def _mark_span(self, state: HostState):
+        span = tracer.current_span()
+        if span and span.name == "llm.chat":
+            span.set_attribute("host", state.name)
+
+    def _call(self, method: str, *args, **kwargs):
+        state = self._acquire()
+        for attempt in range(2):
+            self._mark_span(state)
+            try:
+                result = getattr(state.client, method)(*args, **kwargs)
+            except BaseException as e:
+                self._release(state, e)
+                if attempt == 0 and len(self.states) > 1 and _is_connect_failure(e):
+                    state = self._acquire(exclude=state)
+                    continue
+                raise
+            self._release(state)
+            return result
+
+    async def _acall(self, method: str, *args, **kwargs):
+        state = self._acquire()
+        for attempt in range(2):
+            self._mark_span(state)
+            try:
+                result = await getattr(state.client, method)(*args, **kwargs)
+            except BaseException as e:
+                self._release(state, e)
+                if attempt == 0 and len(self.states) > 1 and _is_connect_failure(e):
+                    state = self._acquire(exclude=state)
+                    continue
+                raise
+            self._release(state)
+            return result
+
+    def chat(self, model: str, messages: List[Dict], options: Optional[Dict] = None,
+             keep_alive: Optional[str] = None) -> Dict:
+        return self._call("chat", model=model, messages=messages, options=options, keep_alive=keep_alive)
+
+    async def achat(self, model: str, messages: List[Dict], options: Optional[Dict] = None,
+                    keep_alive: Optional[str] = None) -> Dict:
+        return await self._acall("achat", model=model, messages=messages, options=options, keep_alive=keep_alive)
+
+    def show(self, model: str) -> Dict:
+        return self._call("show", model)
+
+    async def aps(self) -> List[str]:
+        return await self._acall("aps")
+
+    async def check_health(self):
+        """Бүх host-ийг зэрэг шалгах - амьд бол буцаан оруулах, үхсэн бол хасах"""
+        async def check(state: HostState):
+            try:
+                await state.client.aping()
+            except Exception as e:
+                with self._lock:
+                    state.last_error = f"health: {type(e).__name__}: {e}"
+                    if state.healthy(time.time()):
+                        print(f"⚠️  SLM host health check амжилтгүй: {state.name}")
+                    state.ejected_until = time.time() + self.eject_seconds
+                return
+
+            with self._lock:
+                if not state.healthy(time.time()):
+                    print(f"✅ SLM host буцаан орлоо: {state.name}")
+                state.ejected_until = 0.0
+                state.failures = 0
+
+        await asyncio.gather(*(check(s) for s in self.states))
+
+    async def health_check_loop(self, interval: float = LB_HEALTH_INTERVAL):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.check_health()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️  SLM host health check алдаа: {e}")
+
+    def stats(self) -> Dict:
+        return {
+            "backend": self.states[0].client.stats().get("backend"),
+            "hosts": [s.status() for s in self.states],
+            "fail_threshold": self.fail_threshold,
+            "eject_seconds": self.eject_seconds,
+            "session_affinity": self.session_affinity,
+        }
+
+
+# LLM_BACKEND → host тус бүрийн client-ийн класс
+BACKENDS = {
+    "ollama": OllamaClient,
+    "openai": OpenAICompatibleClient,
+    "replay": ReplayClient,
+}
+
+
+def create_llm_client(
+    backend: str = LLM_BACKEND,
+    hosts: Optional[List[str]] = None,
+    record_path: str = LLM_RECORD_PATH
+) -> LLMRouter:
+    """
+    Тохиргооны backend, host-уудаар router үүсгэх
+
+    Args:
+        backend: "ollama", "openai" эсвэл "replay"
+        hosts: Host-ууд (replay-д бичлэгийн файлууд)
+        record_path: Заасан бол chat() бүрийг энэ JSONL-д бичнэ
+
+    Raises:
+        ValueError: Үл мэдэгдэх backend
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Үл мэдэгдэх LLM_BACKEND: {backend} ({', '.join(BACKENDS)})")
+    client_class = BACKENDS[backend]
+    clients = [client_class(host) for host in (hosts or LLM_HOSTS)]
+    if record_path:
+        recorder = LLMRecorder(record_path)
+        clients = [RecordingClient(client, recorder) for client in clients]
+    return LLMRouter(clients)
+
+
+_llm_client: Optional[LLMRouter] = None
+_llm_client_lock = threading.Lock()
+
+
+def get_llm_client() -> LLMRouter:
+    """
+    Процесс даяар нэг client - summarizer, action extractor, model registry хуваалцана
+
+    Import үед биш, анх хэрэглэгдэхэд (компонент эхлүүлэхэд) үүснэ. Replay-ийн
+    бичлэг олдоогүй, бичлэгийн файл нээгдээгүй зэрэг алдаа процессыг унагахгүй,
+    компонентын readiness-д харагдана; дараагийн дуудлага дахин оролдоно.
+
+    Raises:
+        RuntimeError: Client үүсгэж чадаагүй бол
+    """
+    global _llm_client
+    if _llm_client is None:
+        with _llm_client_lock:
+            if _llm_client is None:
+                try:
+                    _llm_client = create_llm_client()
+                except (ValueError, OSError) as e:
+                    raise RuntimeError(f"❌ SLM client үүсгэж чадсангүй: {e}")
+    return _llm_client
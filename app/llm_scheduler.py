@@ -0,0 +1,74 @@
+"""
+SLM дуудлагын нийтлэг concurrency хязгаар
+
+Процесс доторх бүх async SLM дуудлага (formalize хэсэг бүр, retry,
+action extraction) нэг semaphore-оор дамжина. Ингэснээр олон хурал
+зэрэг боловсруулагдахад (batch, job, зэрэг хүсэлт) Ollama backend-д
+ирэх ачаалал түүний даах хэмжээнээс (OLLAMA_NUM_PARALLEL) хэтрэхгүй.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from .config import LLM_MAX_CONCURRENCY, LLM_HOSTS
+
+
+class LLMScheduler:
+    """
+    Async SLM дуудлагын slot хуваарилагч
+
+    Args:
+        max_concurrency: Зэрэг явах SLM дуудлагын дээд тоо
+    """
+
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max(1, max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Semaphore event loop-д холбогддог тул анх хэрэглэхэд үүсгэнэ
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    @asynccontextmanager
+    async def slot(self):
+        """
+        Нэг SLM дуудлагын slot авах
+
+        Жишээ:
+            async with llm_scheduler.slot():
+                response = await client.chat(...)
+        """
+        semaphore = self._get_semaphore()
+
+        self.waiting += 1
+        try:
+            await semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self.completed += 1
+            semaphore.release()
+
+    def stats(self) -> Dict:
+        """Одоогийн ачаалал"""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "completed": self.completed,
+        }
+
+
+# Процесс даяар нэг scheduler - host нэмэгдэхэд нийт хязгаар дагаж өснө
+llm_scheduler = LLMScheduler(LLM_MAX_CONCURRENCY * len(LLM_HOSTS))
@@ -1,20 +1,40 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from io import BytesIO
+from typing import Any, Callable, Optional
+
+from fastapi import FastAPI, Header, HTTPException, Request, Response
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 from datetime import date
 
 # Модулиуд import хийх
 from app.preprocess import clean_text, extract_entities
 
-# SLM-only imports
-try:
-    from app.summarizer import SLMOnlySummarizer
-    from app.action_extractor import SLMOnlyActionExtractor
-    SLM_AVAILABLE = True
-except ImportError as e:
-    SLM_AVAILABLE = False
-    SLM_ERROR = str(e)
-
-from app.exporter import export_enhanced_protocol
+from app.exporter import (
+    DOCX_MEDIA_TYPE, protocol_filename, protocol_path, render_protocol_docx, save_protocol_docx
+)
+from app.pipeline import PipelineGraph, StageError
+from app.jobs import JobManager, JobStore, DONE
+from app.config import (
+    JOBS_DB_PATH, JOB_WORKERS, JOB_READY_TIMEOUT, BATCH_MAX_ITEMS, BATCH_ITEM_CONCURRENCY,
+    UDPIPE_MODEL_PATH, SLM_WARM_CHECK_INTERVAL, RESULT_CACHE_ENABLED, RESULT_CACHE_DOCX,
+    COALESCE_ENABLED, LB_HEALTH_INTERVAL
+)
+from app.llm_scheduler import llm_scheduler
+from app.components import ComponentRegistry
+from app.model_registry import model_registry
+from app.llm_client import get_llm_client, llm_session
+from app.result_cache import cache_key, fingerprint, result_cache
+from app.coalesce import SingleFlight, IdempotencyStore, IdempotencyMismatch
+from app.admission import AdmissionRejected, admission
+from app import metrics
+from app.tracing import InMemoryExporter, tracer
+from app.tokens import token_estimator, track_usage
+from app.lexicon import lexicon
 
 app = FastAPI(
     title="Mongolian Protocol Generator",
@@ -22,28 +42,68 @@ app = FastAPI(
     version="2.0.0"
 )
 
-# NLP processor (optional)
-try:
+
+# Эдгээр замууд trace хийгдэхгүй (probe, scrape)
+UNTRACED_PATHS = ("/health", "/metrics", "/traces", "/cache")
+
+
+@app.middleware("http")
+async def trace_request(request: Request, call_next):
+    """
+    Хүсэлт бүрт root span нээх - pipeline, SLM дуудлагын span-ууд үүний дор
+    үүснэ. Trace id-г X-Trace-Id header-т буцаана.
+    
+    Streaming хариуны хувьд span хариу эхлэх хүртэлх хугацааг хамарна.
+    """
+    if not tracer.enabled or request.url.path.startswith(UNTRACED_PATHS):
+        return await call_next(request)
+    
+    with tracer.span(
+        "request",
+        method=request.method,
+        path=request.url.path,
+        client=_client_id(request)
+    ) as span:
+        response = await call_next(request)
+        span.set_attribute("status_code", response.status_code)
+        if response.status_code >= 500:
+            span.status = "error"
+    
+    response.headers["X-Trace-Id"] = span.trace_id
+    return response
+
+
+# ============================================
+# КОМПОНЕНТУУД (startup үед арын горимд, зэрэг эхэлнэ)
+# ============================================
+
+def _create_nlp_processor(deps: dict):
+    """NLP processor (optional) - байхгүй бол rule-based ашиглана"""
     from app.nlp_processor import MongolianNLPProcessor
-    nlp_processor = MongolianNLPProcessor("mn_model.udpipe")
-except:
-    nlp_processor = None
-    print("⚠️  UDPipe байхгүй, rule-based entity extraction ашиглана")
-
-# SLM компонентууд эхлүүлэх
-if not SLM_AVAILABLE:
-    print(f"❌ SLM модулиуд ачаалагдсангүй: {SLM_ERROR}")
-    summarizer = None
-    action_extractor = None
-else:
-    try:
-        summarizer = SLMOnlySummarizer(model="qwen2.5:7b")
-        action_extractor = SLMOnlyActionExtractor(nlp_processor)
-        print("✅ SLM систем бэлэн")
-    except RuntimeError as e:
-        print(f"❌ SLM эхлүүлэхэд алдаа: {e}")
-        summarizer = None
-        action_extractor = None
+    return MongolianNLPProcessor(UDPIPE_MODEL_PATH)
+
+
+def _create_summarizer(deps: dict):
+    from app.summarizer import SLMOnlySummarizer
+    return SLMOnlySummarizer(client=get_llm_client())
+
+
+def _create_action_extractor(deps: dict):
+    from app.action_extractor import SLMOnlyActionExtractor
+    return SLMOnlyActionExtractor(deps["nlp_processor"], client=get_llm_client())
+
+
+def _warm_up_model(deps: dict):
+    """Model-ийг урьдчилан санах ойд ачаалах (эхний хүсэлт reload хүлээхгүй)"""
+    model_registry.warm_up()
+    return model_registry
+
+
+components = ComponentRegistry()
+components.register("nlp_processor", _create_nlp_processor, required=False, retry=False)
+components.register("model", _warm_up_model)
+components.register("summarizer", _create_summarizer)
+components.register("action_extractor", _create_action_extractor, deps=["nlp_processor"])
 
 
 # Request model
@@ -51,6 +111,35 @@ class TextInput(BaseModel):
     text: str
     title: str = "Хурлын протокол"
     participants: list[str] = []
+    persist: bool = False  # DOCX-ийг диск дээр хадгалах эсэх
+    use_cache: bool = True  # Result cache ашиглах эсэх
+
+
+# Ижил зэрэг хүсэлтүүд ба Idempotency-Key
+single_flight = SingleFlight()
+idempotency_store = IdempotencyStore()
+
+
+def _request_fingerprint(input_data: TextInput) -> str:
+    """Хүсэлтийн агуулгын fingerprint (текстийн whitespace нормчилсон)"""
+    return fingerprint(
+        " ".join(input_data.text.split()),
+        input_data.title,
+        input_data.participants,
+        input_data.persist,
+        input_data.use_cache
+    )
+
+
+def _extract_entities(cleaned: str) -> list[str]:
+    """
+    Нэр илрүүлэх (UDPipe байвал UDPipe, үгүй бол regex) - CPU ажил
+    """
+    nlp_processor = components.get("nlp_processor")
+    if nlp_processor:
+        nlp_result = nlp_processor.process_text(cleaned)
+        return nlp_processor.extract_named_entities(nlp_result)
+    return extract_entities(cleaned)
 
 
 @app.get("/")
@@ -58,148 +147,443 @@ async def root():
     """
     API мэдээлэл
     """
+    ready = components.is_ready()
     return {
         "service": "Mongolian Protocol Generator",
         "version": "2.0.0",
         "mode": "SLM-only (No fallback)",
-        "slm_status": "ready" if summarizer else "not_ready",
-        "model": "qwen2.5:7b" if summarizer else None,
+        "slm_status": "ready" if ready else "not_ready",
+        "model": model_registry.model,
         "endpoints": {
             "generate": "/generate_protocol",
-            "health": "/health"
+            "docx": "/generate_protocol/docx",
+            "stream": "/generate_protocol/stream",
+            "batch": "/generate_protocols_batch",
+            "jobs": "/jobs",
+            "cache": "/cache/stats",
+            "metrics": "/metrics",
+            "traces": "/traces",
+            "health": "/health",
+            "live": "/health/live",
+            "ready": "/health/ready"
         }
     }
 
 
+SLM_SOLUTION = [
+    "1. Ollama суулгах: pip install ollama",
+    "2. Ollama server эхлүүлэх: ollama serve",
+    f"3. Model татах: ollama pull {model_registry.model}"
+]
+
+
+@app.get("/health/live")
+async def liveness():
+    """
+    Liveness - process амьд эсэх (ямар ч I/O хийхгүй)
+    """
+    return {"status": "alive"}
+
+
+@app.get("/health/ready")
+async def readiness():
+    """
+    Readiness - шаардлагатай бүх компонент бэлэн эсэх (үгүй бол 503)
+    """
+    ready = components.is_ready()
+    body = {
+        "status": "ready" if ready else "not_ready",
+        "components": components.status(),
+        "model": await model_registry.status()
+    }
+    
+    if ready:
+        return body
+    return JSONResponse(status_code=503, content=body)
+
+
+def _llm_client_stats() -> dict:
+    """SLM client-ийн төлөв - үүсгэж чадаагүй бол алдаа"""
+    try:
+        return get_llm_client().stats()
+    except RuntimeError as e:
+        return {"error": str(e)}
+
+
 @app.get("/health")
 async def health_check():
     """
     Системийн төлөв шалгах
     """
+    ready = components.is_ready()
     status = {
-        "status": "healthy" if summarizer else "unhealthy",
+        "status": "healthy" if ready else "unhealthy",
         "components": {
-            "ollama": summarizer is not None,
-            "summarizer": summarizer is not None,
-            "action_extractor": action_extractor is not None,
-            "nlp_processor": nlp_processor is not None
+            "ollama": components.get("summarizer") is not None,
+            "summarizer": components.get("summarizer") is not None,
+            "action_extractor": components.get("action_extractor") is not None,
+            "nlp_processor": components.get("nlp_processor") is not None
+        },
+        "details": components.status(),
+        "admission": admission.stats(),
+        "llm": {**llm_scheduler.stats(), "client": _llm_client_stats(), "tokens": token_estimator.stats()},
+        "lexicon": lexicon.stats(),
+        "requests": {
+            **single_flight.stats(),
+            "idempotency": idempotency_store.stats()
         }
     }
     
-    if not summarizer:
+    if not ready:
         status["error"] = "SLM ажиллахгүй байна"
-        status["solution"] = [
-            "1. Ollama суулгах: pip install ollama",
-            "2. Ollama server эхлүүлэх: ollama serve",
-            "3. Model татах: ollama pull qwen2.5:7b"
-        ]
+        status["solution"] = SLM_SOLUTION
     
     return status
 
 
-@app.post("/generate_protocol")
-async def generate_protocol(input_data: TextInput):
+@app.get("/metrics")
+async def prometheus_metrics():
     """
-    ҮНДСЭН ENDPOINT: Текстээс протокол үүсгэх (SLM-only)
-    
-    SLM ажиллахгүй бол 503 Service Unavailable буцаана
+    Prometheus metrics (алхмын latency, retry, JSON алдаа, Ollama token)
+    """
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/traces")
+async def list_traces(limit: int = 20):
+    """
+    Сүүлийн trace-ууд (memory exporter идэвхтэй үед)
+    """
+    exporter = tracer.get_exporter(InMemoryExporter)
+    if exporter is None:
+        raise HTTPException(status_code=404, detail="Memory trace exporter идэвхгүй (TRACE_EXPORTERS)")
+    return {"traces": exporter.recent_traces(limit)}
+
+
+@app.get("/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    """
+    Нэг trace-ийн бүх span (эхэлсэн дарааллаар)
     """
+    exporter = tracer.get_exporter(InMemoryExporter)
+    if exporter is None:
+        raise HTTPException(status_code=404, detail="Memory trace exporter идэвхгүй (TRACE_EXPORTERS)")
     
-    # SLM бэлэн эсэх шалгах
-    if not summarizer or not action_extractor:
-        raise HTTPException(
-            status_code=503,
-            detail={
-                "error": "SLM систем ажиллахгүй байна",
-                "message": "Ollama болон qwen2.5:7b model шаардлагатай",
-                "solution": [
-                    "1. Ollama суулгах: pip install ollama",
-                    "2. Terminal дээр: ollama serve",
-                    "3. Өөр terminal дээр: ollama pull qwen2.5:7b",
-                    "4. API дахин эхлүүлэх"
-                ]
-            }
+    spans = exporter.get_trace(trace_id)
+    if spans is None:
+        raise HTTPException(status_code=404, detail="Trace олдсонгүй")
+    return {"trace_id": trace_id, "spans": spans}
+
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """
+    Result cache-ийн hit/miss статистик
+    """
+    return result_cache.stats()
+
+
+# Алхмын нэр → HTTP алдааны мэдээлэл
+STAGE_ERRORS = {
+    "formalize": ("SLM албан хэл болгож чадсангүй", "formalization"),
+    "actions": ("SLM ажил үүрэг илрүүлж чадсангүй", "action_extraction"),
+}
+
+
+def _cache_key(cleaned: str) -> str:
+    """Цэвэрлэсэн текст + model + prompt, толийн fingerprint → result cache түлхүүр"""
+    summarizer = components.get("summarizer")
+    action_extractor = components.get("action_extractor")
+    return cache_key(
+        cleaned,
+        summarizer.model,
+        fingerprint(
+            summarizer.prompt_fingerprint(),
+            action_extractor.prompt_fingerprint(),
+            lexicon.fingerprint(),
+            components.get("nlp_processor") is not None
         )
+    )
+
+
+def _build_protocol_graph(
+    input_data: TextInput,
+    on_chunk: Optional[Callable[[int, int, str], None]] = None
+) -> PipelineGraph:
+    """
+    Протокол үүсгэх алхмуудын граф
+
+        clean ─ cache ─┬─ entities ──┐
+                       ├─ formalize ─┼─ protocol ─ export ─ cache_store
+                       └─ actions ───┘
     
-    try:
-        # 1. Цэвэрлэх
+    entities, formalize, actions нь бие биеэсээ хамааралгүй тул зэрэг явна.
+    Cache-д байвал (ижил текст, model, prompt) SLM дуудлага хийгдэхгүй.
+    """
+    use_cache = RESULT_CACHE_ENABLED and input_data.use_cache
+    
+    async def clean(results):
         print(f"1️⃣  Текст цэвэрлэж байна...")
-        cleaned = clean_text(input_data.text)
-        
-        # 2. Нэр илрүүлэх
+        return await asyncio.to_thread(clean_text, input_data.text)
+    
+    async def cache(results):
+        if not use_cache:
+            return {"key": None, "entry": None, "tier": None}
+        key = _cache_key(results["clean"])
+        entry, tier = await asyncio.to_thread(result_cache.get, key)
+        if entry:
+            print(f"⚡ Cache hit ({tier})")
+        return {"key": key, "entry": entry, "tier": tier}
+    
+    async def entities(results):
+        cached = results["cache"]["entry"]
+        if cached:
+            return cached["entities"]
         print(f"2️⃣  Нэр илрүүлж байна...")
-        if nlp_processor:
-            nlp_result = nlp_processor.process_text(cleaned)
-            entities = nlp_processor.extract_named_entities(nlp_result)
-        else:
-            entities = extract_entities(cleaned)
-        
-        # 3. SLM: Албан хэлбэрт хөрвүүлэх
+        return await asyncio.to_thread(_extract_entities, results["clean"])
+    
+    async def formalize(results):
+        cached = results["cache"]["entry"]
+        if cached:
+            if on_chunk:
+                on_chunk(1, 1, cached["body"])
+            return cached["body"]
         print(f"3️⃣  SLM ашиглан албан хэл болгож байна...")
-        try:
-            formalized = summarizer.formalize_text(cleaned)
-        except RuntimeError as e:
-            raise HTTPException(
-                status_code=500,
-                detail={
-                    "error": "SLM албан хэл болгож чадсангүй",
-                    "message": str(e),
-                    "step": "formalization"
-                }
-            )
-        
-        # 4. SLM: Action items гаргах
+        return await components.get("summarizer").aformalize_text(results["clean"], on_chunk=on_chunk)
+    
+    async def actions(results):
+        cached = results["cache"]["entry"]
+        if cached:
+            return cached["action_items"]
         print(f"4️⃣  SLM ашиглан ажил үүрэг илрүүлж байна...")
-        try:
-            actions = action_extractor.extract_actions_with_llm(cleaned)
-        except RuntimeError as e:
-            raise HTTPException(
-                status_code=500,
-                detail={
-                    "error": "SLM ажил үүрэг илрүүлж чадсангүй",
-                    "message": str(e),
-                    "step": "action_extraction"
-                }
-            )
-        
-        # 5. Протокол бүтэц
+        return await components.get("action_extractor").aextract_actions_with_llm(results["clean"])
+    
+    async def protocol(results):
         print(f"5️⃣  Протокол бүтэц үүсгэж байна...")
-        protocol = {
+        return {
             "title": input_data.title,
             "date": str(date.today()),
-            "participants": input_data.participants or entities,
-            "body": formalized,
-            "action_items": actions,
-            "entities": entities,
+            "participants": input_data.participants or results["entities"],
+            "body": results["formalize"],
+            "action_items": results["actions"],
+            "entities": results["entities"],
             "metadata": {
                 "original_length": len(input_data.text),
-                "processed_length": len(formalized),
-                "model": "qwen2.5:7b",
+                "processed_length": len(results["formalize"]),
+                "model": model_registry.model,
                 "mode": "SLM-only"
             }
         }
+    
+    async def export(results):
+        # Ижил протоколын DOCX cache-д байвал дахин render хийхгүй
+        docx_key = fingerprint(results["protocol"])
+        cached = results["cache"]["entry"]
         
-        # 6. DOCX үүсгэх
-        print(f"6️⃣  DOCX файл үүсгэж байна...")
-        filename = export_enhanced_protocol(protocol)
+        if cached and cached.get("docx_key") == docx_key:
+            docx = cached["docx"]
+        else:
+            print(f"6️⃣  DOCX файл үүсгэж байна...")
+            docx = await asyncio.to_thread(render_protocol_docx, results["protocol"])
         
-        print(f"✅ Амжилттай!")
+        filename = None
+        if input_data.persist:
+            filename = await asyncio.to_thread(save_protocol_docx, docx)
+        return {"docx": docx, "docx_key": docx_key, "file": filename, "size": len(docx)}
+    
+    async def cache_store(results):
+        key = results["cache"]["key"]
+        cached = results["cache"]["entry"]
+        export = results["export"]
         
-        return {
-            "success": True,
-            "file": filename,
-            "protocol": protocol,
-            "stats": {
-                "original_length": len(input_data.text),
-                "formalized_length": len(formalized),
-                "entities_found": len(entities),
-                "actions_found": len(actions),
-                "processing_mode": "SLM-only"
-            }
+        if not key or (cached and cached.get("docx_key") == export["docx_key"]):
+            return False
+        
+        entry = {
+            "body": results["formalize"],
+            "action_items": results["actions"],
+            "entities": results["entities"],
         }
+        if RESULT_CACHE_DOCX:
+            entry["docx_key"] = export["docx_key"]
+            entry["docx"] = export["docx"]
         
+        await asyncio.to_thread(result_cache.put, key, entry)
+        return True
+    
+    graph = PipelineGraph()
+    graph.add("clean", clean)
+    graph.add("cache", cache, deps=["clean"])
+    graph.add("entities", entities, deps=["cache"])
+    graph.add("formalize", formalize, deps=["cache"])
+    graph.add("actions", actions, deps=["cache"])
+    graph.add("protocol", protocol, deps=["entities", "formalize", "actions"])
+    graph.add("export", export, deps=["protocol"])
+    graph.add("cache_store", cache_store, deps=["export"])
+    return graph
+
+
+def _stage_http_error(e: StageError) -> HTTPException:
+    """StageError-ийг HTTP 500 болгох"""
+    if e.stage in STAGE_ERRORS and isinstance(e.original, RuntimeError):
+        error, step = STAGE_ERRORS[e.stage]
+        return HTTPException(
+            status_code=500,
+            detail={
+                "error": error,
+                "message": str(e.original),
+                "step": step
+            }
+        )
+    
+    return HTTPException(
+        status_code=500,
+        detail={
+            "error": "Протокол үүсгэхэд алдаа гарлаа",
+            "message": str(e.original),
+            "type": type(e.original).__name__,
+            "step": e.stage
+        }
+    )
+
+
+def _require_slm():
+    """SLM бэлэн эсэх шалгах - үгүй бол 503"""
+    if not components.is_ready():
+        raise HTTPException(
+            status_code=503,
+            detail={
+                "error": "SLM систем ажиллахгүй байна",
+                "message": f"Ollama болон {model_registry.model} model шаардлагатай",
+                "components": components.status(),
+                "solution": [
+                    "1. Ollama суулгах: pip install ollama",
+                    "2. Terminal дээр: ollama serve",
+                    f"3. Өөр terminal дээр: ollama pull {model_registry.model}",
+                    "4. API дахин эхлүүлэх"
+                ]
+            }
+        )
+
+
+def _client_id(request: Request) -> str:
+    """Client ялгах түлхүүр (X-Client-Id header, үгүй бол IP)"""
+    client_id = request.headers.get("x-client-id")
+    if client_id:
+        return client_id
+    return request.client.host if request.client else "anonymous"
+
+
+def _admission_http_error(e: AdmissionRejected) -> HTTPException:
+    """AdmissionRejected-ийг 429/503 + Retry-After болгох"""
+    messages = {
+        "rate_limited": "Хүсэлтийн хязгаар хэтэрсэн",
+        "queue_full": "Сервер ачаалал ихтэй - дараалал дүүрсэн",
+        "queue_timeout": "Сервер ачаалал ихтэй - дараалалд хэт удаан хүлээсэн",
+    }
+    return HTTPException(
+        status_code=e.status_code,
+        detail={
+            "error": messages[e.reason],
+            "reason": e.reason,
+            "retry_after": e.retry_after
+        },
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+
+async def _acquire_admission(request: Request, cost: int = 1):
+    """
+    Pipeline эхлүүлэх эрх авах - дүүрсэн бол HTTPException (429/503)
+    
+    Амжилттай бол дуусахад admission.release() заавал дуудна.
+    """
+    try:
+        await admission.acquire(_client_id(request), cost)
+    except AdmissionRejected as e:
+        raise _admission_http_error(e)
+
+
+def _check_rate(request: Request, cost: int = 1):
+    """Client-ийн хязгаар шалгах - хэтэрсэн бол HTTPException (429)"""
+    try:
+        admission.check_rate(_client_id(request), cost)
+    except AdmissionRejected as e:
+        raise _admission_http_error(e)
+
+
+@asynccontextmanager
+async def _admission_slot():
+    """
+    Admission slot дотор ажиллуулах (client-ийн хязгаарыг endpoint шалгана)
+    
+    Жишээ:
+        async with _admission_slot():
+            results, timings = await _execute_protocol(input_data)
+    """
+    try:
+        await admission.acquire_slot()
+    except AdmissionRejected as e:
+        raise _admission_http_error(e)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        admission.release(time.perf_counter() - started)
+
+
+@app.post("/generate_protocol")
+async def generate_protocol(
+    input_data: TextInput,
+    request: Request,
+    response: Response,
+    idempotency_key: Optional[str] = Header(None)
+):
+    """
+    ҮНДСЭН ENDPOINT: Текстээс протокол үүсгэх (SLM-only)
+    
+    SLM дуудлага async client-аар, CPU ажил (цэвэрлэх, UDPipe, DOCX)
+    thread pool дээр явна - event loop (/health) блоклогдохгүй.
+    Хамааралгүй алхмууд (entities, formalize, actions) зэрэг ажиллана.
+    
+    Ижил хүсэлт боловсруулагдаж байвал түүний үр дүнг хүлээнэ.
+    Idempotency-Key header-тэй дууссан хүсэлтийг давтвал хадгалсан
+    хариуг дахин боловсруулахгүй буцаана (Idempotent-Replayed: true).
+    
+    SLM ажиллахгүй бол 503 Service Unavailable буцаана
+    Ачаалал ихтэй бол 503, client хязгаар хэтэрсэн бол 429 (Retry-After)
+    """
+    
+    request_fp = _request_fingerprint(input_data)
+    
+    if idempotency_key:
+        try:
+            stored = idempotency_store.get(idempotency_key, request_fp)
+        except IdempotencyMismatch as e:
+            raise HTTPException(
+                status_code=422,
+                detail={
+                    "error": "Idempotency-Key давхцсан",
+                    "message": str(e)
+                }
+            )
+        if stored is not None:
+            response.headers["Idempotent-Replayed"] = "true"
+            return stored
+    
+    _require_slm()
+    
+    _check_rate(request)
+    
+    try:
+        result = await _run_protocol(input_data)
+        if idempotency_key:
+            idempotency_store.put(idempotency_key, request_fp, result)
+        return result
+    except StageError as e:
+        raise _stage_http_error(e)
     except HTTPException:
-        raise  # HTTP алдааг дахин шидэх
+        raise
     except Exception as e:
         # Бусад алдаа
         raise HTTPException(
@@ -212,11 +596,476 @@ async def generate_protocol(input_data: TextInput):
         )
 
 
+async def _execute_protocol(
+    input_data: TextInput,
+    on_chunk: Optional[Callable[[int, int, str], None]] = None,
+    on_stage: Optional[Callable[[str, float, Any], None]] = None
+) -> tuple[dict, dict]:
+    """
+    Протокол үүсгэх графыг ажиллуулах
+    
+    Returns:
+        (алхам бүрийн үр дүн, timings_ms)
+    
+    Raises:
+        StageError: Аль нэг алхам амжилтгүй бол
+    """
+    try:
+        with tracer.span(
+            "pipeline",
+            text_length=len(input_data.text),
+            participants=len(input_data.participants),
+            persist=input_data.persist,
+            use_cache=input_data.use_cache
+        ), track_usage() as usage, llm_session():
+            results, timings = await _build_protocol_graph(input_data, on_chunk).run(on_stage=on_stage)
+    except BaseException:
+        metrics.pipelines_total.inc(status="error")
+        raise
+    
+    metrics.pipelines_total.inc(status="success")
+    results["tokens"] = usage.to_dict()
+    for stage, elapsed_ms in timings.items():
+        metrics.stage_duration.observe(elapsed_ms / 1000, stage=stage)
+    
+    print(f"✅ Амжилттай! ({timings})")
+    return results, timings
+
+
+async def _execute_shared(input_data: TextInput) -> tuple[dict, dict, bool]:
+    """
+    Ижил хүсэлт аль хэдийн явж байвал шинээр эхлүүлэлгүй түүний үр дүнг хүлээх
+    
+    Admission slot-ийг зөвхөн гүйцэтгэж буй (анхны) хүсэлт эзэлнэ - нэгтгэгдсэн
+    хүсэлтүүд slot-гүй хүлээнэ, давтан илгээлт ADMISSION_MAX_IN_FLIGHT-ийг дүүргэхгүй.
+    
+    Returns:
+        (алхам бүрийн үр дүн, timings_ms, нэгтгэгдсэн эсэх)
+    
+    Raises:
+        HTTPException: Admission дараалал дүүрсэн бол (503)
+    """
+    async def execute():
+        async with _admission_slot():
+            return await _execute_protocol(input_data)
+    
+    if not COALESCE_ENABLED:
+        results, timings = await execute()
+        return results, timings, False
+    
+    (results, timings), shared = await single_flight.do(
+        _request_fingerprint(input_data),
+        execute
+    )
+    if shared:
+        print(f"🔗 Ижил хүсэлт явж байсан - үр дүнг хуваалцлаа")
+        # Pipeline-ийн span-ууд эхлүүлсэн хүсэлтийн trace-д байгаа
+        span = tracer.current_span()
+        if span:
+            span.set_attribute("coalesced", True)
+    return results, timings, shared
+
+
+def _file_url(filename: Optional[str]) -> Optional[str]:
+    """Хадгалсан DOCX-ийг татах холбоос (persist=false бол None)"""
+    return f"/files/{filename}" if filename else None
+
+
+def _protocol_response(
+    input_data: TextInput,
+    results: dict,
+    timings: dict,
+    coalesced: bool = False
+) -> dict:
+    """API хариу бүрдүүлэх"""
+    return {
+        "success": True,
+        "file": results["export"]["file"],
+        "file_url": _file_url(results["export"]["file"]),
+        "protocol": results["protocol"],
+        "stats": {
+            "original_length": len(input_data.text),
+            "formalized_length": len(results["formalize"]),
+            "entities_found": len(results["entities"]),
+            "actions_found": len(results["actions"]),
+            "docx_size": results["export"]["size"],
+            "processing_mode": "SLM-only",
+            "cache": {
+                "hit": results["cache"]["entry"] is not None,
+                "tier": results["cache"]["tier"],
+                "key": results["cache"]["key"]
+            },
+            "coalesced": coalesced,
+            "trace_id": tracer.current_trace_id(),
+            "timings_ms": timings,
+            "tokens": results.get("tokens")
+        }
+    }
+
+
+async def _run_protocol(
+    input_data: TextInput,
+    on_chunk: Optional[Callable[[int, int, str], None]] = None,
+    on_stage: Optional[Callable[[str, float, Any], None]] = None
+) -> dict:
+    """
+    Протокол үүсгэж API хариу буцаах
+    
+    Callback-гүй хүсэлтүүд (progress шаардахгүй) ижил хүсэлттэйгээ нэгтгэгдэж,
+    admission slot-оо өөрсдөө авна. Callback-тай үед slot-ийг дуудагч эзэмшинэ.
+    
+    Raises:
+        StageError: Аль нэг алхам амжилтгүй бол
+    """
+    if on_chunk is None and on_stage is None:
+        results, timings, coalesced = await _execute_shared(input_data)
+        return _protocol_response(input_data, results, timings, coalesced)
+    
+    results, timings = await _execute_protocol(input_data, on_chunk, on_stage)
+    return _protocol_response(input_data, results, timings)
+
+
+@app.post("/generate_protocol/docx")
+async def generate_protocol_docx(input_data: TextInput, request: Request):
+    """
+    Протокол үүсгээд DOCX-ийг шууд татуулах
+    
+    DOCX санах ойд үүсгэгдэж stream хэлбэрээр буцна (persist=true үед
+    л диск дээр хадгална).
+    """
+    _require_slm()
+    
+    _check_rate(request)
+    
+    try:
+        results, _, _ = await _execute_shared(input_data)
+    except StageError as e:
+        raise _stage_http_error(e)
+    
+    export = results["export"]
+    filename = export["file"] or protocol_filename()
+    
+    return StreamingResponse(
+        BytesIO(export["docx"]),
+        media_type=DOCX_MEDIA_TYPE,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Content-Length": str(export["size"]),
+            "X-Actions-Found": str(len(results["actions"]))
+        }
+    )
+
+
+# ============================================
+# STREAMING (SSE / NDJSON)
+# ============================================
+
+def _format_event(event: str, data: dict, fmt: str) -> str:
+    """Event-ийг SSE эсвэл NDJSON мөр болгох"""
+    if fmt == "ndjson":
+        return json.dumps({"event": event, "data": data}, ensure_ascii=False) + "\n"
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/generate_protocol/stream")
+async def generate_protocol_stream(input_data: TextInput, request: Request, format: str = "sse"):
+    """
+    /generate_protocol-ийн streaming хувилбар
+    
+    Бэлэн болмогц дараах event-үүдийг илгээнэ:
+        chunk   - албан болгосон хэсэг бүр (index, total, text)
+        entities, actions - тухайн алхам дуусахад
+        file    - DOCX хэмжээ, файлын нэр, татах холбоос (/files/{нэр})
+        done    - бүтэн хариу (/generate_protocol-той ижил)
+        error   - алдаа гарвал
+    
+    format: "sse" (text/event-stream) эсвэл "ndjson"
+    """
+    if format not in ("sse", "ndjson"):
+        raise HTTPException(status_code=400, detail="format: 'sse' эсвэл 'ndjson'")
+    
+    _require_slm()
+    
+    # Stream-ийн file event татах холбоос өгөх ёстой - DOCX-ийг заавал хадгална
+    input_data = input_data.model_copy(update={"persist": True})
+    
+    # Admission slot stream дуустал (эсвэл client салтал) эзэмшигдэнэ. Татгалзвал
+    # 429/503 буцаахын тулд body эхлэхээс өмнө авна
+    await _acquire_admission(request)
+    admitted_at = time.perf_counter()
+    released = False
+    
+    def release():
+        # Generator-ийн finally ба response-ийн background хоёулаа дуудна - body
+        # эхлээгүй (client эрт салсан) үед generator-ийн finally ажиллахгүй
+        nonlocal released
+        if not released:
+            released = True
+            admission.release(time.perf_counter() - admitted_at)
+    
+    queue: asyncio.Queue = asyncio.Queue()
+    
+    def on_chunk(done: int, total: int, formalized: str):
+        queue.put_nowait(("chunk", {"index": done, "total": total, "text": formalized}))
+    
+    def on_stage(name: str, elapsed_ms: float, result: Any):
+        if name == "entities":
+            queue.put_nowait(("entities", {"entities": result, "elapsed_ms": elapsed_ms}))
+        elif name == "actions":
+            queue.put_nowait(("actions", {"action_items": result, "elapsed_ms": elapsed_ms}))
+        elif name == "export":
+            queue.put_nowait(("file", {
+                "file": result["file"],
+                "url": _file_url(result["file"]),
+                "size": result["size"],
+                "elapsed_ms": elapsed_ms
+            }))
+    
+    async def run():
+        try:
+            response = await _run_protocol(input_data, on_chunk, on_stage)
+            queue.put_nowait(("done", response))
+        except StageError as e:
+            queue.put_nowait(("error", _stage_http_error(e).detail))
+        except Exception as e:
+            queue.put_nowait(("error", {
+                "error": "Протокол үүсгэхэд алдаа гарлаа",
+                "message": str(e),
+                "type": type(e).__name__
+            }))
+        finally:
+            queue.put_nowait(None)
+    
+    async def events():
+        task = asyncio.create_task(run())
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                yield _format_event(item[0], item[1], format)
+        finally:
+            # Client салсан бол pipeline-ийг зогсоох
+            if not task.done():
+                task.cancel()
+            release()
+    
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson" if format == "ndjson" else "text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(release)
+    )
+
+
+# ============================================
+# BATCH API
+# ============================================
+
+@app.post("/generate_protocols_batch")
+async def generate_protocols_batch(items: list[TextInput], request: Request):
+    """
+    Олон хурлын протоколыг нэг дор үүсгэх
+    
+    Бүх хурлын хэсэг (chunk) бүрийн SLM дуудлага нэг нийтлэг хязгаар
+    (LLM_MAX_CONCURRENCY) дор ээлжлэн явна. Нэг хурал амжилтгүй болсон ч
+    бусад нь үргэлжилнэ - үр дүн, алдаа хурал бүрээр буцна.
+    
+    Хурал бүр өөрийн admission slot эзэлнэ (ADMISSION_MAX_IN_FLIGHT-ийг
+    batch ч хэтрүүлэхгүй, ижил хурлууд нэг slot хуваалцана). Client-ийн
+    хязгаараас хурал бүрт нэг token хасагдана: эхнийх нь шууд (token байхгүй
+    бол batch бүхэлдээ 429), бусад нь хурал эхлэх бүрт - token дууссан бол
+    хуримтлагдтал хүлээнэ. Slot эсвэл token авч чадаагүй хурал алдаатай буцна.
+    """
+    _require_slm()
+    
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch хэт том: {len(items)} > {BATCH_MAX_ITEMS}"
+        )
+    
+    client = _client_id(request)
+    _check_rate(request)
+    
+    item_slots = asyncio.Semaphore(BATCH_ITEM_CONCURRENCY)
+    started = time.perf_counter()
+    
+    async def run_item(index: int, input_data: TextInput) -> dict:
+        async with item_slots:
+            if index > 0:
+                try:
+                    await admission.wait_rate(client)
+                except AdmissionRejected as e:
+                    return {"index": index, "success": False, "error": _admission_http_error(e).detail}
+            try:
+                response = await _run_protocol(input_data)
+                return {"index": index, **response}
+            except StageError as e:
+                return {"index": index, "success": False, "error": _stage_http_error(e).detail}
+            except HTTPException as e:
+                # Admission slot авч чадаагүй
+                return {"index": index, "success": False, "error": e.detail}
+            except Exception as e:
+                return {
+                    "index": index,
+                    "success": False,
+                    "error": {
+                        "error": "Протокол үүсгэхэд алдаа гарлаа",
+                        "message": str(e),
+                        "type": type(e).__name__
+                    }
+                }
+    
+    results = await asyncio.gather(*(run_item(i, item) for i, item in enumerate(items)))
+    
+    succeeded = sum(1 for r in results if r["success"])
+    elapsed = time.perf_counter() - started
+    
+    return {
+        "success": succeeded == len(results),
+        "total": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results,
+        "stats": {
+            "elapsed_ms": round(elapsed * 1000, 1),
+            "protocols_per_minute": round(len(results) / elapsed * 60, 2) if elapsed > 0 else None,
+            "llm": llm_scheduler.stats(),
+            "admission": admission.stats()
+        }
+    }
+
+
+# ============================================
+# ASYNC JOB API
+# ============================================
+
+job_manager: Optional[JobManager] = None
+
+
+async def _run_job(job_id: str, request: dict, on_progress: Callable[[dict], None]) -> dict:
+    """
+    Job runner - протокол үүсгэж, хэсэг/алхам бүрийн явцыг мэдээлнэ
+    """
+    # Server дахин эхлэхэд Ollama хараахан асаагүй байж болно - registry дахин
+    # оролдож байх хооронд (JOB_READY_TIMEOUT хүртэл) хүлээнэ, job-ийг шууд
+    # FAILED болгохгүй. Хугацаа дуусвал RUNNING-ээр үүрд үлдэхгүй, алдаатай дуусна
+    if not await components.wait_ready(JOB_READY_TIMEOUT, until_ready=True):
+        failed = {
+            name: s["error"] or s["state"] for name, s in components.status().items()
+            if s["required"] and s["state"] != "ready"
+        }
+        raise RuntimeError(f"SLM компонентууд {JOB_READY_TIMEOUT:.0f}с-д бэлэн болсонгүй: {failed}")
+    
+    stages_done = []
+    
+    def on_chunk(done: int, total: int, formalized: str):
+        on_progress({"chunks_done": done, "chunks_total": total})
+    
+    def on_stage(name: str, elapsed_ms: float, result: Any):
+        stages_done.append(name)
+        on_progress({"stages_done": list(stages_done)})
+    
+    # /jobs/{id}/file-д зориулж DOCX-ийг заавал хадгална
+    input_data = TextInput(**{**request, "persist": True})
+    
+    try:
+        return await _run_protocol(input_data, on_chunk, on_stage)
+    except StageError as e:
+        raise RuntimeError(f"{e.stage}: {e.original}") from e
+
+
+@app.post("/jobs", status_code=202)
+async def create_job(input_data: TextInput, request: Request):
+    """
+    Протокол үүсгэх job үүсгэх - job id нэн даруй буцаана
+    
+    Job-ууд JOB_WORKERS-ээр хязгаарлагдсан тул зөвхөн client-ийн
+    хязгаар (429) шалгана.
+    """
+    try:
+        admission.check_rate(_client_id(request))
+    except AdmissionRejected as e:
+        raise _admission_http_error(e)
+    
+    job_id = await job_manager.submit(input_data.model_dump())
+    
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "links": {
+            "status": f"/jobs/{job_id}",
+            "file": f"/jobs/{job_id}/file"
+        }
+    }
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """
+    Job-ийн төлөв, явц (chunks_done/chunks_total), эцсийн протокол
+    """
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job олдсонгүй")
+    
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "queue_position": job["queue_position"],
+        "progress": job["progress"] or {},
+        "result": job["result"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"]
+    }
+
+
+@app.get("/jobs/{job_id}/file")
+async def get_job_file(job_id: str):
+    """
+    Дууссан job-ийн DOCX файл
+    """
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job олдсонгүй")
+    
+    if job["status"] != DONE or not job["file"]:
+        raise HTTPException(
+            status_code=409,
+            detail={"error": "Job дуусаагүй байна", "status": job["status"]}
+        )
+    
+    path = protocol_path(job["file"])
+    if not path.exists():
+        raise HTTPException(status_code=410, detail="DOCX файл устсан байна")
+    
+    return FileResponse(path, media_type=DOCX_MEDIA_TYPE, filename=path.name)
+
+
+@app.get("/files/{filename}")
+async def get_file(filename: str):
+    """
+    persist=true-гээр (stream, job) хадгалсан DOCX файл татах
+    """
+    try:
+        path = protocol_path(filename)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Файл олдсонгүй")
+    
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="Файл олдсонгүй")
+    
+    return FileResponse(path, media_type=DOCX_MEDIA_TYPE, filename=path.name)
+
+
 @app.post("/test_slm")
 async def test_slm():
     """
     SLM тестлэх endpoint
     """
+    summarizer = components.get("summarizer")
     if not summarizer:
         raise HTTPException(
             status_code=503,
@@ -226,13 +1075,13 @@ async def test_slm():
     test_text = "Би энэ ажлыг хийх болно шүү дээ."
     
     try:
-        result = summarizer.formalize_text(test_text)
+        result = await summarizer.aformalize_text(test_text)
         
         return {
             "success": True,
             "test_input": test_text,
             "test_output": result,
-            "model": "qwen2.5:7b"
+            "model": summarizer.model
         }
     except RuntimeError as e:
         raise HTTPException(
@@ -244,27 +1093,68 @@ async def test_slm():
         )
 
 
+keep_warm_task: Optional[asyncio.Task] = None
+health_check_task: Optional[asyncio.Task] = None
+
+
 # Startup event
 @app.on_event("startup")
 async def startup_event():
     """
     Server эхлэхэд
     """
+    global job_manager
+    
+    # Компонентууд арын горимд эхэлнэ - startup-ийг хүлээлгэхгүй
+    components.start()
+    
+    # Idle-ийн дараа model буусан бол дахин ачаалах
+    global keep_warm_task
+    if SLM_WARM_CHECK_INTERVAL > 0:
+        keep_warm_task = asyncio.create_task(model_registry.keep_warm_loop())
+    
+    # Олон SLM host-ийн health check (унасан host-ийг хасах, сэргэсэн бол буцаах)
+    global health_check_task
+    try:
+        llm_client = get_llm_client()
+    except RuntimeError as e:
+        # Компонентууд эхлэхдээ дахин оролдож, readiness-д алдааг харуулна
+        llm_client = None
+        print(f"⚠️  {e}")
+    if llm_client and len(llm_client.hosts()) > 1 and LB_HEALTH_INTERVAL > 0:
+        health_check_task = asyncio.create_task(llm_client.health_check_loop())
+    
+    job_manager = JobManager(JobStore(JOBS_DB_PATH), _run_job, JOB_WORKERS)
+    await job_manager.start()
+    
     print("\n" + "="*60)
     print("MONGOLIAN PROTOCOL GENERATOR API")
     print("="*60)
     print(f"Mode: SLM-only (No fallback)")
-    print(f"Model: qwen2.5:7b")
+    print(f"Model: {model_registry.model} (keep_alive={model_registry.keep_alive})")
+    if llm_client:
+        print(f"SLM backend: {llm_client.stats()['backend']}")
+        print(f"SLM hosts: {', '.join(s['host'] for s in llm_client.stats()['hosts'])}")
+    print(f"Status: ⏳ Компонентууд арын горимд эхэлж байна (/health/ready)")
+    print("="*60 + "\n")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    Server зогсоход - job worker, компонент эхлүүлэгчийг зогсоох
+    """
+    if job_manager:
+        await job_manager.stop()
+        job_manager.store.close()
     
-    if summarizer:
-        print(f"Status: ✅ Бэлэн")
-    else:
-        print(f"Status: ❌ SLM ажиллахгүй")
-        print(f"\nШалгах:")
-        print(f"  1. ollama serve")
-        print(f"  2. ollama pull qwen2.5:7b")
+    await components.stop()
     
-    print("="*60 + "\n")
+    if keep_warm_task:
+        keep_warm_task.cancel()
+    
+    if health_check_task:
+        health_check_task.cancel()
 
 
 # Error handlers
@@ -0,0 +1,316 @@
+"""
+Prometheus metrics (/metrics)
+
+Нэмэлт сан шаардахгүй жижиг registry - Counter, Histogram-ийг
+Prometheus text exposition (0.0.4) форматаар гаргана.
+
+    stage_duration   - алхам бүрийн latency (clean, entities, formalize,
+                       retry, spell_check, actions, export, ...)
+    meaning_check_failures, conservative_retries, segment_retries, chunk_retries
+    action_json_parse_failures
+    ollama_*         - Ollama хариу бүрийн prompt_eval_count, eval_count,
+                       eval_duration
+    ollama_prefill_seconds - дуудлага бүрийн prompt боловсруулсан хугацаа;
+                       session_call="later" нь prompt cache-ийн үр дүнг харуулна
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Prometheus text format-ийн content type
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Секундын bucket-ууд - SLM алхам хэдэн секундээс хэдэн минут хүртэл үргэлжилнэ
+DEFAULT_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Label-тай metric-ийн суурь"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name}: label {self.labelnames} шаардлагатай, {tuple(labels)} ирсэн")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+
+class Counter(_Metric):
+    """Зөвхөн өсдөг тоолуур"""
+
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        if amount < 0:
+            raise ValueError("Counter зөвхөн өснө")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            if not self.labelnames and not self._values:
+                lines.append(f"{self.name} 0")
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Latency histogram (cumulative bucket, sum, count)"""
+
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Iterable[float] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * len(self.buckets), [0.0]))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            total[0] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """
+        Жишээ:
+            with stage_duration.time(stage="spell_check"):
+                ...
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def totals(self) -> Dict[Tuple[str, ...], Tuple[int, float]]:
+        """Label бүрийн (count, sum) - benchmark-д хоёр агшны зөрүүг авна"""
+        with self._lock:
+            return {key: (counts[-1], total[0]) for key, (counts, total) in self._values.items()}
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, counts):
+                    le = 'le="' + _format_value(bound) + '"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {count}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(total[0])}")
+                lines.append(f"{self.name}_count{labels} {counts[-1]}")
+        return lines
+
+
+class Registry:
+    """Metric-үүдийн бүртгэл"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' аль хэдийн бүртгэгдсэн")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets=buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition"""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# ---------- Pipeline ----------
+
+stage_duration = registry.histogram(
+    "protocol_stage_duration_seconds",
+    "Протокол үүсгэх алхам бүрийн хугацаа",
+    ["stage"]
+)
+pipelines_total = registry.counter(
+    "protocol_pipelines_total",
+    "Ажилласан pipeline-ийн тоо",
+    ["status"]
+)
+meaning_check_failures = registry.counter(
+    "protocol_meaning_check_failures_total",
+    "_check_meaning_preserved шалгалтад унасан SLM хариу"
+)
+conservative_retries = registry.counter(
+    "protocol_conservative_retries_total",
+    "Консерватив retry (outcome: accepted, rejected, error)",
+    ["outcome"]
+)
+segment_retries = registry.counter(
+    "protocol_segment_retries_total",
+    "Утга алдсан ярианы ээлжийг дангаар нь дахин үүсгэсэн (outcome: accepted, rejected, error)",
+    ["outcome"]
+)
+chunk_retries = registry.counter(
+    "protocol_chunk_retries_total",
+    "Урт текстийн хэсгийг SLM алдааны дараа дахин оролдсон (outcome: recovered, failed)",
+    ["outcome"]
+)
+action_json_parse_failures = registry.counter(
+    "protocol_action_json_parse_failures_total",
+    "Action extraction-ийн SLM хариунаас JSON гаргаж чадаагүй"
+)
+
+# ---------- Ollama ----------
+
+ollama_requests = registry.counter(
+    "ollama_requests_total",
+    "Ollama chat дуудлага",
+    ["model", "operation"]
+)
+ollama_prompt_tokens = registry.counter(
+    "ollama_prompt_tokens_total",
+    "Prompt token (prompt_eval_count)",
+    ["model", "operation"]
+)
+ollama_completion_tokens = registry.counter(
+    "ollama_completion_tokens_total",
+    "Үүсгэсэн token (eval_count)",
+    ["model", "operation"]
+)
+ollama_prompt_eval_seconds = registry.counter(
+    "ollama_prompt_eval_seconds_total",
+    "Prompt боловсруулсан хугацаа (prompt_eval_duration)",
+    ["model", "operation"]
+)
+ollama_eval_seconds = registry.counter(
+    "ollama_eval_seconds_total",
+    "Token үүсгэсэн хугацаа (eval_duration)",
+    ["model", "operation"]
+)
+ollama_request_duration = registry.histogram(
+    "ollama_request_duration_seconds",
+    "Ollama chat дуудлагын нийт хугацаа (client талаас)",
+    ["model", "operation"]
+)
+ollama_prefill_duration = registry.histogram(
+    "ollama_prefill_seconds",
+    "Дуудлага бүрийн prompt боловсруулсан хугацаа "
+    "(session_call: first - хурлын эхний дуудлага, later - prefix нь cache-д байж болох, none)",
+    ["model", "operation", "session_call"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+ollama_cached_prompt_tokens = registry.counter(
+    "ollama_cached_prompt_tokens_total",
+    "KV cache-ээс авсан prompt token (OpenAI-compatible backend мэдээлсэн үед)",
+    ["model", "operation"]
+)
+
+
+def _field(response: Any, name: str) -> Optional[float]:
+    # ollama-ийн хувилбараас хамаарч dict эсвэл объект буцна
+    if isinstance(response, dict):
+        return response.get(name)
+    return getattr(response, name, None)
+
+
+def record_llm_response(
+    model: str,
+    operation: str,
+    response: Any,
+    elapsed_s: Optional[float] = None,
+    session_call: str = "none"
+):
+    """
+    Ollama хариуны token тоо, хугацааг бүртгэх
+
+    Args:
+        model: Model-ийн нэр
+        operation: "formalize", "retry", "actions" гэх мэт
+        response: chat() хариу
+        elapsed_s: Client талаас хэмжсэн хугацаа
+        session_call: llm_client.session_call()-ийн label
+    """
+    labels = {"model": model, "operation": operation}
+    ollama_requests.inc(**labels)
+
+    prompt_tokens = _field(response, "prompt_eval_count")
+    if prompt_tokens:
+        ollama_prompt_tokens.inc(prompt_tokens, **labels)
+
+    completion_tokens = _field(response, "eval_count")
+    if completion_tokens:
+        ollama_completion_tokens.inc(completion_tokens, **labels)
+
+    # Ollama хугацааг nanosecond-оор буцаана
+    prompt_eval_ns = _field(response, "prompt_eval_duration")
+    if prompt_eval_ns:
+        ollama_prompt_eval_seconds.inc(prompt_eval_ns / 1e9, **labels)
+    if prompt_eval_ns is not None:
+        # Бүтэн prompt cache-ээс уншигдсан (0) дуудлагыг мөн тоолно
+        ollama_prefill_duration.observe(prompt_eval_ns / 1e9, session_call=session_call, **labels)
+
+    cached_tokens = _field(response, "prompt_cache_count")
+    if cached_tokens:
+        ollama_cached_prompt_tokens.inc(cached_tokens, **labels)
+
+    eval_ns = _field(response, "eval_duration")
+    if eval_ns:
+        ollama_eval_seconds.inc(eval_ns / 1e9, **labels)
+
+    if elapsed_s is not None:
+        ollama_request_duration.observe(elapsed_s, **labels)
@@ -0,0 +1,175 @@
+"""
+Model residency manager
+
+Summarizer, action extractor хоёулаа нэг model (config.SLM_MODEL)
+ашиглана - санах ойд хоёр өөр 7B model зэрэг ачаалагдахгүй. Дуудлага
+бүр тохируулсан keep_alive илгээж, startup болон удаан idle байсны
+дараа model-ийг урьдчилан ачаална (эхний хүсэлт model reload-ийн
+хэдэн секундийн хүлээлт төлөхгүй).
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+from .config import SLM_MODEL, SLM_KEEP_ALIVE, SLM_WARM_CHECK_INTERVAL
+from .llm_client import LLM_AVAILABLE, LLMClient, get_llm_client
+
+
+class ModelRegistry:
+    """
+    Процесс даяар нэг SLM model-ийн бүртгэл
+
+    Args:
+        model: Model-ийн нэр
+        keep_alive: Ollama keep_alive ("30m", "-1m" = үүрд, "0" = шууд буулгах)
+        client: SLM client (default: get_llm_client() - анх хэрэглэгдэхэд)
+    """
+
+    def __init__(self, model: str, keep_alive: str, client: Optional[LLMClient] = None):
+        self.model = model
+        self.keep_alive = keep_alive
+        self._client = client
+        self.last_used: Optional[float] = None
+        self.last_warm: Optional[float] = None
+        self.last_warm_ms: Optional[float] = None
+        self.warm_ups = 0
+
+    @property
+    def client(self) -> LLMClient:
+        """
+        Raises:
+            RuntimeError: Процессын client үүсгэж чадаагүй бол
+        """
+        return self._client or get_llm_client()
+
+    def touch(self):
+        """Model ашиглагдсан гэж тэмдэглэх"""
+        self.last_used = time.time()
+
+    def chat_kwargs(self, model: Optional[str] = None) -> Dict:
+        """
+        chat() дуудлага бүрт нэмэх model, keep_alive
+
+        Args:
+            model: Өөр model заасан бол (None = registry-ийн model)
+        """
+        model = model or self.model
+        if model == self.model:
+            self.touch()
+        return {"model": model, "keep_alive": self.keep_alive}
+
+    def warm_up(self):
+        """
+        Model-ийг host бүрийн санах ойд ачаалах (generation хийхгүй - хоосон messages)
+
+        Зарим host амжилтгүй бол анхааруулаад үргэлжилнэ (router тэднийг хасна).
+
+        Raises:
+            RuntimeError: Ollama ажиллахгүй эсвэл аль ч host дээр model ачаалагдаагүй бол
+        """
+        if not LLM_AVAILABLE:
+            raise RuntimeError("❌ Ollama суулгаагүй байна")
+
+        errors = []
+        for host in self.client.hosts():
+            started = time.perf_counter()
+            try:
+                host.chat(model=self.model, messages=[], keep_alive=self.keep_alive)
+            except Exception as e:
+                errors.append(f"{_host_name(host)}: {e}")
+                continue
+            self._record_warm(host, started)
+
+        if len(errors) == len(self.client.hosts()):
+            raise RuntimeError(f"❌ Model '{self.model}' ачаалж чадсангүй: {'; '.join(errors)}")
+        for error in errors:
+            print(f"⚠️  Model ачаалж чадсангүй - {error}")
+
+    async def awarm_up(self, host: LLMClient):
+        """Нэг host дээр model ачаалах (async)"""
+        if not LLM_AVAILABLE:
+            raise RuntimeError("❌ Ollama суулгаагүй байна")
+
+        started = time.perf_counter()
+        try:
+            await host.achat(model=self.model, messages=[], keep_alive=self.keep_alive)
+        except Exception as e:
+            raise RuntimeError(f"❌ Model '{self.model}' ачаалж чадсангүй ({_host_name(host)}): {e}")
+
+        self._record_warm(host, started)
+
+    def _record_warm(self, host: LLMClient, started: float):
+        self.warm_ups += 1
+        self.last_warm = time.time()
+        self.last_warm_ms = round((time.perf_counter() - started) * 1000, 1)
+        print(f"🔥 Model ачаалагдлаа: {self.model} @ {_host_name(host)} ({self.last_warm_ms} ms)")
+
+    def _is_ours(self, name: str) -> bool:
+        # "qwen2.5:7b" ба "mongolian-protocol:latest" хоёуланг таних
+        return name == self.model or name == f"{self.model}:latest"
+
+    async def _host_status(self, host: LLMClient) -> Dict:
+        try:
+            models = await host.aps()
+        except Exception:
+            return {"host": _host_name(host), "resident": None, "other_resident_models": []}
+        return {
+            "host": _host_name(host),
+            "resident": any(self._is_ours(m) for m in models),
+            "other_resident_models": [m for m in models if not self._is_ours(m)],
+        }
+
+    async def status(self) -> Dict:
+        """Model-ийн төлөв (host бүр дээр resident эсэх, сүүлд ачаалсан хугацаа)"""
+        hosts = []
+        error = None
+        if LLM_AVAILABLE:
+            try:
+                clients = self.client.hosts()
+            except RuntimeError as e:
+                clients, error = [], str(e)
+            hosts = await asyncio.gather(*(self._host_status(h) for h in clients))
+
+        known = [h["resident"] for h in hosts if h["resident"] is not None]
+        return {
+            "model": self.model,
+            "keep_alive": self.keep_alive,
+            "resident": all(known) if known else None,
+            "hosts": hosts,
+            "warm_ups": self.warm_ups,
+            "last_warm_ms": self.last_warm_ms,
+            "last_warm": self.last_warm,
+            "last_used": self.last_used,
+            **({"error": error} if error else {}),
+        }
+
+    async def keep_warm_loop(self, interval: float = SLM_WARM_CHECK_INTERVAL):
+        """
+        Аль нэг host дээр model санах ойгоос буусан бол (idle eviction) дахин ачаалах
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                hosts = self.client.hosts()
+            except RuntimeError as e:
+                print(f"⚠️  Model residency шалгалт алгаслаа: {e}")
+                continue
+            for host in hosts:
+                try:
+                    models = await host.aps()
+                    if not any(self._is_ours(m) for m in models):
+                        print(f"💤 Model санах ойгоос буусан - дахин ачаалж байна: {self.model} @ {_host_name(host)}")
+                        await self.awarm_up(host)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"⚠️  Model residency шалгалт амжилтгүй ({_host_name(host)}): {e}")
+
+
+def _host_name(host: LLMClient) -> str:
+    return getattr(host, "host", type(host).__name__)
+
+
+# Процесс даяар нэг model
+model_registry = ModelRegistry(SLM_MODEL, SLM_KEEP_ALIVE)
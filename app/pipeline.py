@@ -0,0 +1,128 @@
+"""
+Pipeline stage-graph executor
+
+Протокол үүсгэх алхмуудыг (clean → entities/formalize/actions → export)
+хамаарлын граф хэлбэрээр тодорхойлж, хамааралгүй алхмуудыг зэрэг
+ажиллуулна. Алхам бүрийн хугацааг (ms) тэмдэглэж, "stage.<нэр>" span нээнэ.
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from .tracing import tracer
+
+
+StageFunc = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+class StageError(RuntimeError):
+    """
+    Алхам амжилтгүй болсон үед шидэгдэнэ
+
+    Attributes:
+        stage: Алдаа гарсан алхмын нэр
+        original: Анхны exception
+    """
+
+    def __init__(self, stage: str, original: BaseException):
+        super().__init__(f"'{stage}' алхам амжилтгүй: {original}")
+        self.stage = stage
+        self.original = original
+
+
+class Stage:
+    """
+    Графын нэг алхам
+
+    Args:
+        name: Алхмын нэр (үр дүн энэ нэрээр хадгалагдана)
+        func: async функц - өмнөх алхмуудын үр дүнгийн dict авна
+        deps: Хамаарах алхмуудын нэрс
+    """
+
+    def __init__(self, name: str, func: StageFunc, deps: Iterable[str] = ()):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+
+
+class PipelineGraph:
+    """
+    Жижиг DAG executor
+
+    Жишээ:
+        graph = PipelineGraph()
+        graph.add("clean", clean_stage)
+        graph.add("formalize", formalize_stage, deps=["clean"])
+        graph.add("actions", actions_stage, deps=["clean"])
+        results, timings = await graph.run()
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, Stage] = {}
+
+    def add(self, name: str, func: StageFunc, deps: Iterable[str] = ()) -> "PipelineGraph":
+        """Алхам нэмэх"""
+        if name in self.stages:
+            raise ValueError(f"Алхам давхардсан: {name}")
+
+        for dep in deps:
+            if dep not in self.stages:
+                raise ValueError(f"'{name}' алхмын хамаарал олдсонгүй: {dep}")
+
+        self.stages[name] = Stage(name, func, deps)
+        return self
+
+    async def run(
+        self,
+        initial: Dict[str, Any] = None,
+        on_stage: Optional[Callable[[str, float, Any], None]] = None
+    ) -> Tuple[Dict[str, Any], Dict[str, float]]:
+        """
+        Графыг ажиллуулах
+
+        Алхам бүр хамаарлууд нь дуусмагц эхэлнэ. Нэг алхам алдаа
+        гаргавал бусад ажиллаж буй алхмууд цуцлагдаж StageError шидэгдэнэ.
+
+        Args:
+            initial: Эхний үр дүнгүүд
+            on_stage: Алхам амжилттай дуусахад дуудагдана - (нэр, ms, үр дүн)
+
+        Returns:
+            (results, timings_ms)
+        """
+        results: Dict[str, Any] = dict(initial or {})
+        timings: Dict[str, float] = {}
+        done: Dict[str, asyncio.Event] = {name: asyncio.Event() for name in self.stages}
+
+        async def run_stage(stage: Stage):
+            for dep in stage.deps:
+                await done[dep].wait()
+
+            started = time.perf_counter()
+            try:
+                with tracer.span(f"stage.{stage.name}"):
+                    results[stage.name] = await stage.func(results)
+            except StageError:
+                raise
+            except Exception as e:
+                raise StageError(stage.name, e) from e
+            finally:
+                timings[stage.name] = round((time.perf_counter() - started) * 1000, 1)
+
+            done[stage.name].set()
+            if on_stage:
+                on_stage(stage.name, timings[stage.name], results[stage.name])
+
+        tasks = [asyncio.create_task(run_stage(stage)) for stage in self.stages.values()]
+
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        return results, timings
@@ -1,13 +1,13 @@
 import re
 from typing import List
 
+from .lexicon import lexicon
+
 def clean_text(text: str) -> str:
     """
-    Хэллэг үгсийг арилгах: аа, ээ, өө, тэгээд гэх мэт
+    Хэллэг үгсийг арилгах: аа, ээ, өө, тэгээд гэх мэт (lexicons/clean.txt)
     """
-    fillers = ["аа", "ээ", "өө", "юу", "гээд", "тэгээд", "за", "тэгэхээр"]
-    pattern = r"\b(" + "|".join(fillers) + r")\b"
-    text = re.sub(pattern, "", text, flags=re.IGNORECASE)
+    text = lexicon.matcher("clean").sub(text)
     
     # Давхар хоосон зай арилгах
     text = re.sub(r"\s+", " ", text).strip()
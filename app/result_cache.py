@@ -0,0 +1,191 @@
+"""
+Протоколын үр дүнгийн cache (content-addressed)
+
+Түлхүүр = hash(CACHE_VERSION, clean_text(text), model, prompt/толь/тохиргооны fingerprint).
+Албан болгосон текст, action items, entities ба (сонголтоор) DOCX-ийг
+хадгална. Хоёр түвшинтэй:
+    1. Санах ойн LRU (RESULT_CACHE_MEMORY_ITEMS)
+    2. Диск (RESULT_CACHE_DIR, RESULT_CACHE_DISK_MB хэмжээгээр хязгаарлагдсан)
+
+Ижил текстийг дахин илгээхэд (client timeout, гарчиг солих) SLM дуудлага
+хийлгүйгээр millisecond-д хариулна.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .config import (
+    RESULT_CACHE_ENABLED, RESULT_CACHE_MEMORY_ITEMS, RESULT_CACHE_DIR, RESULT_CACHE_DISK_MB
+)
+
+# Pipeline-ийн логик (хэсэглэлт, retry, post-processing, validation) гаралтыг
+# өөрчлөх бүрт нэмэгдүүлнэ - дискийн cache restart-ийг давж үлддэг
+#   2: token budget-ийн хэсэглэлт, stop sequence, ээлжийн retry, толь,
+#      action-ийг хэсгээр гаргах
+CACHE_VERSION = "2"
+
+
+def fingerprint(*parts) -> str:
+    """Prompt, options зэргээс богино hash гаргах"""
+    data = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:16]
+
+
+def cache_key(cleaned_text: str, model: str, prompt_fingerprint: str) -> str:
+    """Цэвэрлэсэн текст + model + prompt fingerprint → түлхүүр"""
+    h = hashlib.sha256()
+    for part in (CACHE_VERSION, model, prompt_fingerprint, cleaned_text):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class ResultCache:
+    """
+    Санах ойн LRU + дискийн хоёр түвшинт cache
+
+    Entry бүтэц:
+        {
+            "body": str, "action_items": list, "entities": list,
+            "docx_key": str (optional), "docx": bytes (optional)
+        }
+    """
+
+    def __init__(
+        self,
+        memory_items: int = RESULT_CACHE_MEMORY_ITEMS,
+        disk_dir: Optional[str] = RESULT_CACHE_DIR,
+        disk_max_bytes: int = RESULT_CACHE_DISK_MB * 1024 * 1024
+    ):
+        self.memory_items = memory_items
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+
+        self._memory: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Tuple[Optional[Dict], Optional[str]]:
+        """
+        Returns:
+            (entry, tier) - tier нь "memory", "disk" эсвэл None (miss)
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.hits_memory += 1
+                return entry, "memory"
+
+        entry = self._read_disk(key)
+        if entry is not None:
+            self._put_memory(key, entry)
+            with self._lock:
+                self.hits_disk += 1
+            return entry, "disk"
+
+        with self._lock:
+            self.misses += 1
+        return None, None
+
+    def put(self, key: str, entry: Dict):
+        """Хоёр түвшинд хадгалах"""
+        self._put_memory(key, entry)
+        self._write_disk(key, entry)
+
+    def _put_memory(self, key: str, entry: Dict):
+        with self._lock:
+            self._memory[key] = entry
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    # ---------- Диск ----------
+
+    def _paths(self, key: str) -> Tuple[Path, Path]:
+        return self.disk_dir / f"{key}.json", self.disk_dir / f"{key}.docx"
+
+    def _read_disk(self, key: str) -> Optional[Dict]:
+        if not self.disk_dir:
+            return None
+
+        json_path, docx_path = self._paths(key)
+        try:
+            entry = json.loads(json_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+        if entry.get("docx_key") and docx_path.exists():
+            entry["docx"] = docx_path.read_bytes()
+        else:
+            entry.pop("docx_key", None)
+
+        json_path.touch()  # LRU-д зориулж mtime шинэчлэх
+        return entry
+
+    def _write_disk(self, key: str, entry: Dict):
+        if not self.disk_dir:
+            return
+
+        try:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            json_path, docx_path = self._paths(key)
+
+            data = {k: v for k, v in entry.items() if k != "docx"}
+            if entry.get("docx"):
+                docx_path.write_bytes(entry["docx"])
+
+            # Атомаар бичих - хагас бичигдсэн JSON уншигдахгүй
+            tmp_path = json_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+            tmp_path.replace(json_path)
+
+            self._evict_disk()
+        except OSError as e:
+            print(f"⚠️  Cache диск рүү бичиж чадсангүй: {e}")
+
+    def _evict_disk(self):
+        """Дискийн хэмжээ хязгаараас хэтэрвэл хамгийн хуучныг устгах"""
+        files = [p for p in self.disk_dir.glob("*.json")]
+        sizes = {}
+        total = 0
+        for path in files:
+            docx_path = path.with_suffix(".docx")
+            size = path.stat().st_size + (docx_path.stat().st_size if docx_path.exists() else 0)
+            sizes[path] = size
+            total += size
+
+        if total <= self.disk_max_bytes:
+            return
+
+        for path in sorted(files, key=lambda p: p.stat().st_mtime):
+            if total <= self.disk_max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            path.with_suffix(".docx").unlink(missing_ok=True)
+            total -= sizes[path]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits_memory + self.hits_disk + self.misses
+            return {
+                "enabled": RESULT_CACHE_ENABLED,
+                "memory_entries": len(self._memory),
+                "memory_capacity": self.memory_items,
+                "disk_dir": str(self.disk_dir) if self.disk_dir else None,
+                "hits_memory": self.hits_memory,
+                "hits_disk": self.hits_disk,
+                "misses": self.misses,
+                "hit_ratio": round((self.hits_memory + self.hits_disk) / lookups, 3) if lookups else None,
+            }
+
+
+# Процесс даяар нэг cache
+result_cache = ResultCache()
@@ -0,0 +1,177 @@
+"""
+Албан текстийг эх ярианы ээлжүүдтэй харгалзуулж, утга алдсан ээлжийг олох
+
+SLM хариу бүтнээрээ биш, ээлж тус бүрээр шалгагдана:
+
+    1. Эх текстийг ярианы ээлжүүдэд, албан текстийг өгүүлбэрүүдэд хуваана
+    2. Өгүүлбэр бүрийг үгийн үндсийн давхцлаар ээлжид дараалал
+       алдагдуулахгүйгээр онооно (dynamic programming)
+    3. Ээлж бүрийн нэр, тоо, огноо хадгалагдсан, утгагүй хэллэг үүсээгүйг
+       шалгана
+
+Ингэснээр retry зөвхөн алдсан ээлжийг дахин үүсгэж, хариунд буцааж
+оруулна - retry-ийн зардал бүтэн хэсгийн биш, тухайн ээлжийн хэмжээтэй.
+"""
+
+import re
+from typing import List, Set
+
+from .chunker import TURN_PATTERN, split_sentences, split_turns
+
+# Утгагүй хэллэг - "Хэдүүлэх төслийг" гэх мэт
+NONSENSE_PATTERNS = [
+    r'хэдүүлэх',  # Утгагүй үйл үг
+    r'[а-яёүө]{15,}',  # Хэт урт утгагүй үг
+    r'\b[а-яёүө]\b\s+\b[а-яёүө]\b\s+\b[а-яёүө]\b',  # "а б в" гэх мэт
+]
+
+# Албан болгоход өөрчлөгдөх ёсгүй огноо, хугацааны үгс
+DATE_WORDS = [
+    'даваа', 'мягмар', 'лхагва', 'пүрэв', 'баасан', 'бямба', 'ням',
+    'өнөөдөр', 'маргааш', 'нөгөөдөр', 'долоо хоног',
+]
+
+_WORD = re.compile(r'[А-ЯЁҮӨа-яёүөA-Za-z]{3,}')
+_NAME = re.compile(r'\b[А-ЯЁҮӨ][а-яёүө]{2,}\b')
+_NUMBER = re.compile(r'\d+')
+
+# Хэллэг үгсийг хасаад ийм богино ээлж (зөвхөн "За." гэх мэт) алга болж болно
+MIN_CONTENT_CHARS = 15
+
+
+class Segment:
+    """
+    Эх текстийн нэг ярианы ээлж ба түүнд харгалзах албан текст
+
+    Attributes:
+        source: Эх ээлж ("Анна: ...")
+        output: Харгалзах албан өгүүлбэрүүд ("" = алга болсон)
+        errors: Утгын шалгалтын алдаа (хоосон = зөв)
+    """
+
+    def __init__(self, source: str, output: str = ""):
+        self.source = source
+        self.output = output
+        self.errors: List[str] = []
+
+    def __repr__(self) -> str:
+        return f"Segment({self.source[:30]!r} → {self.output[:30]!r}, errors={self.errors})"
+
+
+def _stems(text: str) -> Set[str]:
+    # Нөхцөл залгавар өөрчлөгддөг тул үгийн эхний 4 үсгээр харьцуулна
+    return {word.lower()[:4] for word in _WORD.findall(text)}
+
+
+def speaker(turn: str) -> str:
+    """Ээлжийн "Нэр:"-ээс нэр ("Б.Бат:" → "Бат"), ээлж биш бол хоосон"""
+    match = TURN_PATTERN.match(turn)
+    if not match:
+        return ""
+    return match.group().rstrip(":").split(".")[-1]
+
+
+def _names(turn: str) -> Set[str]:
+    """Хадгалагдах ёстой нэрс - ярьж буй хүн ба өгүүлбэрийн дундах том үсэгтэй үг"""
+    name = speaker(turn)
+    body = turn[len(TURN_PATTERN.match(turn).group()):] if name else turn
+    names = set()
+    for match in _NAME.finditer(body):
+        # Өгүүлбэрийн эхний үг ("Энэ", "Тэгвэл") нэр биш байж болно
+        before = body[:match.start()].rstrip()
+        if before and before[-1] not in ".?!…:":
+            names.add(match.group())
+    if name:
+        names.add(name)
+    return names
+
+
+def segment_errors(source: str, output: str) -> List[str]:
+    """
+    Нэг ээлжийн албан хувилбарын утгын шалгалт
+
+    Returns:
+        Алдаанууд (хоосон = утга хадгалагдсан)
+    """
+    name = speaker(source)
+    content = source[len(name) + 1:] if name else source
+    if not output.strip():
+        essential = _NUMBER.search(content) or len(content.strip(" .,!?")) >= MIN_CONTENT_CHARS
+        return ["Ээлж алга болсон"] if essential else []
+
+    errors = []
+    # Нэр хувилж болно (Анна → А.Анна, Аннад) - эхний 4 үсэг хадгалагдана
+    missing = [n for n in _names(source) if n[:4] not in output]
+    if missing:
+        errors.append(f"Нэр алдагдсан: {', '.join(sorted(missing))}")
+
+    missing = [n for n in _NUMBER.findall(content) if n not in output]
+    if missing:
+        errors.append(f"Тоо алдагдсан: {', '.join(missing)}")
+
+    lowered_source, lowered_output = source.lower(), output.lower()
+    missing = [w for w in DATE_WORDS if w in lowered_source and w not in lowered_output]
+    if missing:
+        errors.append(f"Огноо алдагдсан: {', '.join(missing)}")
+
+    for pattern in NONSENSE_PATTERNS:
+        if re.search(pattern, output) and not re.search(pattern, source):
+            errors.append(f"Утгагүй хэллэг: {pattern}")
+            break
+
+    if len(output) < len(content) * 0.3:
+        errors.append(f"Хэт богино ({len(output)}/{len(content)} тэмдэгт)")
+
+    return errors
+
+
+def align_segments(original: str, formalized: str) -> List[Segment]:
+    """
+    Албан текстийн өгүүлбэрүүдийг эх ээлжүүдэд дарааллаар нь оноож шалгах
+
+    Өгүүлбэр бүр нэг ээлжид, дараалал хадгалан (j < k бол ээлж(j) ≤ ээлж(k))
+    үгийн үндсийн давхцлын нийлбэр хамгийн их байхаар оноогдоно.
+    """
+    segments = [Segment(turn) for turn in split_turns(original)]
+    units = [s for turn in split_turns(formalized) for s in split_sentences(turn)]
+    if not segments:
+        return segments
+
+    source_stems = [_stems(segment.source) for segment in segments]
+    n = len(segments)
+    # best[i] - одоогийн өгүүлбэр хүртэл, сүүлийнх нь i ээлжид оноогдсон үеийн оноо
+    best = [0.0] * n
+    choices: List[List[int]] = []
+    for unit in units:
+        stems = _stems(unit)
+        score = [len(stems & source) / (len(stems) or 1) for source in source_stems]
+        # Өмнөх өгүүлбэр i-ээс хойшгүй ээлжид оноогдсон хамгийн сайн төлөв
+        prefix, arg, running, running_arg = [], [], float("-inf"), 0
+        for i in range(n):
+            if best[i] > running:
+                running, running_arg = best[i], i
+            prefix.append(running)
+            arg.append(running_arg)
+        best = [prefix[i] + score[i] for i in range(n)]
+        choices.append(arg)
+
+    # Буцаж мөшгөх
+    assigned = [0] * len(units)
+    if units:
+        i = max(range(n), key=lambda k: best[k])
+        for j in range(len(units) - 1, -1, -1):
+            assigned[j] = i
+            i = choices[j][i]
+
+    groups: List[List[str]] = [[] for _ in segments]
+    for unit, i in zip(units, assigned):
+        groups[i].append(unit)
+    for segment, group in zip(segments, groups):
+        segment.output = " ".join(group)
+        segment.errors = segment_errors(segment.source, segment.output)
+    return segments
+
+
+def splice(segments: List[Segment]) -> str:
+    """Ээлжүүдийн албан хувилбарыг дарааллаар нь нийлүүлэх"""
+    return " ".join(segment.output for segment in segments if segment.output)
@@ -14,6 +14,8 @@ from typing import List, Dict, Tuple
 import requests
 from difflib import get_close_matches
 
+from .lexicon import lexicon
+
 
 class MongolianSpellChecker:
     """
@@ -24,9 +26,6 @@ class MongolianSpellChecker:
         # Зөв бичгийн үндсэн дүрмүүд
         self.rules = self._load_grammar_rules()
         
-        # Түгээмэл алдаа -> Зөв хувилбар
-        self.common_mistakes = self._load_common_mistakes()
-        
         # Албан үгсийн толь (өргөтгөх боломжтой)
         self.official_terms = self._load_official_terms()
         
@@ -48,39 +47,12 @@ class MongolianSpellChecker:
             "тэмдэгт_хоосон": "Таслал, цэгийн өмнө хоосон зай БАЙХГҮЙ",
         }
     
-    def _load_common_mistakes(self) -> Dict[str, str]:
+    @property
+    def common_mistakes(self) -> Dict[str, str]:
         """
-        Түгээмэл алдаа -> Зөв хувилбар
+        Түгээмэл алдаа -> Зөв хувилбар (lexicons/spelling.txt)
         """
-        return {
-            # Төгсгөл
-            "тийн": "ийн",
-            "болно шүү": "болов",
-            "хийнэ шүү": "гүйцэтгэнэ",
-            "байна шүү": "байгаа юм",
-            
-            # Хэллэг үгс
-            "шүү дээ": "",
-            "л байх даа": "",
-            "байхаа": "",
-            "даа шүү": "",
-            "аа дээ": "",
-            
-            # Утгагүй үгс (ШИНЭ!)
-            "хэдүүлээ": "",
-            "хэдүүлэх": "",
-            
-            # Үйл үг
-            "хиймаар": "хийхээр",
-            "гүйцэтгэмээр": "гүйцэтгэхээр",
-            "ирмээр": "ирэхээр",
-            
-            # Албан үг
-            "хурал болсон": "хурал зохион байгуулагдсан",
-            "ярьсан": "илтгэл тавьсан",
-            "хэлсэн": "дэвшүүлсэн",
-            "шийдсэн": "тогтоол гаргасан",
-        }
+        return lexicon.entries("spelling")
     
     def _load_official_terms(self) -> Dict[str, List[str]]:
         """
@@ -189,16 +161,17 @@ class MongolianSpellChecker:
         """
         errors = []
         
-        for mistake, correction in self.common_mistakes.items():
-            if mistake in text.lower():
-                if correction:
-                    errors.append(
-                        f"'{mistake}' → '{correction}' гэж бичих хэрэгтэй"
-                    )
-                else:
-                    errors.append(
-                        f"'{mistake}' хэллэг үг арилгах хэрэгтэй"
-                    )
+        # Бүх алдааг нэг дамжилтаар, _auto_correct-тэй ижил бүтэн үгээр хайна
+        for mistake in lexicon.matcher("spelling").find(text):
+            correction = self.common_mistakes[mistake]
+            if correction:
+                errors.append(
+                    f"'{mistake}' → '{correction}' гэж бичих хэрэгтэй"
+                )
+            else:
+                errors.append(
+                    f"'{mistake}' хэллэг үг арилгах хэрэгтэй"
+                )
         
         return errors
     
@@ -247,22 +220,8 @@ class MongolianSpellChecker:
         """
         corrected = text
         
-        # 1. Түгээмэл алдаа засах
-        for mistake, correction in self.common_mistakes.items():
-            if correction:  # Хоосон биш бол
-                corrected = re.sub(
-                    r'\b' + re.escape(mistake) + r'\b',
-                    correction,
-                    corrected,
-                    flags=re.IGNORECASE
-                )
-            else:  # Арилгах
-                corrected = re.sub(
-                    r'\b' + re.escape(mistake) + r'\b',
-                    '',
-                    corrected,
-                    flags=re.IGNORECASE
-                )
+        # 1. Түгээмэл алдаа засах (хоосон орлуулгатай нь арилна) - нэг дамжилтаар
+        corrected = lexicon.matcher("spelling").sub(corrected)
         
         # 2. Таслалын өмнө хоосон зай арилгах
         corrected = re.sub(r'\s+([,.])', r'\1', corrected)
@@ -7,14 +7,31 @@ SLM Summarizer - УТГА ХАДГАЛАХ сайжруулалт
 3. Sentence-level боловсруулалт
 """
 
+import asyncio
+import contextvars
 import re
-from typing import Dict, Optional, Tuple, List
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple, List
 
-try:
-    from ollama import chat
-    OLLAMA_AVAILABLE = True
-except ImportError:
-    OLLAMA_AVAILABLE = False
+from .chunker import Chunk, split_chunks
+from .config import (
+    LLM_NUM_CTX, MAX_CHUNK_TOKENS, CHUNK_OVERLAP, TOKEN_SAFETY_MARGIN,
+    LLM_MAX_PREDICT, FORMALIZE_OUTPUT_RATIO,
+    CHUNK_CONCURRENCY, CHUNK_MAX_RETRIES, CHUNK_RETRY_BACKOFF, SEGMENT_RETRY_MAX_RATIO
+)
+from .llm_client import LLM_AVAILABLE, LLMClient, get_llm_client, session_call
+from .llm_scheduler import llm_scheduler
+from .model_registry import model_registry
+from .result_cache import fingerprint
+from .metrics import (
+    stage_duration, meaning_check_failures, conservative_retries, segment_retries, chunk_retries,
+    record_llm_response
+)
+from .tracing import tracer, llm_response_attributes
+from .tokens import token_estimator, current_usage, record_usage
+from .segments import NONSENSE_PATTERNS, Segment, align_segments, segment_errors, splice
+from .lexicon import lexicon
 
 # Зөв бичгийн шалгагч
 try:
@@ -30,12 +47,37 @@ class SLMOnlySummarizer:
     УТГА ХАДГАЛДАГ summarizer
     """
     
-    def __init__(self, model: str = "qwen2.5:7b", use_spell_check: bool = True):
-        self.model = model
-        self.max_chunk_length = 1500
+    # Албан текстийн дараа model нэмдэг тайлбарын эхлэл - энд үүсгэлт зогсоно
+    # (OpenAI-тай нийцтэй сервер 4-өөс олныг хүлээж авахгүй)
+    STOP_SEQUENCES = ["\n\nТайлбар", "\n\nТэмдэглэл", "\n\nNote", "\n\n---"]
+    # Хэсгийн доод хэмжээ (num_ctx хэт бага тохируулсан үед)
+    MIN_CHUNK_TOKENS = 64
+    
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        use_spell_check: bool = True,
+        client: Optional[LLMClient] = None
+    ):
+        # Model-ийг model_registry-ээс авна (action extractor-тэй ижил model)
+        self.model = model or model_registry.model
+        # Процесс даяар нэг pooled client (get_llm_client()) - өөрөөр заагаагүй бол
+        self.client = client or get_llm_client()
+        # Context цонх, хэсгийн дээд хэмжээ, өмнөх хэсгээс авах context (token)
+        self.num_ctx = LLM_NUM_CTX
+        self.max_chunk_tokens = MAX_CHUNK_TOKENS
+        self.chunk_overlap = CHUNK_OVERLAP
+        self.segment_retry_max_ratio = SEGMENT_RETRY_MAX_RATIO
+        # num_predict = оролтын token × output_ratio (max_predict хүртэл)
+        self.output_ratio = FORMALIZE_OUTPUT_RATIO
+        self.max_predict = LLM_MAX_PREDICT
+        # Урт текстийн хэсгүүдийг зэрэг боловсруулах тоо, хэсэг бүрийн retry
+        self.chunk_concurrency = max(1, CHUNK_CONCURRENCY)
+        self.chunk_max_retries = CHUNK_MAX_RETRIES
+        self.chunk_retry_backoff = CHUNK_RETRY_BACKOFF
         self.use_spell_check = use_spell_check and SPELL_CHECKER_AVAILABLE
         
-        if not OLLAMA_AVAILABLE:
+        if not LLM_AVAILABLE:
             raise RuntimeError(
                 "❌ Ollama суулгаагүй байна!\n"
                 "   Суулгах: pip install ollama"
@@ -53,13 +95,11 @@ class SLMOnlySummarizer:
         print(f"✅ SLM бэлэн: {self.model}")
     
     def _verify_model(self):
-        """Model шалгах"""
+        """
+        Model шалгах - metadata (show) дуудлага, generation хийхгүй
+        """
         try:
-            response = chat(
-                model=self.model,
-                messages=[{'role': 'user', 'content': 'test'}],
-                options={'num_predict': 5}
-            )
+            self.client.show(self.model)
         except Exception as e:
             error_msg = str(e).lower()
             
@@ -74,23 +114,71 @@ class SLMOnlySummarizer:
                     f"   Эхлүүлэх: ollama serve"
                 )
     
-    def formalize_text(self, text: str, debug: bool = True) -> str:
+    def _chat_span(self, messages: List[Dict], options: Dict, operation: str, prompt_tokens: int):
+        """SLM дуудлага бүрийн span (model, options, prompt урт)"""
+        return tracer.span(
+            "llm.chat",
+            model=self.model,
+            operation=operation,
+            options=options,
+            prompt_chars=sum(len(m["content"]) for m in messages),
+            prompt_tokens_est=prompt_tokens
+        )
+    
+    def _estimate_prompt(self, messages: List[Dict], options: Dict) -> int:
+        """Prompt-ийн token - num_ctx-д багтахгүй бол анхааруулна (Ollama чимээгүй таслана)"""
+        prompt_tokens = token_estimator.count_messages(messages)
+        if prompt_tokens >= options.get("num_ctx", self.num_ctx):
+            print(f"   ⚠️ Prompt ({prompt_tokens} token) num_ctx={options.get('num_ctx')}-оос урт - тасрах болно")
+        return prompt_tokens
+    
+    def _chat(self, messages: List[Dict], options: Dict, operation: str = "formalize") -> str:
+        """Sync SLM дуудлага"""
+        prompt_tokens = self._estimate_prompt(messages, options)
+        with self._chat_span(messages, options, operation, prompt_tokens) as span:
+            call = session_call()
+            span.set_attribute("session_call", call)
+            started = time.perf_counter()
+            response = self.client.chat(
+                messages=messages,
+                options=options,
+                **model_registry.chat_kwargs(self.model)
+            )
+            record_llm_response(self.model, operation, response, time.perf_counter() - started, call)
+            record_usage(prompt_tokens, response, options)
+            span.set_attributes(llm_response_attributes(response))
+        return response["message"]["content"].strip()
+    
+    async def _achat(self, messages: List[Dict], options: Dict, operation: str = "formalize") -> str:
+        """Async SLM дуудлага - event loop-ийг блоклохгүй"""
+        prompt_tokens = self._estimate_prompt(messages, options)
+        with self._chat_span(messages, options, operation, prompt_tokens) as span:
+            queued = time.perf_counter()
+            async with llm_scheduler.slot():
+                call = session_call()
+                started = time.perf_counter()
+                span.set_attributes({"slot_wait_ms": round((started - queued) * 1000, 1), "session_call": call})
+                response = await self.client.achat(
+                    messages=messages,
+                    options=options,
+                    **model_registry.chat_kwargs(self.model)
+                )
+                record_llm_response(self.model, operation, response, time.perf_counter() - started, call)
+            record_usage(prompt_tokens, response, options)
+            span.set_attributes(llm_response_attributes(response))
+        return response["message"]["content"].strip()
+    
+    def _build_prompts(self, text: str, context: str = "") -> Tuple[str, str]:
         """
-        АГУУЛГА ХАДГАЛСАН албан хэл болгох
+        ШИНЭЧИЛСЭН PROMPT - АГУУЛГА ӨӨРЧЛӨХГҮЙ
+
+        Хэсэг бүрт өөрчлөгддөггүй хэсэг (system prompt, заавар) эхэнд,
+        хэсгийн context, бичлэг хамгийн сүүлд - backend өмнөх дуудлагын
+        prefix-ийн KV cache-ийг дахин ашиглаж, зөвхөн бичлэгийг боловсруулна.
+
+        Args:
+            context: Өмнөх хэсгийн төгсгөл (зөвхөн ойлголтод - гаралтад оруулахгүй)
         """
-        if not OLLAMA_AVAILABLE:
-            raise RuntimeError("❌ SLM ажиллахгүй байна")
-        
-        # Зөв бичгийн урьдчилсан шалгалт
-        if self.use_spell_check:
-            if debug:
-                print("\n📝 Зөв бичгийн урьдчилсан шалгалт хийж байна...")
-            text = self.spell_checker.integrate_with_summarizer(text)
-        
-        if len(text) > self.max_chunk_length:
-            return self._process_long_text(text)
-        
-        # ШИНЭЧИЛСЭН PROMPT - АГУУЛГА ӨӨРЧЛӨХГҮЙ
         system_prompt = """Та протокол засварлагч. Яг нэг зүйл хийнэ: Ярианы маягийг албан маяг болгоно.
 
 🎯 ХАМГИЙН ЧУХАЛ: АГУУЛГА ӨӨРЧЛӨХГҮЙ
@@ -134,34 +222,187 @@ class SLMOnlySummarizer:
 АНХААР: "энэ төсөл" → "уг төсөл" (утга адил)
 АНХААР: "даваа гараг" → "даваа гараг" (өөрчлөхгүй)"""
 
+        context_block = f"""ӨМНӨХ ХЭСГИЙН ТӨГСГӨЛ (зөвхөн ойлгоход, ДАХИН БИЧИХГҮЙ):
+{context}
+
+""" if context else ""
+
         user_prompt = f"""Энэ ярианы бичлэгийг албан протокол болго. АГУУЛГА ӨӨРЧЛӨХГҮЙ.
+ЗӨВХӨН албан маяг бич. Агуулга бүрэн хадгал.
 
-ЯРИАНЫ БИЧЛЭГ:
-{text}
+{context_block}ЯРИАНЫ БИЧЛЭГ:
+{text}"""
 
-ЗӨВХӨН албан маяг бич. Агуулга бүрэн хадгал."""
+        return system_prompt, user_prompt
+    
+    def _predict_limit(self, text: str) -> int:
+        """Албан текстийн num_predict - оролтын token × FORMALIZE_OUTPUT_RATIO"""
+        return token_estimator.predict_limit(text, self.output_ratio)
+    
+    def _formalize_messages(self, system_prompt: str, user_prompt: str, text: str) -> Tuple[List[Dict], Dict]:
+        """Албан хэл болгох хүсэлтийн messages, options"""
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+        options = {
+            "temperature": 0.1,  # 0.05 → 0.1 (илүү creative)
+            "top_p": 0.9,       # 0.7 → 0.9
+            "num_predict": self._predict_limit(text),
+            "repeat_penalty": 1.1,
+            "num_ctx": self.num_ctx,
+            "stop": self.STOP_SEQUENCES,
+        }
+        return messages, options
+    
+    def prompt_fingerprint(self) -> str:
+        """
+        Prompt, options, тохиргооны fingerprint (result cache-ийн түлхүүрт)
+        """
+        system_prompt, user_prompt = self._build_prompts("{text}")
+        return fingerprint(
+            self.model,
+            self._formalize_messages(system_prompt, user_prompt, ""),
+            self._conservative_messages(system_prompt, user_prompt, ""),
+            self.output_ratio,
+            self.max_predict,
+            self.num_ctx,
+            self.max_chunk_tokens,
+            self.chunk_overlap,
+            self.segment_retry_max_ratio,
+            self.use_spell_check
+        )
+    
+    def _pre_spell_check(self, text: str, debug: bool) -> str:
+        """Зөв бичгийн урьдчилсан шалгалт"""
+        if self.use_spell_check:
+            if debug:
+                print("\n📝 Зөв бичгийн урьдчилсан шалгалт хийж байна...")
+            with stage_duration.time(stage="spell_check"), tracer.span("spell_check", phase="pre", length=len(text)):
+                text = self.spell_checker.integrate_with_summarizer(text)
+        return text
+    
+    def _finalize(self, text: str, cleaned: str, debug: bool) -> str:
+        """
+        Эцсийн зөв бичгийн шалгалт + validation (CPU)
+        """
+        # Зөв бичгийн эцсийн шалгалт
+        if self.use_spell_check:
+            if debug:
+                print(f"   🔍 Эцсийн зөв бичгийн шалгалт...")
+            
+            with stage_duration.time(stage="spell_check"), tracer.span("spell_check", phase="final", length=len(cleaned)) as span:
+                final_check = self.spell_checker.check_text(cleaned, verbose=False)
+                span.set_attribute("errors", len(final_check['errors']))
+            
+            if final_check['errors']:
+                if debug:
+                    print(f"   ⚠️ {len(final_check['errors'])} алдаа засагдаж байна")
+                cleaned = final_check['corrected_text']
+            else:
+                if debug:
+                    print(f"   ✅ Зөв бичиг хангагдсан")
+        
+        # Эцсийн validation
+        is_valid, errors = self._validate_result_flexible(text, cleaned)
+        
+        if not is_valid:
+            if debug:
+                print(f"\n   ⚠️ Validation:")
+                for error in errors[:3]:
+                    print(f"      • {error}")
+        else:
+            if debug:
+                print(f"   ✅ Чанар хангалттай")
+        
+        return cleaned
+    
+    def _slm_error(self, e: Exception) -> RuntimeError:
+        """SLM алдааг RuntimeError болгох"""
+        if isinstance(e, RuntimeError):
+            return e
+        return RuntimeError(
+            f"❌ SLM алдаа!\n"
+            f"   Model: {self.model}\n"
+            f"   Алдаа: {str(e)}"
+        )
+    
+    def chunk_token_budget(self) -> int:
+        """
+        Нэг хэсгийн текстийн дээд token
 
+        Консерватив retry-ийн prompt (хамгийн урт) + overlap context + хариу
+        num_ctx-д багтах, хариу нь LLM_MAX_PREDICT-д багтах хамгийн том хэмжээ -
+        хэсгийн тоо хамгийн цөөн, тасрахгүй.
+        """
+        system_prompt, user_prompt = self._build_prompts("", "." if self.chunk_overlap > 0 else "")
+        messages, _ = self._conservative_messages(system_prompt, user_prompt, "")
+        prompt_overhead = token_estimator.count_messages(messages)
+        budget = min(
+            self.num_ctx - prompt_overhead - self.chunk_overlap - self.max_predict - TOKEN_SAFETY_MARGIN,
+            int(self.max_predict / self.output_ratio)
+        )
+        if self.max_chunk_tokens > 0:
+            budget = min(budget, self.max_chunk_tokens)
+        return max(budget, self.MIN_CHUNK_TOKENS)
+    
+    def _plan_chunks(self, text: str) -> Optional[List[Chunk]]:
+        """Budget-ээс урт бол хэсгүүд, багтвал None - хүсэлтийн token budget-ийг бүртгэнэ"""
+        budget = self.chunk_token_budget()
+        input_tokens = token_estimator.count(text)
+        chunks = self._split_chunks(text, budget) if input_tokens > budget else None
+        usage = current_usage()
+        if usage is not None:
+            usage.set_budget(
+                num_ctx=self.num_ctx,
+                chunk_budget_tokens=budget,
+                input_tokens=input_tokens,
+                chunks=len(chunks) if chunks else 1
+            )
+        return chunks
+    
+    def formalize_text(
+        self,
+        text: str,
+        debug: bool = True,
+        on_chunk: Optional[Callable[[int, int, str], None]] = None,
+        context: str = ""
+    ) -> str:
+        """
+        АГУУЛГА ХАДГАЛСАН албан хэл болгох
+        
+        Args:
+            on_chunk: Хэсэг бүр дуусахад дуудагдана - (дууссан, нийт, албан текст)
+            context: Өмнөх хэсгийн төгсгөл (урт текстийн хэсэг бүрт)
+        """
+        if not LLM_AVAILABLE:
+            raise RuntimeError("❌ SLM ажиллахгүй байна")
+        
+        text = self._pre_spell_check(text, debug)
+        
+        chunks = self._plan_chunks(text)
+        if chunks:
+            return self._process_long_text(chunks, on_chunk)
+        return self._formalize_single(text, debug, on_chunk, context)
+    
+    def _formalize_single(
+        self,
+        text: str,
+        debug: bool = True,
+        on_chunk: Optional[Callable[[int, int, str], None]] = None,
+        context: str = ""
+    ) -> str:
+        """Context-д багтах текстийг нэг SLM дуудлагаар албан болгох"""
+        system_prompt, user_prompt = self._build_prompts(text, context)
+        
         try:
             if debug:
                 print(f"\n   📤 SLM рүү хүсэлт илгээж байна...")
                 print(f"   Модель: {self.model}")
-                print(f"   Урт: {len(text)} тэмдэгт")
-            
-            response = chat(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                options={
-                    "temperature": 0.1,  # 0.05 → 0.1 (илүү creative)
-                    "top_p": 0.9,       # 0.7 → 0.9
-                    "num_predict": 2000,
-                    "repeat_penalty": 1.1,
-                }
-            )
+                print(f"   Урт: {len(text)} тэмдэгт, ~{token_estimator.count(text)} token")
             
-            result = response["message"]["content"].strip()
+            messages, options = self._formalize_messages(system_prompt, user_prompt, text)
+            result = self._chat(messages, options)
             
             if debug:
                 print(f"\n   📥 SLM хариулт ирлээ ({len(result)} тэмдэгт)")
@@ -169,10 +410,16 @@ class SLMOnlySummarizer:
             # Post-processing
             cleaned = self._aggressive_postprocess(result)
             
-            # УТГЫН ШАЛГАЛТ - ШИНЭ!
-            is_meaningful = self._check_meaning_preserved(text, cleaned)
+            # Ээлж бүрийн утгын шалгалт - цөөн ээлж алдсан бол зөвхөн тэдгээрийг
+            segments = align_segments(text, cleaned)
+            failed = self._segments_to_retry(segments)
             
-            if not is_meaningful:
+            if failed:
+                cleaned = self._retry_segments(segments, failed)
+            
+            # УТГЫН ШАЛГАЛТ - ШИНЭ!
+            elif not self._check_meaning_preserved(text, cleaned):
+                meaning_check_failures.inc()
                 print(f"\n   ⚠️ АНХААРУУЛГА: Утга алдагдсан байж магадгүй!")
                 print(f"   🔄 Дахин оролдож байна (илүү консерватив)...")
                 
@@ -180,44 +427,83 @@ class SLMOnlySummarizer:
                 if retry_result:
                     cleaned = retry_result
             
-            # Зөв бичгийн эцсийн шалгалт
-            if self.use_spell_check:
-                if debug:
-                    print(f"   🔍 Эцсийн зөв бичгийн шалгалт...")
-                
-                final_check = self.spell_checker.check_text(cleaned, verbose=False)
-                
-                if final_check['errors']:
-                    if debug:
-                        print(f"   ⚠️ {len(final_check['errors'])} алдаа засагдаж байна")
-                    cleaned = final_check['corrected_text']
-                else:
-                    if debug:
-                        print(f"   ✅ Зөв бичиг хангагдсан")
+            cleaned = self._finalize(text, cleaned, debug)
+            if on_chunk:
+                on_chunk(1, 1, cleaned)
+            return cleaned
+            
+        except Exception as e:
+            raise self._slm_error(e)
+    
+    async def aformalize_text(
+        self,
+        text: str,
+        debug: bool = True,
+        on_chunk: Optional[Callable[[int, int, str], None]] = None,
+        context: str = ""
+    ) -> str:
+        """
+        formalize_text-ийн async хувилбар
+        
+        SLM дуудлага AsyncClient-аар, CPU ажил (зөв бичиг, validation)
+        thread pool дээр явна - event loop блоклогдохгүй.
+        """
+        if not LLM_AVAILABLE:
+            raise RuntimeError("❌ SLM ажиллахгүй байна")
+        
+        text = await asyncio.to_thread(self._pre_spell_check, text, debug)
+        
+        chunks = self._plan_chunks(text)
+        if chunks:
+            return await self._aprocess_long_text(chunks, on_chunk)
+        return await self._aformalize_single(text, debug, on_chunk, context)
+    
+    async def _aformalize_single(
+        self,
+        text: str,
+        debug: bool = True,
+        on_chunk: Optional[Callable[[int, int, str], None]] = None,
+        context: str = ""
+    ) -> str:
+        """_formalize_single-ийн async хувилбар"""
+        system_prompt, user_prompt = self._build_prompts(text, context)
+        
+        try:
+            if debug:
+                print(f"\n   📤 SLM рүү async хүсэлт илгээж байна...")
+                print(f"   Модель: {self.model}")
+                print(f"   Урт: {len(text)} тэмдэгт, ~{token_estimator.count(text)} token")
             
-            # Эцсийн validation
-            is_valid, errors = self._validate_result_flexible(text, cleaned)
+            messages, options = self._formalize_messages(system_prompt, user_prompt, text)
+            result = await self._achat(messages, options)
             
-            if not is_valid:
-                if debug:
-                    print(f"\n   ⚠️ Validation:")
-                    for error in errors[:3]:
-                        print(f"      • {error}")
-            else:
-                if debug:
-                    print(f"   ✅ Чанар хангалттай")
+            if debug:
+                print(f"\n   📥 SLM хариулт ирлээ ({len(result)} тэмдэгт)")
             
+            cleaned = self._aggressive_postprocess(result)
+            
+            segments = align_segments(text, cleaned)
+            failed = self._segments_to_retry(segments)
+            
+            if failed:
+                cleaned = await self._aretry_segments(segments, failed)
+            
+            elif not self._check_meaning_preserved(text, cleaned):
+                meaning_check_failures.inc()
+                print(f"\n   ⚠️ АНХААРУУЛГА: Утга алдагдсан байж магадгүй!")
+                print(f"   🔄 Дахин оролдож байна (илүү консерватив)...")
+                
+                retry_result = await self._aretry_formalize_conservative(text, system_prompt, user_prompt)
+                if retry_result:
+                    cleaned = retry_result
+            
+            cleaned = await asyncio.to_thread(self._finalize, text, cleaned, debug)
+            if on_chunk:
+                on_chunk(1, 1, cleaned)
             return cleaned
             
         except Exception as e:
-            if isinstance(e, RuntimeError):
-                raise
-            else:
-                raise RuntimeError(
-                    f"❌ SLM алдаа!\n"
-                    f"   Model: {self.model}\n"
-                    f"   Алдаа: {str(e)}"
-                )
+            raise self._slm_error(e)
     
     def _check_meaning_preserved(self, original: str, formalized: str) -> bool:
         """
@@ -257,13 +543,7 @@ class SLMOnlySummarizer:
         
         # 3. Утгагүй өгүүлбэр эсэх
         # "Хэдүүлэх төслийг" гэх мэт утгагүй үг
-        nonsense_patterns = [
-            r'хэдүүлэх',  # Утгагүй үйл үг
-            r'[а-яёүө]{15,}',  # Хэт урт утгагүй үг
-            r'\b[а-яёүө]\b\s+\b[а-яёүө]\b\s+\b[а-яёүө]\b',  # "а б в" гэх мэт
-        ]
-        
-        for pattern in nonsense_patterns:
+        for pattern in NONSENSE_PATTERNS:
             if re.search(pattern, formalized):
                 print(f"      ⚠️ Утгагүй өгүүлбэр илэрсэн: {pattern}")
                 return False
@@ -276,6 +556,52 @@ class SLMOnlySummarizer:
         
         return True
     
+    def _conservative_messages(self, system_prompt: str, user_prompt: str, text: str) -> Tuple[List[Dict], Dict]:
+        """Консерватив retry-ийн messages, options"""
+        # Илүү тодорхой анхааруулга - бичлэгийн ард нэмнэ (анхны оролдлогын
+        # prompt бүхэлдээ prefix болж cache-ээс уншигдана)
+        conservative_prompt = user_prompt + """
+
+🚨 ЧУХАЛ АНХААРУУЛГА:
+1. Нэр үгс БҮРЭН хадгал (Анна → А.Анна, утга ижил)
+2. Огноо БҮРЭН хадгал (даваа гараг → даваа гараг)
+3. Тоо БҮРЭН хадгал
+4. Үйл үгийн утга хадгал (дуусгах → дуусгах)
+5. ЗӨВХӨН хэллэг үгс арилга
+
+Үг солихгүй, утгыг алдахгүй!"""
+        
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": conservative_prompt}
+        ]
+        options = {
+            "temperature": 0.05,  # Илүү консерватив
+            "top_p": 0.7,
+            "num_predict": self._predict_limit(text),
+            "repeat_penalty": 1.15,
+            "num_ctx": self.num_ctx,
+            "stop": self.STOP_SEQUENCES,
+        }
+        return messages, options
+    
+    def _accept_retry(self, text: str, result: str) -> Optional[str]:
+        """Retry үр дүнг цэвэрлэж, утга хадгалсан бол буцаах"""
+        cleaned = self._aggressive_postprocess(result)
+        
+        # Дахин утгын шалгалт
+        is_meaningful = self._check_meaning_preserved(text, cleaned)
+        
+        if is_meaningful:
+            conservative_retries.inc(outcome="accepted")
+            print(f"   ✅ Retry амжилттай - утга хадгалагдсан!")
+            return cleaned
+        else:
+            meaning_check_failures.inc()
+            conservative_retries.inc(outcome="rejected")
+            print(f"   ⚠️ Retry ч утга алдсан - анхны үр дүнг ашиглана")
+            return None
+    
     def _retry_formalize_conservative(
         self,
         text: str,
@@ -286,81 +612,116 @@ class SLMOnlySummarizer:
         КОНСЕРВАТИВ retry - агуулга илүү хадгална
         """
         try:
-            # Илүү тодорхой анхааруулга
-            conservative_prompt = user_prompt + """
-
-🚨 ЧУХАЛ АНХААРУУЛГА:
-1. Нэр үгс БҮРЭН хадгал (Анна → А.Анна, утга ижил)
-2. Огноо БҮРЭН хадгал (даваа гараг → даваа гараг)
-3. Тоо БҮРЭН хадгал
-4. Үйл үгийн утга хадгал (дуусгах → дуусгах)
-5. ЗӨВХӨН хэллэг үгс арилга
-
-Үг солихгүй, утгыг алдахгүй!"""
-            
-            response = chat(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": conservative_prompt}
-                ],
-                options={
-                    "temperature": 0.05,  # Илүү консерватив
-                    "top_p": 0.7,
-                    "num_predict": 2000,
-                    "repeat_penalty": 1.15,
-                }
-            )
-            
-            result = response["message"]["content"].strip()
-            cleaned = self._aggressive_postprocess(result)
-            
-            # Дахин утгын шалгалт
-            is_meaningful = self._check_meaning_preserved(text, cleaned)
-            
-            if is_meaningful:
-                print(f"   ✅ Retry амжилттай - утга хадгалагдсан!")
-                return cleaned
-            else:
-                print(f"   ⚠️ Retry ч утга алдсан - анхны үр дүнг ашиглана")
-                return None
+            with stage_duration.time(stage="retry"), tracer.span("retry", length=len(text)) as span:
+                messages, options = self._conservative_messages(system_prompt, user_prompt, text)
+                result = self._chat(messages, options, operation="retry")
+                accepted = self._accept_retry(text, result)
+                span.set_attribute("accepted", accepted is not None)
+                return accepted
+                
+        except Exception as e:
+            conservative_retries.inc(outcome="error")
+            print(f"   ❌ Retry алдаа: {e}")
+            return None
+    
+    async def _aretry_formalize_conservative(
+        self,
+        text: str,
+        system_prompt: str,
+        user_prompt: str
+    ) -> Optional[str]:
+        """
+        КОНСЕРВАТИВ retry (async)
+        """
+        try:
+            with stage_duration.time(stage="retry"), tracer.span("retry", length=len(text)) as span:
+                messages, options = self._conservative_messages(system_prompt, user_prompt, text)
+                result = await self._achat(messages, options, operation="retry")
+                accepted = self._accept_retry(text, result)
+                span.set_attribute("accepted", accepted is not None)
+                return accepted
                 
         except Exception as e:
+            conservative_retries.inc(outcome="error")
             print(f"   ❌ Retry алдаа: {e}")
             return None
     
+    def _segments_to_retry(self, segments: List[Segment]) -> List[Segment]:
+        """
+        Дангаар нь дахин үүсгэх ээлжүүд - олон ээлж алдсан бол хоосон
+        (бүтэн текстийн шалгалт, консерватив retry шийднэ)
+        """
+        failed = [segment for segment in segments if segment.errors]
+        if len(failed) > len(segments) * self.segment_retry_max_ratio:
+            return []
+        return failed
+    
+    def _segment_messages(self, segment: Segment) -> Tuple[List[Dict], Dict]:
+        """Нэг ээлжийн консерватив prompt - num_predict ээлжийн хэмжээнээс"""
+        system_prompt, user_prompt = self._build_prompts(segment.source)
+        return self._conservative_messages(system_prompt, user_prompt, segment.source)
+    
+    def _accept_segment(self, segment: Segment, result: str):
+        """Ээлжийн retry зөв бол хариунд оруулах"""
+        cleaned = self._aggressive_postprocess(result)
+        errors = segment_errors(segment.source, cleaned)
+        # Алга болсон ээлжид алдаатай ч гэсэн retry-ийн хариу илүү
+        if (errors and segment.output) or not cleaned:
+            segment_retries.inc(outcome="rejected")
+            print(f"   ⚠️ Ээлжийн retry ч утга алдсан ({'; '.join(errors)}) - анхны үр дүнг ашиглана")
+            return
+        segment_retries.inc(outcome="accepted")
+        segment.output = cleaned
+        segment.errors = errors
+    
+    def _segment_retry_span(self, segments: List[Segment], failed: List[Segment]):
+        print(f"\n   ⚠️ {len(failed)}/{len(segments)} ээлжид утга алдагдсан: {failed[0].errors[0]}")
+        print(f"   🔄 Зөвхөн тэдгээрийг дахин үүсгэж байна (консерватив)...")
+        return tracer.span(
+            "retry",
+            scope="segment",
+            segments=len(failed),
+            length=sum(len(segment.source) for segment in failed)
+        )
+    
+    def _retry_segments(self, segments: List[Segment], failed: List[Segment]) -> str:
+        """
+        Утга алдсан ээлжүүдийг л дахин үүсгэж, бусдыг нь хэвээр үлдээн нийлүүлэх
+
+        Retry-ийн prompt, num_predict нь бүтэн хэсгийн биш, ээлжийн хэмжээтэй.
+        """
+        with stage_duration.time(stage="retry"), self._segment_retry_span(segments, failed):
+            for segment in failed:
+                try:
+                    messages, options = self._segment_messages(segment)
+                    self._accept_segment(segment, self._chat(messages, options, operation="segment_retry"))
+                except Exception as e:
+                    segment_retries.inc(outcome="error")
+                    print(f"   ❌ Ээлжийн retry алдаа: {e}")
+        return splice(segments)
+    
+    async def _aretry_segments(self, segments: List[Segment], failed: List[Segment]) -> str:
+        """
+        _retry_segments-ийн async хувилбар - ээлжүүд зэрэг явна (llm_scheduler хязгаарлана)
+        """
+        async def retry(segment: Segment):
+            try:
+                messages, options = self._segment_messages(segment)
+                self._accept_segment(segment, await self._achat(messages, options, operation="segment_retry"))
+            except Exception as e:
+                segment_retries.inc(outcome="error")
+                print(f"   ❌ Ээлжийн retry алдаа: {e}")
+        
+        with stage_duration.time(stage="retry"), self._segment_retry_span(segments, failed):
+            await asyncio.gather(*(retry(segment) for segment in failed))
+        return splice(segments)
+    
     def _aggressive_postprocess(self, text: str) -> str:
         """
         Хүчтэй post-processing
         """
-        # Хэллэг үгс
-        filler_phrases = [
-            'шүү дээ', 'л байх даа', 'л байх', 'байхаа', 'биз дээ', 
-            'аа дээ', 'шүү аа', 'ээ дээ', 'өө дээ', 'даа шүү',
-            'гэж бодож байна', 'гэж боддог', 'гэж үзэж байна'
-        ]
-        
-        for phrase in sorted(filler_phrases, key=len, reverse=True):
-            text = re.sub(
-                r'\b' + re.escape(phrase) + r'\b',
-                '',
-                text,
-                flags=re.IGNORECASE
-            )
-        
-        # Богино хэллэг үгс
-        short_fillers = [
-            'шүү', 'дээ', 'даа', 'аа', 'ээ', 'өө', 'юу', 
-            'гээд', 'тэгээд', 'за', 'тэгэхээр', 'байхаа'
-        ]
-        
-        for filler in short_fillers:
-            text = re.sub(
-                r'\b' + re.escape(filler) + r'\b',
-                '',
-                text,
-                flags=re.IGNORECASE
-            )
+        # Хэллэг үгс (урт, богино) - lexicons/postprocess.txt, нэг дамжилтаар
+        text = lexicon.matcher("postprocess").sub(text)
         
         # Зөв бичгийн дүрмүүд
         text = re.sub(r'\s+([,.!?:;])', r'\1', text)
@@ -421,34 +782,143 @@ class SLMOnlySummarizer:
         
         return not has_critical, errors
     
-    def _process_long_text(self, text: str) -> str:
+    def _split_chunks(self, text: str, budget: Optional[int] = None) -> List[Chunk]:
         """
-        Урт текстийг хэсэглэх
+        Урт текстийг ярианы ээлж, өгүүлбэрээр token budget-ээр хэсэглэх (текст хаягдахгүй)
         """
-        sentences = [s.strip() + '.' for s in text.split('.') if len(s.strip()) > 20]
-        
-        chunks = []
-        current_chunk = ""
-        
-        for sentence in sentences:
-            if len(current_chunk) + len(sentence) < self.max_chunk_length:
-                current_chunk += " " + sentence
-            else:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                current_chunk = sentence
-        
-        if current_chunk:
-            chunks.append(current_chunk.strip())
-        
-        formalized_chunks = []
-        for i, chunk in enumerate(chunks):
-            print(f"   📄 Хэсэг {i+1}/{len(chunks)} боловсруулж байна...")
-            formalized = self.formalize_text(chunk, debug=False)
-            formalized_chunks.append(formalized)
-        
+        return split_chunks(
+            text,
+            budget or self.chunk_token_budget(),
+            self.chunk_overlap,
+            token_estimator.count
+        )
+    
+    def _chunk_failed(self, index: int, total: int, attempt: int, error: Exception) -> Optional[float]:
+        """
+        Хэсгийн оролдлого амжилтгүй - дахин оролдох бол хүлээх хугацаа, үгүй бол None
+        """
+        if attempt >= self.chunk_max_retries:
+            if attempt:
+                chunk_retries.inc(outcome="failed")
+            return None
+        delay = self.chunk_retry_backoff * (2 ** attempt)
+        print(f"   🔁 Хэсэг {index}/{total} амжилтгүй ({error}) - {delay:.1f}s дараа дахин оролдоно")
+        return delay
+
+    def _formalize_chunk(self, index: int, total: int, chunk: Chunk) -> str:
+        """Нэг хэсгийг албан болгох - амжилтгүй бол зөвхөн энэ хэсгийг дахин оролдоно"""
+        attempt = 0
+        while True:
+            with tracer.span("chunk", index=index, total=total, length=len(chunk), attempt=attempt + 1) as span:
+                try:
+                    text = self._pre_spell_check(chunk.text, debug=False)
+                    formalized = self._formalize_single(text, debug=False, context=chunk.context)
+                except Exception as e:
+                    span.record_error(e)
+                    delay = self._chunk_failed(index, total, attempt, e)
+                    if delay is None:
+                        raise
+                else:
+                    if attempt:
+                        chunk_retries.inc(outcome="recovered")
+                    return formalized
+            time.sleep(delay)
+            attempt += 1
+
+    async def _aformalize_chunk(self, index: int, total: int, chunk: Chunk) -> str:
+        """_formalize_chunk-ийн async хувилбар"""
+        attempt = 0
+        while True:
+            with tracer.span("chunk", index=index, total=total, length=len(chunk), attempt=attempt + 1) as span:
+                try:
+                    text = await asyncio.to_thread(self._pre_spell_check, chunk.text, False)
+                    formalized = await self._aformalize_single(text, debug=False, context=chunk.context)
+                except Exception as e:
+                    span.record_error(e)
+                    delay = self._chunk_failed(index, total, attempt, e)
+                    if delay is None:
+                        raise
+                else:
+                    if attempt:
+                        chunk_retries.inc(outcome="recovered")
+                    return formalized
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _process_long_text(
+        self,
+        chunks: List[Chunk],
+        on_chunk: Optional[Callable[[int, int, str], None]] = None
+    ) -> str:
+        """
+        Хэсэглэсэн урт текстийг боловсруулах
+
+        Хэсгүүд chunk_concurrency хүртэл зэрэг явж, анхны дарааллаараа
+        нийлнэ. on_chunk мөн дарааллаараа дуудагдана.
+        """
+        total = len(chunks)
+        print(f"   📄 {total} хэсэг, зэрэг {min(self.chunk_concurrency, total)}")
+
+        with ThreadPoolExecutor(max_workers=min(self.chunk_concurrency, total) or 1) as executor:
+            # Span-ууд эцэг span-даа холбогдохын тулд context-ийг хэсэг бүрт хуулна
+            futures = [
+                executor.submit(contextvars.copy_context().run, self._formalize_chunk, i + 1, total, chunk)
+                for i, chunk in enumerate(chunks)
+            ]
+            formalized_chunks = []
+            try:
+                for i, future in enumerate(futures):
+                    formalized = future.result()
+                    formalized_chunks.append(formalized)
+                    if on_chunk:
+                        on_chunk(i + 1, total, formalized)
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
         return "\n\n".join(formalized_chunks)
 
+    async def _aprocess_long_text(
+        self,
+        chunks: List[Chunk],
+        on_chunk: Optional[Callable[[int, int, str], None]] = None
+    ) -> str:
+        """
+        Хэсэглэсэн урт текстийг боловсруулах (async)
+
+        Хэсгүүд chunk_concurrency хүртэл зэрэг явна (SLM-ийн нийт ачааллыг
+        llm_scheduler хязгаарлана). Хугацаа ≈ хэсгийн тоо / зэрэг. Аль нэг
+        хэсэг retry-ийн дараа ч амжилтгүй бол үлдсэнийг цуцална.
+        """
+        total = len(chunks)
+        print(f"   📄 {total} хэсэг, зэрэг {min(self.chunk_concurrency, total)}")
+
+        semaphore = asyncio.Semaphore(self.chunk_concurrency)
+        results: Dict[int, str] = {}
+        emitted = 0
+
+        async def run(index: int, chunk: Chunk):
+            nonlocal emitted
+            async with semaphore:
+                results[index] = await self._aformalize_chunk(index + 1, total, chunk)
+            # Дууссан дарааллын эхний хэсгүүдийг on_chunk-д дарааллаар нь өгөх
+            while emitted in results:
+                emitted += 1
+                if on_chunk:
+                    on_chunk(emitted, total, results[emitted - 1])
+
+        tasks = [asyncio.create_task(run(i, chunk)) for i, chunk in enumerate(chunks)]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+
+        return "\n\n".join(results[i] for i in range(total))
+
 
 # ТЕСТ
 if __name__ == "__main__":
@@ -457,7 +927,7 @@ if __name__ == "__main__":
     print("="*60 + "\n")
     
     try:
-        summarizer = SLMOnlySummarizer(model="qwen2.5:7b", use_spell_check=False)
+        summarizer = SLMOnlySummarizer(use_spell_check=False)
         
         # ТЕСТ 1: Огноотой
         test1 = """
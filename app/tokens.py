@@ -0,0 +1,257 @@
+"""
+Token тоолох, context budget
+
+Монгол кирилл текст англиас хамаагүй олон token болдог тул тэмдэгтээр
+хэмжсэн хэсэг context-д багтах эсэх нь тодорхойгүй. Энд:
+
+    1. TOKENIZER заасан бол model-ийн tokenizer-оор (tokenizers сан)
+       яг тоолно
+    2. Үгүй бол бичиг тус бүрийн тэмдэгт/token харьцаагаар тооцоолж,
+       Ollama-ийн хариуны prompt_eval_count-оор тасралтгүй засварлана
+
+Үүсгэх token-ий хязгаар (num_predict) мөн оролтын token-оос гарна.
+
+Хүсэлт бүрийн token зарцуулалтыг (track_usage) хэсгийн budget, num_ctx-тэй
+хамт API хариунд буцаана.
+"""
+
+import math
+import re
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from .config import (
+    TOKENIZER, TOKEN_CHARS_CYRILLIC, TOKEN_CHARS_LATIN, LLM_MIN_PREDICT, LLM_MAX_PREDICT
+)
+
+try:
+    from tokenizers import Tokenizer
+    TOKENIZERS_AVAILABLE = True
+except ImportError:
+    TOKENIZERS_AVAILABLE = False
+
+# Chat template-ийн message бүрийн нэмэлт token (<|im_start|>role ... <|im_end|>)
+MESSAGE_OVERHEAD_TOKENS = 4
+# Хариу эхлүүлэх template token
+REPLY_OVERHEAD_TOKENS = 3
+
+_CYRILLIC = re.compile(r"[\u0400-\u04FF]")
+_LATIN = re.compile(r"[A-Za-z]")
+_SPACE = re.compile(r"[ \t]")
+_ASTRAL = re.compile(r"[\U00010000-\U0010FFFF]")  # emoji - ихэвчлэн 2+ token
+
+# Cache-ийн мэдээгүй хариунд тооцооллыг бууруулах засварын доод харьцаа
+CACHE_UNKNOWN_MIN_RATIO = 0.85
+
+
+class TokenEstimator:
+    """
+    Token тоологч
+
+    Args:
+        tokenizer: HF tokenizer-ийн нэр ("Qwen/Qwen2.5-7B-Instruct") эсвэл
+                   tokenizer.json-ийн зам ("" = тооцоолол)
+        cyrillic_chars: Кирилл тэмдэгт / token (тооцоололд)
+        latin_chars: Латин тэмдэгт / token (тооцоололд)
+    """
+
+    def __init__(
+        self,
+        tokenizer: str = TOKENIZER,
+        cyrillic_chars: float = TOKEN_CHARS_CYRILLIC,
+        latin_chars: float = TOKEN_CHARS_LATIN
+    ):
+        self.cyrillic_chars = cyrillic_chars
+        self.latin_chars = latin_chars
+        self.tokenizer = self._load(tokenizer)
+        # prompt_eval_count / тооцоолол - Ollama-ийн хариугаар засварлагдана
+        self.correction = 1.0
+        self.samples = 0
+        self._lock = threading.Lock()
+
+    def _load(self, name: str):
+        if not name:
+            return None
+        if not TOKENIZERS_AVAILABLE:
+            print(f"⚠️  tokenizers суулгаагүй - token тооцоолол ашиглана (pip install tokenizers)")
+            return None
+        try:
+            if name.endswith(".json"):
+                return Tokenizer.from_file(name)
+            return Tokenizer.from_pretrained(name)
+        except Exception as e:
+            print(f"⚠️  Tokenizer ачаалагдсангүй ({name}): {e} - тооцоолол ашиглана")
+            return None
+
+    @property
+    def method(self) -> str:
+        return "tokenizer" if self.tokenizer else "estimate"
+
+    def _estimate(self, text: str) -> float:
+        cyrillic = len(_CYRILLIC.findall(text))
+        latin = len(_LATIN.findall(text))
+        spaces = len(_SPACE.findall(text))
+        astral = len(_ASTRAL.findall(text))
+        # Тоо, цэг таслал, мөр шилжилт, бусад тэмдэгт - тус бүр нэг token орчим
+        other = len(text) - cyrillic - latin - spaces - astral
+        return cyrillic / self.cyrillic_chars + latin / self.latin_chars + other + astral * 2
+
+    def count(self, text: str) -> int:
+        """Текстийн token тоо"""
+        if not text:
+            return 0
+        if self.tokenizer:
+            return len(self.tokenizer.encode(text, add_special_tokens=False).ids)
+        return math.ceil(self._estimate(text) * self.correction)
+
+    def count_messages(self, messages: List[Dict]) -> int:
+        """Chat messages-ийн prompt token (template-ийн нэмэлтийг оролцуулан)"""
+        return sum(
+            self.count(m["content"]) + MESSAGE_OVERHEAD_TOKENS for m in messages
+        ) + REPLY_OVERHEAD_TOKENS
+
+    def predict_limit(self, text: str, ratio: float) -> int:
+        """
+        Оролтын хэмжээнд тохирсон num_predict
+
+        Model давтах, тайлбар нэмэх үед ч үүсгэх token (CPU дээрх хугацаа)
+        оролтын token × ratio-оос хэтрэхгүй.
+        """
+        limit = math.ceil(self.count(text) * ratio)
+        return min(LLM_MAX_PREDICT, max(LLM_MIN_PREDICT, limit))
+
+    def calibrate(self, estimated: int, observed: Optional[int], cached: Optional[int] = None):
+        """
+        Тооцооллыг SLM-ийн бодит prompt_eval_count-оор засварлах
+
+        Ollama prompt-ийн cache-лэгдсэн хэсгийг (prefix) тоолдоггүй бөгөөд
+        хэдийг нь cache-ээс авсныг мэдээлдэггүй. Cache-ийн тоо (cached)
+        ирээгүй бол тооцооллоос бага ажиглалт cache-ийнх байж болох тул
+        зөвхөн бага зөрүүтэйг нь авна - budget хэтрэх (том хэсэг) эрсдэлгүй.
+        """
+        if self.tokenizer or not observed or estimated <= 0:
+            return
+        ratio = (observed + (cached or 0)) / estimated
+        low = 0.5 if cached is not None else CACHE_UNKNOWN_MIN_RATIO
+        if not low <= ratio <= 2.0:
+            return
+        with self._lock:
+            self.samples += 1
+            # Эхний ажиглалтууд илүү жинтэй, дараа нь аажим засварлана
+            alpha = max(0.05, 1 / self.samples)
+            self.correction = min(3.0, max(0.3, self.correction * (1 + alpha * (ratio - 1))))
+
+    def stats(self) -> Dict:
+        return {
+            "method": self.method,
+            "correction": round(self.correction, 3),
+            "samples": self.samples,
+        }
+
+
+class TokenUsage:
+    """
+    Нэг хүсэлтийн token зарцуулалт (SLM дуудлага бүрээс нэмэгдэнэ)
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.estimated_prompt_tokens = 0
+        self.max_prompt_tokens = 0
+        self.over_budget = 0
+        self.truncated = 0
+        self.cached_prompt_tokens = 0
+        self.prefill_ms = 0.0
+        self.budget: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def record(self, estimated: int, response: Any, options: Optional[Dict] = None):
+        options = options or {}
+        num_ctx = options.get("num_ctx")
+        num_predict = options.get("num_predict")
+        prompt_tokens = _field(response, "prompt_eval_count") or 0
+        completion_tokens = _field(response, "eval_count") or 0
+        prefill_ns = _field(response, "prompt_eval_duration") or 0
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.cached_prompt_tokens += _field(response, "prompt_cache_count") or 0
+            self.prefill_ms += prefill_ns / 1e6
+            self.estimated_prompt_tokens += estimated
+            self.max_prompt_tokens = max(self.max_prompt_tokens, estimated, prompt_tokens)
+            if num_ctx and max(estimated, prompt_tokens) >= num_ctx:
+                self.over_budget += 1
+            # num_predict-д хүрсэн - хариу тасарсан байж болно
+            if num_predict and completion_tokens >= num_predict:
+                self.truncated += 1
+
+    def set_budget(self, **values):
+        """Хэсгийн budget, num_ctx зэрэг төлөвлөсөн утгууд"""
+        with self._lock:
+            self.budget.update(values)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                **self.budget,
+                "calls": self.calls,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "estimated_prompt_tokens": self.estimated_prompt_tokens,
+                "max_prompt_tokens": self.max_prompt_tokens,
+                "over_budget": self.over_budget,
+                "truncated": self.truncated,
+                "cached_prompt_tokens": self.cached_prompt_tokens,
+                "prefill_ms": round(self.prefill_ms, 1),
+                "estimator": token_estimator.method,
+            }
+
+
+def _field(response: Any, name: str) -> Optional[int]:
+    if isinstance(response, dict):
+        return response.get(name)
+    return getattr(response, name, None)
+
+
+_current_usage: ContextVar[Optional[TokenUsage]] = ContextVar("token_usage", default=None)
+
+
+@contextmanager
+def track_usage():
+    """
+    Энэ context доторх (task, thread-ийг оролцуулан) SLM дуудлагуудын token-ийг цуглуулах
+
+    Жишээ:
+        with track_usage() as usage:
+            ...
+        usage.to_dict()
+    """
+    usage = TokenUsage()
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+
+def current_usage() -> Optional[TokenUsage]:
+    return _current_usage.get()
+
+
+def record_usage(estimated: int, response: Any, options: Optional[Dict] = None):
+    """SLM хариуг тооцооллын засвар болон хүсэлтийн зарцуулалтад бүртгэх"""
+    token_estimator.calibrate(
+        estimated, _field(response, "prompt_eval_count"), _field(response, "prompt_cache_count")
+    )
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.record(estimated, response, options)
+
+
+# Процесс даяар нэг тоологч (засварын коэффициент хуримтлагдана)
+token_estimator = TokenEstimator()
@@ -0,0 +1,268 @@
+"""
+Trace span (OpenTelemetry маягийн)
+
+Нэг хүсэлтийн хугацаа хаана зарцуулагдсаныг (урт хэсэг, консерватив
+retry, зөв бичгийн шалгалт, DOCX export, SLM slot хүлээлт) trace-ээс нь
+шууд харахад зориулсан. Span-ууд contextvars-аар дамжих тул asyncio
+task, asyncio.to_thread дотор ч эцэг span-даа автоматаар холбогдоно.
+
+    request → pipeline → stage.formalize → chunk → llm.chat
+                                         → retry → llm.chat
+                       → stage.actions   → llm.chat
+
+Дууссан span бүр бүртгэгдсэн exporter-ууд руу илгээгдэнэ (TRACE_EXPORTERS):
+    memory - санах ойд сүүлийн TRACE_MEMORY_SPANS span (GET /traces/{id})
+    jsonl  - TRACE_JSONL_PATH файлд мөр бүрт нэг span
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from .config import TRACE_EXPORTERS, TRACE_MEMORY_SPANS, TRACE_JSONL_PATH
+
+
+class Span:
+    """
+    Нэг span
+
+    Attributes:
+        name: Span-ийн нэр ("stage.formalize", "llm.chat" гэх мэт)
+        trace_id: Trace-ийн id (root span-аас өвлөнө)
+        span_id, parent_id: Span-ийн id, эцэг span-ийн id
+        attributes: Нэмэлт мэдээлэл (chunk урт, model, options, token тоо)
+    """
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.start_time = time.time()
+        self.end_time: Optional[float] = None
+        self.duration_ms: Optional[float] = None
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self._started = time.perf_counter()
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: Dict[str, Any]):
+        self.attributes.update(attributes)
+
+    def record_error(self, error: BaseException):
+        self.status = "error"
+        self.error = f"{type(error).__name__}: {error}"
+
+    def end(self):
+        self.end_time = time.time()
+        self.duration_ms = round((time.perf_counter() - self._started) * 1000, 2)
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class SpanExporter:
+    """Exporter-ийн суурь - дууссан span бүрийг хүлээн авна"""
+
+    def export(self, span: Span):
+        raise NotImplementedError
+
+    def shutdown(self):
+        pass
+
+
+class InMemoryExporter(SpanExporter):
+    """
+    Сүүлийн max_spans span-ийг trace-ээр бүлэглэж санах ойд хадгалах
+
+    Args:
+        max_spans: Хадгалах span-ийн дээд тоо (хуучин trace-ууд эхэлж устна)
+    """
+
+    def __init__(self, max_spans: int = TRACE_MEMORY_SPANS):
+        self.max_spans = max_spans
+        self._traces: "OrderedDict[str, List[Dict]]" = OrderedDict()
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def export(self, span: Span):
+        with self._lock:
+            spans = self._traces.setdefault(span.trace_id, [])
+            spans.append(span.to_dict())
+            self._count += 1
+            while self._count > self.max_spans and len(self._traces) > 1:
+                _, dropped = self._traces.popitem(last=False)
+                self._count -= len(dropped)
+
+    def get_trace(self, trace_id: str) -> Optional[List[Dict]]:
+        with self._lock:
+            spans = self._traces.get(trace_id)
+            return sorted(spans, key=lambda s: s["start_time"]) if spans else None
+
+    def recent_traces(self, limit: int = 20) -> List[Dict]:
+        """Сүүлийн trace-ууд (root span-ийн товч)"""
+        with self._lock:
+            items = list(self._traces.items())[-limit:]
+
+        summaries = []
+        for trace_id, spans in reversed(items):
+            root = next((s for s in spans if s["parent_id"] is None), spans[0])
+            summaries.append({
+                "trace_id": trace_id,
+                "name": root["name"],
+                "duration_ms": root["duration_ms"],
+                "status": root["status"],
+                "spans": len(spans),
+            })
+        return summaries
+
+
+class JsonlExporter(SpanExporter):
+    """
+    Span бүрийг JSONL файлд нэмэх (локал шинжилгээнд)
+
+    Args:
+        path: Файлын зам
+    """
+
+    def __init__(self, path: str = TRACE_JSONL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, span: Span):
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def shutdown(self):
+        with self._lock:
+            self._file.close()
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class Tracer:
+    """
+    Span үүсгэгч
+
+    Жишээ:
+        with tracer.span("chunk", index=1, length=len(chunk)) as span:
+            ...
+            span.set_attribute("retried", True)
+    """
+
+    def __init__(self, exporters: Optional[List[SpanExporter]] = None):
+        self.exporters: List[SpanExporter] = list(exporters or [])
+
+    def add_exporter(self, exporter: SpanExporter):
+        self.exporters.append(exporter)
+
+    def get_exporter(self, kind: type) -> Optional[SpanExporter]:
+        """Тухайн төрлийн exporter (жишээ нь InMemoryExporter)"""
+        return next((e for e in self.exporters if isinstance(e, kind)), None)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.exporters)
+
+    def current_span(self) -> Optional[Span]:
+        return _current_span.get()
+
+    def current_trace_id(self) -> Optional[str]:
+        span = _current_span.get()
+        return span.trace_id if span else None
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """
+        Шинэ span нээх - одоогийн span-ийн хүүхэд болно (үгүй бол шинэ trace)
+        """
+        parent = _current_span.get()
+        trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        span = Span(name, trace_id, parent.span_id if parent else None, attributes)
+
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+            self._export(span)
+
+    def _export(self, span: Span):
+        for exporter in self.exporters:
+            try:
+                exporter.export(span)
+            except Exception as e:
+                print(f"⚠️  Trace export алдаа ({type(exporter).__name__}): {e}")
+
+    def shutdown(self):
+        for exporter in self.exporters:
+            exporter.shutdown()
+
+
+def llm_response_attributes(response: Any) -> Dict[str, Any]:
+    """Ollama хариунаас span-ийн attribute (token тоо, хугацаа ms)"""
+    def field(name):
+        if isinstance(response, dict):
+            return response.get(name)
+        return getattr(response, name, None)
+
+    attributes = {
+        "prompt_tokens": field("prompt_eval_count"),
+        "completion_tokens": field("eval_count"),
+    }
+    if field("prompt_cache_count") is not None:
+        attributes["cached_prompt_tokens"] = field("prompt_cache_count")
+    for name in ("total_duration", "load_duration", "prompt_eval_duration", "eval_duration"):
+        value = field(name)
+        if value is not None:
+            attributes[f"{name}_ms"] = round(value / 1e6, 1)
+    return attributes
+
+
+def _create_exporters(names: str) -> List[SpanExporter]:
+    exporters: List[SpanExporter] = []
+    for name in (n.strip().lower() for n in names.split(",")):
+        if not name or name == "none":
+            continue
+        if name == "memory":
+            exporters.append(InMemoryExporter())
+        elif name == "jsonl":
+            exporters.append(JsonlExporter())
+        else:
+            print(f"⚠️  Үл мэдэгдэх trace exporter: {name}")
+    return exporters
+
+
+# Процесс даяар нэг tracer
+tracer = Tracer(_create_exporters(TRACE_EXPORTERS))
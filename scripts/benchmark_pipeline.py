@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+Протокол үүсгэх pipeline-ийн end-to-end benchmark
+
+POST /generate_protocol-ийн бүх замыг (clean_text, entities, formalize_text -
+хэсэглэх, retry, зөв бичиг, action validation, DOCX export) SLM-гүйгээр,
+deterministic хуурамч SLM (FakeLLMClient) эсвэл бичлэг (ReplayClient) дээр
+ажиллуулж, commit хооронд харьцуулах машин-уншигдахуйц үр дүн гаргана:
+
+    - throughput (протокол/с, KB/с)
+    - p50/p95 latency
+    - peak memory (tracemalloc, maxrss)
+    - алхам бүрийн хугацаа (pipeline stage + spell_check, retry)
+
+Ашиглалт:
+    python scripts/benchmark_pipeline.py
+    python scripts/benchmark_pipeline.py --sizes 1k,100k,1m --runs 5 --latency-ms 50 --output bench.json
+    python scripts/benchmark_pipeline.py --replay data/llm_recording.jsonl
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import deque
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+# App-ийг import хийхээс өмнө: cache, trace, job DB benchmark-д нөлөөлөхгүй
+os.environ.setdefault("RESULT_CACHE_ENABLED", "false")
+os.environ.setdefault("TRACE_EXPORTERS", "none")
+os.environ.setdefault("JOBS_DB_PATH", os.path.join(tempfile.gettempdir(), "benchmark_jobs.sqlite3"))
+
+from generate_synthetic_data import generate_sample, NAMES, ACTIONS, TIMES  # noqa: E402
+
+from app import main  # noqa: E402
+from app import metrics  # noqa: E402
+from app.chunker import split_turns  # noqa: E402
+from app.config import SLM_KEEP_ALIVE  # noqa: E402
+from app.llm_client import LLMClient, LLMRouter, ReplayClient  # noqa: E402
+from app.model_registry import ModelRegistry, model_registry  # noqa: E402
+
+
+# ===========================================
+# ХУУРАМЧ SLM
+# ===========================================
+
+class FakeLLMClient(LLMClient):
+    """
+    Deterministic хуурамч SLM
+
+    Албан хэл болгох хүсэлтэд ярианы бичлэгийг (хэллэг үгсгүйгээр) буцааж,
+    action хүсэлтэд "Нэр: ..." ээлжүүдээс JSON array үүсгэнэ. Хугацаа нь
+    latency_ms + cache-гүй prompt token × prefill_ms + үүсгэсэн token × token_ms,
+    үүсгэлт options-ийн num_predict-ээр тасарна.
+
+    Prompt cache: сүүлийн cache_slots prompt-ийг хадгалж, тэдгээртэй ижил
+    prefix-ийг дахин боловсруулахгүй (llama.cpp, Ollama-ийн KV cache шиг).
+
+    Args:
+        latency_ms: Дуудлага бүрийн суурь хугацаа
+        token_ms: Үүсгэсэн token бүрийн хугацаа (≈ 2 тэмдэгт = 1 token)
+        retry_rate: Хэсгийн энэ хувьд эхний хариу нэг ээлжийг гээж, retry
+                    өдөөнө (0..1)
+        prefill_ms: Cache-гүй prompt token бүрийн боловсруулах хугацаа
+        cache_slots: Prefix cache-д хадгалах prompt-ийн тоо
+    """
+
+    host = "fake"
+
+    def __init__(
+        self,
+        latency_ms: float = 0,
+        token_ms: float = 0,
+        retry_rate: float = 0,
+        prefill_ms: float = 0,
+        cache_slots: int = 4
+    ):
+        self.latency_ms = latency_ms
+        self.token_ms = token_ms
+        self.retry_rate = retry_rate
+        self.prefill_ms = prefill_ms
+        self.calls = 0
+        self._prompts = deque(maxlen=cache_slots)
+
+    def _cached_prefix(self, prompt: str) -> int:
+        """Өмнөх prompt-уудтай давхцах хамгийн урт prefix (тэмдэгт)"""
+        cached = max((len(os.path.commonprefix([p, prompt])) for p in self._prompts), default=0)
+        self._prompts.append(prompt)
+        return cached
+
+    def _reply(self, messages, options) -> str:
+        system = messages[0]["content"] if messages else ""
+        user = messages[-1]["content"] if messages else ""
+
+        if "JSON" in system:
+            return self._actions(user)
+
+        match = re.search(r"ЯРИАНЫ БИЧЛЭГ:\n(.*?)(?:\n\n|\Z)", user, re.S)
+        transcript = match.group(1) if match else user
+        formal = re.sub(r"\s*(шүү дээ|л байх даа|байхаа|даа шүү)", "", transcript)
+
+        # Хэсэг бүрт тогтмол шийдвэр - ажиллуулах бүрт ижил. Нэг ээлжийг
+        # гээж, ээлжийн retry өдөөнө (нэг ээлжтэй бол бүтэн retry)
+        conservative = "АНХААРУУЛГА" in user
+        rng = random.Random(transcript)
+        if not conservative and rng.random() < self.retry_rate:
+            turns = split_turns(formal)
+            if len(turns) > 1:
+                turns.pop(rng.randrange(len(turns)))
+                return " ".join(turns)
+            return formal[:len(formal) // 5]
+        return formal
+
+    def _actions(self, text: str) -> str:
+        actions = []
+        # clean_text мөр шилжилтийг арилгадаг тул ээлжийг мөрөөр биш "Нэр:"-ээр салгана
+        turns = [re.match(r"([А-ЯЁӨҮ][а-яёөү]+): (.+)", turn, re.S) for turn in split_turns(text)]
+        for who, said in [turn.groups() for turn in turns if turn][:20]:
+            action = said.strip(" .")
+            if len(action) >= 5:
+                actions.append({"who": who, "action": action, "due": "Хугацаа заагаагүй", "type": "action"})
+        if not actions:
+            actions.append({"who": "Хурлын шийдвэр", "action": "протоколыг батлах", "due": "Хугацаа заагаагүй"})
+        return json.dumps(actions, ensure_ascii=False)
+
+    def _response(self, model, messages, options):
+        self.calls += 1
+        content = self._reply(messages, options) if messages else ""
+        num_predict = (options or {}).get("num_predict")
+        if num_predict:
+            content = content[:num_predict * 2]
+        # Кирилл текст ≈ 2 тэмдэгт/token (app.tokens-ийн тооцооллын засвар 1 орчим үлдэнэ)
+        prompt = "\n".join(m["content"] for m in messages)
+        prompt_tokens = len(prompt) // 2
+        cached_tokens = min(prompt_tokens, self._cached_prefix(prompt) // 2) if messages else 0
+        completion_tokens = len(content) // 2
+        prefill_s = (prompt_tokens - cached_tokens) * self.prefill_ms / 1000
+        eval_s = completion_tokens * self.token_ms / 1000
+        delay = self.latency_ms / 1000 + prefill_s + eval_s if messages else 0
+        return {
+            "model": model,
+            "message": {"role": "assistant", "content": content},
+            "prompt_eval_count": prompt_tokens - cached_tokens,
+            "prompt_cache_count": cached_tokens,
+            "eval_count": completion_tokens,
+            "prompt_eval_duration": int(prefill_s * 1e9),
+            "eval_duration": int(eval_s * 1e9),
+        }, delay
+
+    def chat(self, model, messages, options=None, keep_alive=None):
+        response, delay = self._response(model, messages, options)
+        time.sleep(delay)
+        return response
+
+    async def achat(self, model, messages, options=None, keep_alive=None):
+        response, delay = self._response(model, messages, options)
+        await asyncio.sleep(delay)
+        return response
+
+    def show(self, model):
+        return {"model": model}
+
+    async def aps(self):
+        return [model_registry.model]
+
+    async def aping(self):
+        pass
+
+    def stats(self):
+        return {"backend": "fake", "host": self.host, "calls": self.calls}
+
+
+# ===========================================
+# ЗОХИОМОЛ ХУРАЛ
+# ===========================================
+
+def parse_size(value: str) -> int:
+    """"1k", "100k", "1m" → байт"""
+    value = value.strip().lower()
+    units = {"k": 1024, "m": 1024 * 1024}
+    if value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+
+def synthetic_meeting(size_bytes: int, seed: int = 0) -> str:
+    """
+    Ойролцоогоор size_bytes (UTF-8) хэмжээтэй хурлын бичлэг - seed-ээс хамааран тогтмол
+    """
+    random.seed(seed)
+    lines = []
+    total = 0
+    idx = 0
+    while total < size_bytes:
+        line = generate_sample(idx, NAMES, ACTIONS, TIMES)["input"].rstrip(" .") + "."
+        lines.append(line)
+        total += len(line.encode("utf-8")) + 1
+        idx += 1
+    return "\n".join(lines)
+
+
+# ===========================================
+# BENCHMARK
+# ===========================================
+
+def use_client(client: LLMClient):
+    """
+    main-ийн компонентуудыг өгсөн client-ээр дахин бүртгэх (жинхэнэ SLM руу явахгүй)
+    """
+    router = LLMRouter([client])
+    registry = ModelRegistry(model_registry.model, SLM_KEEP_ALIVE, client=router)
+
+    def warm_up(deps):
+        registry.warm_up()
+        return registry
+
+    def summarizer(deps):
+        from app.summarizer import SLMOnlySummarizer
+        return SLMOnlySummarizer(client=router)
+
+    def action_extractor(deps):
+        from app.action_extractor import SLMOnlyActionExtractor
+        return SLMOnlyActionExtractor(deps["nlp_processor"], client=router)
+
+    main.components.register("model", warm_up)
+    main.components.register("summarizer", summarizer)
+    main.components.register("action_extractor", action_extractor, deps=["nlp_processor"])
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    k = (len(ordered) - 1) * q
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+def _nested_totals():
+    """spell_check, retry зэрэг pipeline-ийн дотоод алхмуудын (count, sum)"""
+    return {key[0]: value for key, value in metrics.stage_duration.totals().items()}
+
+
+def _prefill_totals():
+    """SLM-ийн prompt боловсруулалт - session-ий эхний/дараагийн дуудлагаар (count, sum)"""
+    totals = {}
+    for (_, _, call), (n, total) in metrics.ollama_prefill_duration.totals().items():
+        prev_n, prev_total = totals.get(call, (0, 0.0))
+        totals[call] = (prev_n + n, prev_total + total)
+    return totals
+
+
+async def run_once(text: str, verbose: bool):
+    """Нэг протокол үүсгэх - (нийт ms, алхмуудын ms)"""
+    input_data = main.TextInput(text=text)
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        started = time.perf_counter()
+        _, timings = await main._execute_protocol(input_data)
+    return (time.perf_counter() - started) * 1000, timings
+
+
+async def bench_size(size: int, args) -> dict:
+    text = synthetic_meeting(size, seed=args.seed)
+    print(f"📏 {len(text.encode('utf-8')) / 1024:.0f} KB ({len(text)} тэмдэгт)", file=sys.stderr)
+
+    for _ in range(args.warmup):
+        await run_once(text, args.verbose)
+
+    before = _nested_totals()
+    prefill_before = _prefill_totals()
+    retry_counters = {"whole": metrics.conservative_retries, "segment": metrics.segment_retries}
+    retries_before = {
+        (scope, o): counter.value(outcome=o)
+        for scope, counter in retry_counters.items() for o in ("accepted", "rejected", "error")
+    }
+    latencies = []
+    stages = {}
+
+    started = time.perf_counter()
+    for _ in range(args.runs):
+        results = await asyncio.gather(*(run_once(text, args.verbose) for _ in range(args.concurrency)))
+        for total_ms, timings in results:
+            latencies.append(total_ms)
+            for stage, ms in timings.items():
+                stages.setdefault(stage, []).append(ms)
+    wall_s = time.perf_counter() - started
+
+    after = _nested_totals()
+    prefill = {}
+    for call, (n, total) in _prefill_totals().items():
+        prev_n, prev_total = prefill_before.get(call, (0, 0.0))
+        if n > prev_n:
+            prefill[call] = round((total - prev_total) / (n - prev_n) * 1000, 2)
+    count = len(latencies)
+    nested = {}
+    for stage, (n, total) in after.items():
+        prev_n, prev_total = before.get(stage, (0, 0.0))
+        if stage not in stages and n > prev_n:
+            nested[stage] = {"calls": n - prev_n, "total_ms": round((total - prev_total) * 1000, 2)}
+
+    # Peak memory - tracemalloc хурдыг бууруулдаг тул тусад нь нэг удаа
+    peak_mb = None
+    if args.memory:
+        tracemalloc.start()
+        await run_once(text, args.verbose)
+        peak_mb = round(tracemalloc.get_traced_memory()[1] / 1024 / 1024, 2)
+        tracemalloc.stop()
+
+    return {
+        "size_bytes": len(text.encode("utf-8")),
+        "chars": len(text),
+        "runs": count,
+        "concurrency": args.concurrency,
+        "wall_s": round(wall_s, 3),
+        "throughput_per_s": round(count / wall_s, 3),
+        "throughput_kb_s": round(count * len(text.encode("utf-8")) / 1024 / wall_s, 1),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.5), 2),
+            "p95": round(percentile(latencies, 0.95), 2),
+            "min": round(min(latencies), 2),
+            "max": round(max(latencies), 2),
+        },
+        "stages_ms": {stage: round(sum(v) / len(v), 2) for stage, v in stages.items()},
+        "nested_ms": nested,
+        "retries": {
+            scope: {
+                o: counter.value(outcome=o) - retries_before[(scope, o)] for o in ("accepted", "rejected", "error")
+            }
+            for scope, counter in retry_counters.items()
+        },
+        "prefill_ms_per_call": prefill,
+        "peak_alloc_mb": peak_mb,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run_benchmark(args) -> dict:
+    if args.replay:
+        client = ReplayClient(args.replay, latency_scale=args.replay_latency)
+    else:
+        client = FakeLLMClient(args.latency_ms, args.token_ms, args.retry_rate, args.prefill_ms)
+    use_client(client)
+
+    with contextlib.redirect_stdout(io.StringIO()) if not args.verbose else contextlib.nullcontext():
+        main.components.start()
+        ready = await main.components.wait_ready()
+    if not ready:
+        raise RuntimeError(f"❌ Компонентууд бэлэн болсонгүй: {main.components.status()}")
+
+    results = []
+    try:
+        for size in args.sizes:
+            results.append(await bench_size(size, args))
+    finally:
+        await main.components.stop()
+
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "llm": client.stats(),
+        "params": {
+            "latency_ms": args.latency_ms,
+            "token_ms": args.token_ms,
+            "retry_rate": args.retry_rate,
+            "prefill_ms": args.prefill_ms,
+            "runs": args.runs,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+        },
+        "components": {name: s["state"] for name, s in main.components.status().items()},
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "results": results,
+    }
+
+
+def print_table(report: dict):
+    print(f"\nCommit {report['commit']} | LLM {report['llm'].get('backend')} | maxrss {report['max_rss_mb']} MB", file=sys.stderr)
+    print(f"{'size':>10} {'runs':>5} {'p50 ms':>10} {'p95 ms':>10} {'doc/s':>8} {'KB/s':>8} {'peak MB':>8}", file=sys.stderr)
+    for r in report["results"]:
+        print(
+            f"{r['size_bytes'] // 1024:>8}KB {r['runs']:>5} {r['latency_ms']['p50']:>10} "
+            f"{r['latency_ms']['p95']:>10} {r['throughput_per_s']:>8} {r['throughput_kb_s']:>8} "
+            f"{r['peak_alloc_mb'] if r['peak_alloc_mb'] is not None else '-':>8}",
+            file=sys.stderr
+        )
+        stages = ", ".join(f"{k}={v}" for k, v in {**r["stages_ms"], **{
+            k: v["total_ms"] for k, v in r["nested_ms"].items()
+        }}.items())
+        print(f"{'':>10} {stages}", file=sys.stderr)
+        if r["prefill_ms_per_call"]:
+            prefill = ", ".join(f"{k}={v}" for k, v in r["prefill_ms_per_call"].items())
+            print(f"{'':>10} prefill ms/call: {prefill}", file=sys.stderr)
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Протокол pipeline-ийн end-to-end benchmark")
+    parser.add_argument("--sizes", default="1k,10k,100k,1m", help="Текстийн хэмжээ (default: 1k,10k,100k,1m)")
+    parser.add_argument("--runs", type=int, default=3, help="Хэмжээ бүрт хэдэн удаа (default: 3)")
+    parser.add_argument("--warmup", type=int, default=1, help="Хэмжихгүй эхний ажиллуулалт (default: 1)")
+    parser.add_argument("--concurrency", type=int, default=1, help="Зэрэг ажиллах протокол (default: 1)")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Хуурамч SLM-ийн дуудлагын хугацаа")
+    parser.add_argument("--token-ms", type=float, default=0, help="Хуурамч SLM-ийн token бүрийн хугацаа")
+    parser.add_argument("--prefill-ms", type=float, default=0, help="Хуурамч SLM-ийн cache-гүй prompt token бүрийн хугацаа")
+    parser.add_argument("--retry-rate", type=float, default=0.1, help="Retry өдөөх хэсгийн хувь (default: 0.1)")
+    parser.add_argument("--replay", help="Хуурамч SLM-ийн оронд LLM_RECORD_PATH-ийн бичлэг ашиглах")
+    parser.add_argument("--replay-latency", type=float, default=0, help="Бичигдсэн хугацааг үржүүлэх")
+    parser.add_argument("--seed", type=int, default=0, help="Зохиомол хурлын seed")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="tracemalloc хэмжилт алгасах")
+    parser.add_argument("--output", help="JSON үр дүнг бичих файл (default: stdout)")
+    parser.add_argument("--verbose", action="store_true", help="Pipeline-ийн log харуулах")
+    args = parser.parse_args()
+    args.sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+
+    report = asyncio.run(run_benchmark(args))
+    print_table(report)
+
+    data = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).write_text(data, encoding="utf-8")
+        print(f"\n✅ Үр дүн хадгалагдлаа: {args.output}", file=sys.stderr)
+    else:
+        print(data)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -239,6 +239,11 @@ def show_usage():
 4. SLM төлөв шалгах:
    curl http://localhost:8000/health
 
+5. SLM дуудлагыг бичиж авах, дараа нь network-гүй давтах:
+   LLM_RECORD_PATH=data/llm_recording.jsonl python test_protocol.py text.json
+   LLM_BACKEND=replay LLM_REPLAY_PATH=data/llm_recording.jsonl python test_protocol.py text.json
+   (LLM_REPLAY_LATENCY=1 - бичигдсэн хугацаагаар хүлээх)
+
 ═══════════════════════════════════════════════════════════════
 
 ⚠️  ЧУХАЛ: SLM-ONLY режим
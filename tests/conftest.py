@@ -0,0 +1,19 @@
+"""
+Pytest тохиргоо - repo-ийн root, scripts/-ийг import замд нэмнэ
+
+    python -m pytest tests
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "scripts"))
+
+# App-ийг import хийхээс өмнө: cache, trace, job DB тестэд нөлөөлөхгүй
+os.environ.setdefault("RESULT_CACHE_ENABLED", "false")
+os.environ.setdefault("TRACE_EXPORTERS", "none")
+os.environ.setdefault("JOBS_DB_PATH", os.path.join(tempfile.gettempdir(), "test_jobs.sqlite3"))
@@ -0,0 +1,303 @@
+"""
+Зэрэгцээ ажиллагааны үндсэн хэсгүүдийн тест (SLM-гүй - FakeLLMClient)
+
+    - LLMRouter: холболтын алдаанд өөр host дээр давтах, host хасах, session affinity
+    - Admission: алдаа гарсан ч slot чөлөөлөгдөх, дараалал дүүрэх
+    - SingleFlight: ижил зэрэг хүсэлтүүдийг нэгтгэх
+    - JobStore/JobManager: дуусаагүй job-ийг дахин дараалалд оруулах
+    - ComponentRegistry: анхны оролдлого бүтэлгүйтсэн ч бэлэн болтол хүлээх
+    - align_segments: утга алдсан ээлжийг олох
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from benchmark_pipeline import FakeLLMClient
+
+from app import components, jobs, main
+from app.admission import AdmissionController, AdmissionRejected
+from app.coalesce import SingleFlight
+from app.llm_client import LLMRouter, llm_session
+from app.segments import align_segments, splice
+
+MESSAGES = [{"role": "user", "content": "ЯРИАНЫ БИЧЛЭГ:\nАнна: Сайн байна уу."}]
+
+
+class HostClient(FakeLLMClient):
+    """Нэртэй host - error заасан бол chat() бүр тэр алдааг өгнө"""
+
+    def __init__(self, host: str, error: BaseException = None):
+        super().__init__()
+        self.host = host
+        self.error = error
+
+    def _response(self, model, messages, options):
+        if self.error is not None:
+            self.calls += 1
+            raise self.error
+        return super()._response(model, messages, options)
+
+
+# ---------- LLMRouter ----------
+
+def test_router_retries_connect_failure_and_ejects_host():
+    down = HostClient("down", ConnectionRefusedError("refused"))
+    up = HostClient("up")
+    router = LLMRouter([down, up], fail_threshold=1, eject_seconds=60, session_affinity=False)
+
+    # Эхний сонголт "down" (ижил ачаалалтай үед ээлжилнэ) - "up" дээр давтана
+    response = router.chat(model="m", messages=MESSAGES)
+    assert "Анна" in response["message"]["content"]
+    assert (down.calls, up.calls) == (1, 1)
+
+    status = {s["host"]: s for s in router.stats()["hosts"]}
+    assert not status["down"]["healthy"]
+    assert status["down"]["outstanding"] == 0
+
+    # Хасагдсан host руу дахин очихгүй
+    for _ in range(3):
+        router.chat(model="m", messages=MESSAGES)
+    assert (down.calls, up.calls) == (1, 4)
+
+
+def test_router_does_not_eject_on_request_error():
+    broken = HostClient("broken", ValueError("bad prompt"))
+    router = LLMRouter([broken], fail_threshold=1)
+
+    with pytest.raises(ValueError):
+        router.chat(model="m", messages=MESSAGES)
+
+    status = router.stats()["hosts"][0]
+    assert status["healthy"] and status["errors"] == 0 and status["outstanding"] == 0
+
+
+def test_router_keeps_session_on_one_host():
+    hosts = [HostClient("a"), HostClient("b")]
+    router = LLMRouter(hosts, session_affinity=True)
+
+    async def run():
+        with llm_session() as session:
+            for _ in range(4):
+                await router.achat(model="m", messages=MESSAGES)
+        return session
+
+    session = asyncio.run(run())
+    assert len(session.hosts) == 1
+    assert sorted(h.calls for h in hosts) == [0, 4]
+
+
+# ---------- Admission ----------
+
+def test_admission_slot_released_on_error(monkeypatch):
+    controller = AdmissionController(max_in_flight=1, max_queue=0, queue_timeout=1, rate_per_min=0)
+    monkeypatch.setattr(main, "admission", controller)
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            async with main._admission_slot():
+                assert controller.in_flight == 1
+                raise RuntimeError("pipeline алдаа")
+        # Slot чөлөөлөгдсөн - дараагийн хүсэлт шууд орно
+        async with main._admission_slot():
+            pass
+
+    asyncio.run(run())
+    assert controller.in_flight == 0
+    assert controller.admitted == 2
+
+
+def test_coalesced_followers_do_not_take_slots(monkeypatch):
+    # Нэг л slot, дараалалгүй - дагагч slot авах гэвэл 503 queue_full болно
+    controller = AdmissionController(max_in_flight=1, max_queue=0, queue_timeout=1, rate_per_min=0)
+    monkeypatch.setattr(main, "admission", controller)
+    monkeypatch.setattr(main, "single_flight", SingleFlight())
+    monkeypatch.setattr(main, "COALESCE_ENABLED", True)
+
+    async def execute_protocol(input_data):
+        await asyncio.sleep(0.02)
+        return {"protocol": input_data.text}, {}
+
+    monkeypatch.setattr(main, "_execute_protocol", execute_protocol)
+    input_data = main.TextInput(text="Анна: Сайн байна уу.")
+
+    async def run():
+        return await asyncio.gather(*(main._execute_shared(input_data) for _ in range(3)))
+
+    results = asyncio.run(run())
+    assert sorted(shared for _, _, shared in results) == [False, True, True]
+    assert controller.admitted == 1
+    assert controller.rejected["queue_full"] == 0
+    assert controller.in_flight == 0
+
+
+def test_admission_rejects_when_queue_full():
+    controller = AdmissionController(max_in_flight=1, max_queue=0, queue_timeout=1, rate_per_min=0)
+
+    async def run():
+        await controller.acquire("a")
+        with pytest.raises(AdmissionRejected) as rejected:
+            await controller.acquire("b")
+        controller.release(0.1)
+        await controller.acquire_slot()
+        controller.release(0.1)
+        return rejected.value
+
+    rejected = asyncio.run(run())
+    assert (rejected.status_code, rejected.reason) == (503, "queue_full")
+    assert controller.in_flight == 0
+
+
+def test_rate_charges_full_cost_beyond_burst():
+    controller = AdmissionController(rate_per_min=60, burst=5)
+
+    with pytest.raises(AdmissionRejected) as rejected:
+        controller.check_rate("batch", cost=50)
+    assert (rejected.value.status_code, rejected.value.reason) == (429, "rate_limited")
+
+
+def test_wait_rate_paces_items_and_gives_up_after_timeout():
+    # 600/мин = 0.1 секунд тутам нэг token
+    controller = AdmissionController(queue_timeout=0.15, rate_per_min=600, burst=2)
+
+    async def run():
+        started = time.perf_counter()
+        for _ in range(3):
+            await controller.wait_rate("batch")
+        elapsed = time.perf_counter() - started
+        # Bucket хоосон - хоёр token 0.15 секундэд хуримтлагдахгүй
+        with pytest.raises(AdmissionRejected):
+            await controller.wait_rate("batch", cost=2)
+        return elapsed
+
+    assert asyncio.run(run()) >= 0.09
+    assert controller.rejected["rate_limited"] == 1
+
+
+# ---------- SingleFlight ----------
+
+def test_single_flight_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    started = 0
+
+    async def work():
+        nonlocal started
+        started += 1
+        await asyncio.sleep(0.01)
+        return "протокол"
+
+    async def run():
+        return await asyncio.gather(*(flight.do("key", work) for _ in range(3)))
+
+    results = asyncio.run(run())
+    assert started == 1
+    assert [r for r, _ in results] == ["протокол"] * 3
+    assert sorted(shared for _, shared in results) == [False, True, True]
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_single_flight_shares_error_and_forgets_key():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("SLM алдаа")
+
+    async def run():
+        results = await asyncio.gather(*(flight.do("key", fail) for _ in range(2)), return_exceptions=True)
+        # Алдааны дараа түлхүүр чөлөөлөгдөж, дахин гүйцэтгэнэ
+        result, shared = await flight.do("key", lambda: asyncio.sleep(0, result="ok"))
+        return results, result, shared
+
+    results, result, shared = asyncio.run(run())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert (result, shared) == ("ok", False)
+    assert flight.executed == 2
+
+
+# ---------- Jobs ----------
+
+def test_unfinished_jobs_are_requeued(tmp_path):
+    store = jobs.JobStore(str(tmp_path / "jobs.sqlite3"))
+    first = store.create({"text": "1"})
+    second = store.create({"text": "2"})
+    finished = store.create({"text": "3"})
+    store.update(first, status=jobs.RUNNING)
+    store.update(finished, status=jobs.DONE)
+
+    ran = []
+
+    async def runner(job_id, request, on_progress):
+        ran.append(request["text"])
+        return {"text": request["text"]}
+
+    async def run():
+        manager = jobs.JobManager(store, runner, workers=1)
+        await manager.start()
+        await manager._queue.join()
+        await manager.stop()
+
+    asyncio.run(run())
+    assert ran == ["1", "2"]
+    assert [store.get(j)["status"] for j in (first, second, finished)] == [jobs.DONE] * 3
+    store.close()
+
+
+def test_wait_ready_outlasts_failed_first_attempt(monkeypatch):
+    # Server дахин эхлэхэд Ollama хараахан асаагүй - эхний оролдлого бүтэлгүйтнэ
+    monkeypatch.setattr(components, "INIT_RETRY_INTERVAL", 0.01)
+    attempts = 0
+
+    def factory(deps):
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise ConnectionRefusedError("Ollama асаагүй")
+        return "slm"
+
+    async def run():
+        registry = components.ComponentRegistry()
+        registry.register("slm", factory)
+        registry.start()
+        first = await registry.wait_ready(1)
+        ready = await registry.wait_ready(1, until_ready=True)
+        await registry.stop()
+        return first, ready
+
+    assert asyncio.run(run()) == (False, True)
+    assert attempts == 2
+
+
+def test_wait_ready_gives_up_on_unavailable_component():
+    def factory(deps):
+        raise ImportError("ufal суулгаагүй")
+
+    async def run():
+        registry = components.ComponentRegistry()
+        registry.register("udpipe", factory, retry=False)
+        registry.start()
+        ready = await registry.wait_ready(5, until_ready=True)
+        await registry.stop()
+        return ready, registry.status()["udpipe"]["state"]
+
+    assert asyncio.run(run()) == (False, components.UNAVAILABLE)
+
+
+# ---------- Segments ----------
+
+def test_align_segments_finds_dropped_turn():
+    original = (
+        "Анна: Би төслийн тайланг баасан гарагт 3 хуудсаар бэлтгэнэ.\n"
+        "Бат: Би төсвийн тооцоог маргааш 5 сая төгрөгөөр гаргана.\n"
+        "Дорж: Би гэрээний төслийг даваа гарагт илгээнэ."
+    )
+    formalized = (
+        "А.Анна төслийн тайланг баасан гарагт 3 хуудсаар бэлтгэнэ. "
+        "Д.Дорж гэрээний төслийг даваа гарагт илгээнэ."
+    )
+
+    segments = align_segments(original, formalized)
+    assert [bool(s.errors) for s in segments] == [False, True, False]
+    assert segments[1].errors == ["Ээлж алга болсон"]
+    assert splice(segments) == formalized
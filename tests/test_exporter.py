@@ -0,0 +1,22 @@
+"""
+DOCX хадгалах зам - persist=true файлууд OUTPUT_DIR-ээс гадна бичигдэхгүй
+"""
+
+import pytest
+
+from app import exporter
+
+
+def test_saved_docx_goes_to_output_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(exporter, "OUTPUT_DIR", str(tmp_path / "outputs"))
+
+    filename = exporter.save_protocol_docx(b"docx")
+
+    assert (tmp_path / "outputs" / filename).read_bytes() == b"docx"
+    assert exporter.protocol_path(filename) == tmp_path / "outputs" / filename
+
+
+@pytest.mark.parametrize("filename", ["../protocol.docx", "/etc/protocol.docx", "protocol.txt", ""])
+def test_protocol_path_rejects_foreign_names(filename):
+    with pytest.raises(ValueError):
+        exporter.protocol_path(filename)
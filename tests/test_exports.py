@@ -0,0 +1,23 @@
+"""
+app/init.py-ийн lazy экспорт - __all__ дахь нэр бүр ачаалагдах ёстой
+"""
+
+import importlib
+
+import pytest
+
+init = importlib.import_module("app.init")
+
+
+@pytest.mark.parametrize("name", init.__all__)
+def test_export_resolves(name):
+    value = getattr(init, name)
+    if value is not None:
+        assert value.__name__ == name
+        return
+
+    # Optional модуль None буцаасан бол жинхэнэ шалтгаан нь суулгаагүй dependency байх ёстой
+    assert name in init._OPTIONAL
+    with pytest.raises(ImportError) as error:
+        importlib.import_module(init._EXPORTS[name], "app")
+    assert not error.value.name.startswith("app.")
@@ -0,0 +1,46 @@
+"""
+PhraseMatcher - нэг дамжилтын matcher хуучин хэллэг тус бүрийн давталттай
+(файлын дарааллаар re.sub) давхцсан хэллэгүүд дээр ижил үр дүн өгөх ёстой
+"""
+
+import re
+
+import pytest
+
+from app.lexicon import LEXICONS, PhraseMatcher, lexicon
+
+
+def _per_phrase(entries, text):
+    """Хуучин арга - хэллэг бүрд нэг re.sub, файлын дарааллаар"""
+    for phrase, replacement in entries.items():
+        text = re.sub(r"(?<!\w)" + re.escape(phrase) + r"(?!\w)", replacement, text, flags=re.IGNORECASE)
+    return " ".join(text.split())
+
+
+def _chains(phrases, depth=3):
+    """Төгсгөл нь дараагийнхаа эхлэлтэй давхцсан хэллэгүүдийг залгах ("даа шүү" + "шүү дээ")"""
+    chains = set(phrases)
+    for _ in range(depth - 1):
+        for left in list(chains):
+            words = left.split()
+            for right in phrases:
+                tail = right.split()
+                for k in range(1, min(len(words), len(tail))):
+                    if words[-k:] == tail[:k]:
+                        chains.add(" ".join(words + tail[k:]))
+    return sorted(chains - set(phrases))
+
+
+@pytest.mark.parametrize("name", LEXICONS)
+def test_overlapping_phrases_match_per_phrase_loop(name):
+    entries = lexicon.entries(name)
+    matcher = PhraseMatcher(entries)
+
+    for chain in _chains(list(entries)):
+        text = f"Тэр {chain} явна."
+        assert " ".join(matcher.sub(text).split()) == _per_phrase(entries, text), chain
+
+
+def test_overlapping_fillers_are_removed_together():
+    matcher = lexicon.matcher("spelling")
+    assert " ".join(matcher.sub("Тэр даа шүү дээ явна.").split()) == "Тэр явна."